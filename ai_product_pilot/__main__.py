@@ -1,13 +1,23 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 
+from ai_product_pilot.api.pagination import NEXT_CURSOR_HEADER
+from ai_product_pilot.api.event_routes import router as event_api_router
 from ai_product_pilot.api.feedback_routes import router as feedback_api_router
+from ai_product_pilot.api.job_routes import router as job_api_router
 from ai_product_pilot.api.routes import router as api_router
+from ai_product_pilot.api.uploads import UploadSizeLimitMiddleware
 from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.graph import close_feedback_graph
+from ai_product_pilot.lib.llm import close_llm_clients
+from ai_product_pilot.lib.supabase import close_supabase_client, init_supabase_client
+from ai_product_pilot.services.events import event_listener
+from ai_product_pilot.services.jobs import job_queue
 
 
 @asynccontextmanager
@@ -18,8 +28,25 @@ async def lifespan(app: FastAPI):
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
     logging.info("Application starting up...")
+
+    # Client Supabase partagé (pool de connexions keep-alive)
+    init_supabase_client()
+
+    # Workers de traitement des feedbacks en arrière-plan
+    await job_queue.start()
+
+    # Écoute unique des notifications Postgres relayées au flux d'événements
+    if event_listener is not None:
+        await event_listener.start()
+
     yield
     logging.info("Application shutting down...")
+    if event_listener is not None:
+        await event_listener.stop()
+    await job_queue.stop()
+    await close_feedback_graph()
+    await close_llm_clients()
+    close_supabase_client()
 
 
 app = FastAPI(
@@ -36,17 +63,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+
+# Marge accordée aux autres champs du formulaire d'upload (titre, description, contenu)
+UPLOAD_FORM_OVERHEAD_BYTES = 2 * 1024 * 1024
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/api/feedback/upload",
+    max_bytes=settings.upload_max_bytes + UPLOAD_FORM_OVERHEAD_BYTES,
+    detail=f"Le fichier dépasse la taille maximale autorisée ({settings.upload_max_bytes} octets)",
 )
 
 # Inclusion des routes API
 app.include_router(api_router, prefix="/api")
 app.include_router(feedback_api_router, prefix="/api")
+app.include_router(job_api_router, prefix="/api")
+app.include_router(event_api_router, prefix="/api")
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Métriques du pipeline au format Prometheus"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
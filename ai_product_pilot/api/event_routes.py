@@ -0,0 +1,86 @@
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+import asyncio
+import json
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.services.events import TOPICS, Subscription, event_broker
+
+router = APIRouter()
+
+Topic = Literal["progress", "stream", "stories"]
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Sérialise un événement au format Server-Sent Events (nom = sujet)"""
+    return f"event: {event['topic']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _next_event(subscription: Subscription) -> Optional[Dict[str, Any]]:
+    """Prochain événement de l'abonné, ou None après le délai de heartbeat"""
+    try:
+        return await asyncio.wait_for(subscription.get(), timeout=settings.events_heartbeat_seconds)
+    except asyncio.TimeoutError:
+        return None
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    topic: Optional[List[Topic]] = Query(None),
+    feedback_id: Optional[str] = None,
+):
+    """
+    Flux Server-Sent Events de l'avancement du pipeline et des stories
+
+    Args:
+        topic: Sujets souhaités (progress, stream, stories ; tous par défaut)
+        feedback_id: Ne recevoir que les événements d'un feedback (avancement
+            de son traitement et stories qui en sont issues)
+
+    Returns:
+        Flux text/event-stream, avec un commentaire de heartbeat périodique
+    """
+    async def event_stream() -> AsyncIterator[str]:
+        subscription = event_broker.subscribe(topic or TOPICS, feedback_id)
+        try:
+            # Délai de reconnexion conseillé au client (EventSource)
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await _next_event(subscription)
+                yield ": heartbeat\n\n" if event is None else format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    topic: Optional[List[Topic]] = Query(None),
+    feedback_id: Optional[str] = None,
+):
+    """
+    Flux WebSocket de l'avancement du pipeline et des stories (mêmes filtres que /events)
+
+    Chaque message est un événement JSON ; un message {"topic": "heartbeat"}
+    est envoyé en l'absence d'événement.
+    """
+    await websocket.accept()
+    subscription = event_broker.subscribe(topic or TOPICS, feedback_id)
+    try:
+        while True:
+            event = await _next_event(subscription)
+            await websocket.send_json(event or {"topic": "heartbeat"})
+    except (WebSocketDisconnect, RuntimeError):
+        # Client déconnecté : l'envoi échoue au prochain événement ou heartbeat
+        pass
+    finally:
+        event_broker.unsubscribe(subscription)
@@ -1,16 +1,39 @@
+import asyncio
 import uuid
 from typing import Dict, List, Optional, Union
 
-from fastapi import APIRouter, File,  HTTPException, Form, UploadFile, status
-from ai_product_pilot.models.feedback import FeedbackResponse
+from fastapi import APIRouter, Depends, File,  HTTPException, Form, Query, Response, UploadFile, status
+from supabase import Client
+
+from ai_product_pilot.api.pagination import keyset_page, select_columns
+from ai_product_pilot.models.feedback import FEEDBACK_SUMMARY_FIELDS, BatchProcessRequest, FeedbackResponse, FeedbackSummary
 from ai_product_pilot.services.vector_store import VectorStoreService
 from ai_product_pilot.models.feedback import FeedbackResponse
 from ai_product_pilot.lib.supabase import get_supabase_client
-from ai_product_pilot.langgraph.graph import feedback_processing_graph
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.graph import checkpoint_config, get_feedback_graph
+from ai_product_pilot.langgraph.runner import PROCESS_FEEDBACK_BATCH_JOB, PROCESS_FEEDBACK_JOB
+from ai_product_pilot.models.job import JobAccepted
+from ai_product_pilot.services.fingerprint import content_hash
+from ai_product_pilot.services.jobs import job_queue
+from ai_product_pilot.services.uploads import UploadTooLargeError, read_upload, upload_to_storage
 
 router = APIRouter()
 vector_store = VectorStoreService()
 
+
+def _find_feedback_by_fingerprint(supabase: Client, fingerprint: str) -> Optional[Dict]:
+    """Feedback existant dont le contenu a la même empreinte exacte"""
+    result = (
+        supabase.table("feedback_fingerprints")
+        .select("feedback(id,title,description,source,file_path,content,status)")
+        .eq("content_hash", fingerprint)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0]["feedback"] if result.data else None
+
+
 @router.post("/feedback/upload", response_model=FeedbackResponse)
 async def upload_feedback(
     title: str = Form(...),
@@ -18,9 +41,13 @@ async def upload_feedback(
     source: str = Form(...),
     file: Optional[UploadFile] = File(None),
     content: Optional[str] = Form(None),
+    supabase: Client = Depends(get_supabase_client),
 ):
     """
     Endpoint pour télécharger un feedback utilisateur sous forme de fichier ou de texte
+
+    Un contenu identique à celui d'un feedback existant n'est pas enregistré
+    une seconde fois : le feedback existant est renvoyé avec duplicate=true.
     """
     if not file and not content:
         raise HTTPException(
@@ -28,24 +55,41 @@ async def upload_feedback(
             detail="Veuillez fournir soit un fichier, soit du contenu textuel",
         )
     
+    # Taille et empreinte calculées par blocs sur le fichier reçu, sans le recopier
+    upload = None
+    if file:
+        try:
+            upload = await read_upload(
+                file,
+                max_bytes=settings.upload_max_bytes,
+                chunk_bytes=settings.upload_chunk_bytes,
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e),
+            )
+    
+    # Empreinte exacte du contenu : un doublon renvoie le feedback existant
+    fingerprint = upload.content_hash if upload else content_hash(content)
+    if settings.feedback_dedup_enabled:
+        existing = _find_feedback_by_fingerprint(supabase, fingerprint)
+        if existing is not None:
+            return FeedbackResponse(**existing, duplicate=True)
+    
     # Génération d'un ID unique pour ce feedback
     feedback_id = str(uuid.uuid4())
     
-    # Client Supabase
-    supabase = get_supabase_client()
-    
     # Si un fichier est fourni, le stocker dans Supabase Storage
     file_path = None
-    if file:
+    if upload:
         # Chemin de stockage dans le bucket
         file_extension = file.filename.split(".")[-1] if file.filename else "txt"
         file_path = f"{feedback_id}.{file_extension}"
         
-        # Télécharger dans le bucket "feedback_raw"
-        file_content = await file.read()
-        res = supabase.storage.from_("feedback_raw").upload(
-            path=file_path,
-            file=file_content,
+        # Envoi en flux dans le bucket "feedback_raw"
+        res = await asyncio.to_thread(
+            upload_to_storage, supabase, "feedback_raw", file_path, upload, file.content_type
         )
         
         if hasattr(res, "error") and res.error is not None:
@@ -74,6 +118,12 @@ async def upload_feedback(
             detail=f"Erreur lors de l'insertion du feedback: {res.error.message}",
         )
     
+    if settings.feedback_dedup_enabled:
+        supabase.table("feedback_fingerprints").upsert(
+            {"content_hash": fingerprint, "feedback_id": feedback_id},
+            ignore_duplicates=True,
+        ).execute()
+    
     return FeedbackResponse(
         id=feedback_id,
         title=title,
@@ -84,14 +134,21 @@ async def upload_feedback(
         status="pending",
     )
 
-@router.post("/feedback/process/{feedback_id}", status_code=status.HTTP_202_ACCEPTED)
-async def process_feedback(feedback_id: str):
+@router.post("/feedback/process/{feedback_id}", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def process_feedback(
+    feedback_id: str,
+    bypass_cache: bool = False,
+    supabase: Client = Depends(get_supabase_client),
+):
     """
-    Endpoint pour déclencher le traitement d'un feedback
+    Endpoint pour déclencher le traitement d'un feedback.
+
+    Le traitement est mis en file et exécuté par les workers ; son avancement
+    est consultable via GET /api/jobs/{job_id}. Avec bypass_cache=true, les
+    réponses LLM sont recalculées au lieu d'être relues depuis le cache.
     """
     # Vérifier que le feedback existe
-    supabase = get_supabase_client()
-    result = supabase.table("feedback").select("*").eq("id", feedback_id).execute()
+    result = supabase.table("feedback").select("id").eq("id", feedback_id).execute()
     
     if not result.data:
         raise HTTPException(
@@ -99,51 +156,182 @@ async def process_feedback(feedback_id: str):
             detail=f"Feedback avec ID {feedback_id} non trouvé",
         )
     
-    feedback = result.data[0]
+    # Deux exécutions simultanées sur le même fil de checkpoints dupliqueraient les stories
+    conflict = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Le feedback {feedback_id} est déjà en cours de traitement",
+    )
+    if await job_queue.has_active_job(feedback_id):
+        raise conflict
     
     # Mettre à jour le statut du feedback
     supabase.table("feedback").update({"status": "processing"}).eq("id", feedback_id).execute()
     
-    try:
-        # Exécuter le graphe de traitement de façon asynchrone
-        # Dans un vrai projet, ceci serait fait via un worker Celery/RQ
-        await feedback_processing_graph.ainvoke({
-            "feedback_id": feedback_id,
-            "feedback_data": feedback,
-            "docs": [],
-            "entities": {},
-            "summary": "",
-            "stories": []
-        })
-        
-        return {"message": f"Traitement du feedback {feedback_id} initié avec succès"}
+    # Vérification et création atomiques : un appel concurrent ne crée pas de second job
+    job = await job_queue.enqueue_exclusive(
+        PROCESS_FEEDBACK_JOB,
+        {"feedback_id": feedback_id, "bypass_cache": bypass_cache},
+        [feedback_id],
+    )
+    if job is None:
+        raise conflict
     
-    except Exception as e:
-        # En cas d'erreur, mettre à jour le statut
-        supabase.table("feedback").update({"status": "error", "error": str(e)}).eq("id", feedback_id).execute()
+    return JobAccepted(
+        message=f"Traitement du feedback {feedback_id} initié avec succès",
+        job_id=job["id"],
+    )
+
+
+@router.post("/feedback/{feedback_id}/resume", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def resume_feedback(
+    feedback_id: str,
+    bypass_cache: bool = False,
+    supabase: Client = Depends(get_supabase_client),
+):
+    """
+    Endpoint pour reprendre un traitement en échec à partir du dernier nœud réussi.
+
+    Les nœuds déjà terminés (ingestion, extraction...) ne sont pas rejoués :
+    seul le nœud en échec et les suivants sont exécutés, à partir de l'état
+    enregistré dans les checkpoints du feedback. Seul un feedback en erreur,
+    sans job en attente ou en cours, peut être repris : deux exécutions
+    simultanées sur le même fil de checkpoints dupliqueraient les stories.
+    """
+    result = supabase.table("feedback").select("id,status").eq("id", feedback_id).execute()
+
+    if not result.data:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors du traitement: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Feedback avec ID {feedback_id} non trouvé",
         )
 
+    conflict = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Aucun traitement en échec à reprendre pour le feedback {feedback_id}",
+    )
+    if result.data[0]["status"] != "error" or await job_queue.has_active_job(feedback_id):
+        raise conflict
+
+    graph = await get_feedback_graph()
+    snapshot = await graph.aget_state(checkpoint_config(feedback_id))
+    if not snapshot.next:
+        raise conflict
+
+    supabase.table("feedback").update({"status": "processing", "error": None}).eq("id", feedback_id).execute()
+
+    # Vérification et création atomiques : un appel concurrent ne crée pas de second job
+    job = await job_queue.enqueue_exclusive(
+        PROCESS_FEEDBACK_JOB,
+        {"feedback_id": feedback_id, "bypass_cache": bypass_cache, "resume": True},
+        [feedback_id],
+    )
+    if job is None:
+        raise conflict
 
-@router.get("/feedback", response_model=List[FeedbackResponse])
-async def list_feedbacks():
+    return JobAccepted(
+        message=f"Reprise du traitement du feedback {feedback_id} à l'étape {snapshot.next[0]}",
+        job_id=job["id"],
+    )
+
+
+@router.post("/feedback/process-batch", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def process_feedback_batch(
+    request: BatchProcessRequest,
+    supabase: Client = Depends(get_supabase_client),
+):
     """
-    Récupérer la liste des feedbacks
+    Endpoint pour déclencher le traitement d'un lot de feedbacks, désignés par
+    leurs IDs ou par un statut (ex: pending).
+
+    Le lot est traité par un seul job, avec une concurrence bornée ; le débit
+    global et le résultat de chaque feedback sont consultables via
+    GET /api/jobs/{job_id}.
     """
-    supabase = get_supabase_client()
-    result = supabase.table("feedback").select("*").order("created_at", desc=True).execute()
+    if request.feedback_ids:
+        feedback_ids = list(dict.fromkeys(request.feedback_ids))
+    else:
+        result = (
+            supabase.table("feedback")
+            .select("id")
+            .eq("status", request.status)
+            .order("created_at")
+            .limit(min(request.limit, settings.batch_max_items))
+            .execute()
+        )
+        feedback_ids = [row["id"] for row in result.data]
+
+    if not feedback_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucun feedback à traiter",
+        )
+    if len(feedback_ids) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Un lot est limité à {settings.batch_max_items} feedbacks",
+        )
+
+    # Un feedback déjà en cours de traitement ne peut pas être relancé dans un lot
+    conflict = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Un ou plusieurs feedbacks du lot sont déjà en cours de traitement",
+    )
+    if await job_queue.has_active_jobs(feedback_ids):
+        raise conflict
+
+    # Mettre à jour le statut de tous les feedbacks du lot en une requête
+    supabase.table("feedback").update({"status": "processing"}).in_("id", feedback_ids).execute()
+
+    job = await job_queue.enqueue_exclusive(
+        PROCESS_FEEDBACK_BATCH_JOB,
+        {
+            "feedback_ids": feedback_ids,
+            "max_concurrency": request.max_concurrency,
+            "bypass_cache": request.bypass_cache,
+        },
+        feedback_ids,
+    )
+    if job is None:
+        raise conflict
+
+    return JobAccepted(
+        message=f"Traitement de {len(feedback_ids)} feedbacks initié avec succès",
+        job_id=job["id"],
+    )
+
+
+@router.get("/feedback", response_model=List[FeedbackSummary], response_model_exclude_unset=True)
+async def list_feedbacks(
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    supabase: Client = Depends(get_supabase_client),
+):
+    """
+    Récupérer la liste des feedbacks, du plus récent au plus ancien.
+
+    La pagination se fait par curseur : l'en-tête X-Next-Cursor de la réponse
+    est à repasser dans `cursor` pour obtenir la page suivante. `fields`
+    sélectionne les colonnes renvoyées (par défaut, sans contenu ni analyse).
+    """
+    columns = select_columns(
+        fields, FeedbackSummary.model_fields, FEEDBACK_SUMMARY_FIELDS, required=("id", "created_at")
+    )
+    query = supabase.table("feedback").select(columns)
+    
+    if status_filter is not None:
+        query = query.eq("status", status_filter)
     
-    return result.data
+    return keyset_page(query, "created_at", limit, cursor, response)
 
 
 @router.get("/feedback/{feedback_id}", response_model=FeedbackResponse)
-async def get_feedback(feedback_id: str):
+async def get_feedback(feedback_id: str, supabase: Client = Depends(get_supabase_client)):
     """
     Récupérer un feedback spécifique
     """
-    supabase = get_supabase_client()
     result = supabase.table("feedback").select("*").eq("id", feedback_id).execute()
     
     if not result.data:
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, status
+
+from ai_product_pilot.models.job import JobResponse
+from ai_product_pilot.services.jobs import job_queue
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Récupérer le statut, l'étape courante et les timings d'un job
+    """
+    job = await job_queue.get(job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job avec ID {job_id} non trouvé",
+        )
+
+    return job
@@ -0,0 +1,109 @@
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, Response, status
+
+# En-tête portant le curseur de la page suivante (absent sur la dernière page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any, row_id: str) -> str:
+    """Encode la position (valeur de tri, id) de la dernière ligne d'une page"""
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Décode un curseur produit par encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide",
+        )
+    return value, str(row_id)
+
+
+def _quote(value: Any) -> str:
+    """Valeur littérale pour un filtre PostgREST (les timestamps contiennent : et +)"""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def select_columns(fields: Optional[str], allowed: Sequence[str], default: Sequence[str], required: Sequence[str]) -> str:
+    """
+    Construit la projection d'une requête de liste à partir du paramètre fields=
+
+    Args:
+        fields: Colonnes demandées, séparées par des virgules (None pour les colonnes par défaut)
+        allowed: Colonnes autorisées
+        default: Colonnes légères renvoyées par défaut
+        required: Colonnes toujours sélectionnées (clés de pagination)
+
+    Returns:
+        Liste de colonnes pour select()
+    """
+    if fields:
+        columns = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [column for column in columns if column not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Champs inconnus: {', '.join(unknown)}",
+            )
+    else:
+        columns = list(default)
+    return ",".join(dict.fromkeys([*required, *columns]))
+
+
+def keyset_page(
+    query,
+    sort_column: str,
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    desc: bool = True,
+) -> List[dict]:
+    """
+    Exécute une requête paginée par curseur sur (sort_column, id).
+
+    Contrairement à un offset, la page suivante est lue à partir de la
+    dernière position connue : le coût d'une page ne dépend pas de sa
+    profondeur dans la table (index sur (sort_column, id)).
+
+    Args:
+        query: Requête PostgREST (select et filtres déjà appliqués)
+        sort_column: Colonne de tri (non nulle)
+        limit: Taille de la page
+        cursor: Curseur renvoyé par la page précédente
+        response: Réponse FastAPI recevant l'en-tête X-Next-Cursor
+        desc: Tri décroissant
+
+    Returns:
+        Lignes de la page
+    """
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        query = query.or_(
+            f"{sort_column}.{op}.{_quote(value)},"
+            f"and({sort_column}.eq.{_quote(value)},id.{op}.{_quote(row_id)})"
+        )
+
+    rows = (
+        query.order(sort_column, desc=desc)
+        .order("id", desc=desc)
+        .limit(limit + 1)
+        .execute()
+        .data
+    )
+
+    # Une ligne de plus que la page indique qu'une page suivante existe
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[sort_column], last["id"])
+    return rows
@@ -1,47 +1,119 @@
 import json
 import uuid
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import JSONResponse
+from supabase import Client
 
-from ai_product_pilot.models.backlog import StoryResponse, StoryCreate
+from ai_product_pilot.api.pagination import keyset_page, select_columns
+from ai_product_pilot.models.backlog import (
+    STORY_SUMMARY_FIELDS,
+    StoryCreate,
+    StoryResponse,
+    StorySummary,
+    ThemeStats,
+)
 from ai_product_pilot.models.feedback import FeedbackResponse
+from ai_product_pilot.models.job import JobAccepted
+from ai_product_pilot.services.events import publish_story_changes
+from ai_product_pilot.services.jobs import job_queue
+from ai_product_pilot.services.rescoring import RESCORE_STORIES_JOB
 from ai_product_pilot.services.vector_store import VectorStoreService
 from ai_product_pilot.lib.supabase import get_supabase_client
 
 router = APIRouter()
 vector_store = VectorStoreService()
 
-@router.get("/backlog", response_model=List[StoryResponse])
+
+def _array_literal(values: List[str]) -> str:
+    """Littéral de tableau Postgres, éléments entre guillemets (thèmes avec espaces ou virgules)"""
+    quoted = ('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return "{" + ",".join(quoted) + "}"
+
+
+def filter_themes(query, themes: List[str], match: Literal["any", "all"]):
+    """
+    Filtre des stories par thèmes, servi par l'index GIN sur stories.themes
+
+    Args:
+        query: Requête PostgREST sur la table stories
+        themes: Thèmes recherchés (correspondance exacte)
+        match: "all" pour les stories portant tous les thèmes (@>), "any" pour au moins un (&&)
+
+    Returns:
+        Requête filtrée
+    """
+    literal = _array_literal(themes)
+    if match == "any":
+        return query.ov("themes", literal)
+    return query.contains("themes", literal)
+
+
+@router.get("/backlog", response_model=List[StorySummary], response_model_exclude_unset=True)
 async def get_backlog(
+    response: Response,
     min_score: Optional[float] = None,
-    theme: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
+    theme: Optional[List[str]] = Query(None),
+    theme_match: Literal["any", "all"] = "all",
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    offset: Optional[int] = Query(None, ge=0, deprecated=True),
+    supabase: Client = Depends(get_supabase_client),
 ):
     """
-    Récupérer le backlog des user stories générées
+    Récupérer le backlog des user stories générées, par score RICE décroissant.
+
+    La pagination se fait par curseur : l'en-tête X-Next-Cursor de la réponse
+    est à repasser dans `cursor` pour obtenir la page suivante. `fields`
+    sélectionne les colonnes renvoyées (par défaut, un résumé léger).
+    `theme` peut être répété : `theme_match=all` garde les stories portant
+    tous les thèmes, `theme_match=any` celles qui en portent au moins un.
     """
-    supabase = get_supabase_client()
-    query = supabase.table("stories").select("*").order("rice_score", desc=True)
+    columns = select_columns(
+        fields, StorySummary.model_fields, STORY_SUMMARY_FIELDS, required=("id", "rice_score")
+    )
+    query = supabase.table("stories").select(columns)
     
     if min_score is not None:
         query = query.gte("rice_score", min_score)
     
-    if theme is not None:
-        query = query.ilike("themes", f"%{theme}%")
+    if theme:
+        query = filter_themes(query, theme, theme_match)
     
-    result = query.range(offset, offset + limit - 1).execute()
-    return result.data
+    if offset is not None and cursor is None:
+        # Pagination par offset conservée pour les anciens clients
+        query = query.order("rice_score", desc=True).order("id", desc=True)
+        return query.range(offset, offset + limit - 1).execute().data
+    
+    return keyset_page(query, "rice_score", limit, cursor, response)
+
+
+@router.post("/backlog/rescore", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def rescore_backlog(
+    dry_run: bool = False,
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+):
+    """
+    Recalculer les scores RICE de toutes les stories avec le scoring actuel,
+    à partir de l'analyse déjà stockée des feedbacks (sans appel LLM).
+
+    L'avancement ("traitées/total") est consultable via GET /api/jobs/{job_id}.
+    """
+    job = await job_queue.enqueue(RESCORE_STORIES_JOB, {"dry_run": dry_run, "batch_size": batch_size})
+    
+    return JobAccepted(
+        message="Recalcul des scores RICE initié avec succès",
+        job_id=job["id"],
+    )
 
 
 @router.get("/backlog/{story_id}", response_model=StoryResponse)
-async def get_story(story_id: str):
+async def get_story(story_id: str, supabase: Client = Depends(get_supabase_client)):
     """
     Récupérer une user story spécifique
     """
-    supabase = get_supabase_client()
     result = supabase.table("stories").select("*").eq("id", story_id).execute()
     
     if not result.data:
@@ -54,12 +126,10 @@ async def get_story(story_id: str):
 
 
 @router.post("/backlog", response_model=StoryResponse, status_code=status.HTTP_201_CREATED)
-async def create_story(story: StoryCreate):
+async def create_story(story: StoryCreate, supabase: Client = Depends(get_supabase_client)):
     """
     Créer manuellement une user story
     """
-    supabase = get_supabase_client()
-    
     # Génération d'un ID unique
     story_id = str(uuid.uuid4())
     
@@ -79,20 +149,17 @@ async def create_story(story: StoryCreate):
             detail=f"Erreur lors de la création de la story: {result.error.message}",
         )
     
+    publish_story_changes("INSERT", [story_data])
     return {**story_data}
 
 
 @router.get("/themes", response_model=List[str])
-async def get_themes():
+async def get_themes(supabase: Client = Depends(get_supabase_client)):
     """
     Récupérer la liste des thèmes extraits des feedbacks
     """
-    supabase = get_supabase_client()
-    
-    # Requête SQL personnalisée pour extraire les thèmes uniques
-    result = supabase.rpc(
-        "get_unique_themes",
-    ).execute()
+    # Catalogue theme_stats maintenu par trigger : une ligne par thème
+    result = supabase.table("theme_stats").select("theme").order("theme").execute()
     
     if hasattr(result, "error") and result.error is not None:
         raise HTTPException(
@@ -100,6 +167,32 @@ async def get_themes():
             detail=f"Erreur lors de la récupération des thèmes: {result.error.message}",
         )
     
+    return [row["theme"] for row in result.data]
+
+
+@router.get("/themes/stats", response_model=List[ThemeStats])
+async def get_theme_stats(
+    order_by: Literal["story_count", "avg_rice_score", "theme"] = "story_count",
+    limit: int = Query(100, ge=1, le=1000),
+    supabase: Client = Depends(get_supabase_client),
+):
+    """
+    Récupérer le nombre de stories et le score RICE moyen de chaque thème
+    """
+    result = (
+        supabase.table("theme_stats")
+        .select("theme,story_count,avg_rice_score")
+        .order(order_by, desc=order_by != "theme")
+        .limit(limit)
+        .execute()
+    )
+    
+    if hasattr(result, "error") and result.error is not None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des statistiques de thèmes: {result.error.message}",
+        )
+    
     return result.data
 
 
@@ -107,10 +200,16 @@ async def get_themes():
 async def semantic_search(
     query: str,
     limit: int = 10,
-    type: Optional[str] = None
+    type: Optional[str] = None,
+    mode: Literal["semantic", "keyword", "hybrid"] = "semantic"
 ):
     """
-    Recherche sémantique dans les documents vectorisés
+    Recherche dans les documents vectorisés.
+
+    - semantic : similarité vectorielle (embedding de la requête)
+    - keyword : recherche plein texte, sans embedding
+    - hybrid : plein texte seul pour les requêtes de type mot-clé (ex: #4528),
+      sinon fusion des résultats plein texte et vectoriels par rang réciproque
     """
-    results = await vector_store.search(query, limit=limit, filter_type=type)
+    results = await vector_store.search(query, limit=limit, filter_type=type, mode=mode)
     return results
\ No newline at end of file
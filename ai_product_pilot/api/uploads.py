@@ -0,0 +1,49 @@
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Limite la taille du corps d'un endpoint d'upload au fil de sa réception
+
+    Un corps annonçant une taille excessive (Content-Length) est refusé avant
+    toute lecture ; un corps envoyé par blocs (sans Content-Length) est
+    interrompu dès que les octets reçus dépassent la limite, sans attendre la
+    fin de l'envoi ni sa mise en tampon par l'analyse du formulaire.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int, detail: str):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+        self.detail = detail
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": self.detail}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Levée pendant l'analyse du formulaire : FastAPI la transmet
+                    # telle quelle et elle est convertie en réponse 413
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,167 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+import functools
+import time
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from prometheus_client import Counter, Gauge, Histogram
+
+# Nœuds du graphe de traitement
+NODE_DURATION = Histogram(
+    "pipeline_node_duration_seconds",
+    "Durée d'exécution d'un nœud du graphe de traitement",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+NODE_RUNS = Counter("pipeline_node_runs_total", "Exécutions d'un nœud du graphe", ["node"])
+NODE_ERRORS = Counter("pipeline_node_errors_total", "Exécutions d'un nœud terminées en erreur", ["node"])
+
+# Appels LLM
+LLM_CALLS = Counter("llm_calls_total", "Appels au modèle de chat", ["model"])
+LLM_ERRORS = Counter("llm_errors_total", "Appels au modèle de chat en erreur", ["model"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens consommés par les appels LLM", ["model", "direction"])
+LLM_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Durée d'un appel au modèle de chat",
+    ["model"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+LLM_CACHE_LOOKUPS = Counter("llm_cache_lookups_total", "Consultations du cache LLM", ["result"])
+SEARCH_CACHE_LOOKUPS = Counter("search_cache_lookups_total", "Consultations du cache de recherche", ["result"])
+
+# Embeddings, ingestion et stockage vectoriel
+EMBEDDING_TEXTS = Counter("embedding_texts_total", "Textes vectorisés", ["source"])
+INGEST_CHUNKS = Counter("ingest_chunks_total", "Segments produits par l'ingestion")
+STORIES_DEDUPLICATED = Counter(
+    "stories_deduplicated_total", "Stories générées fusionnées dans une story existante quasi identique"
+)
+VECTOR_STORE_DURATION = Histogram(
+    "vector_store_operation_duration_seconds",
+    "Durée d'une opération du stockage vectoriel",
+    ["operation"],
+)
+VECTOR_STORE_ERRORS = Counter(
+    "vector_store_operation_errors_total", "Opérations du stockage vectoriel en erreur", ["operation"]
+)
+
+# Requêtes HTTP vers Supabase (PostgREST, Storage)
+SUPABASE_REQUESTS = Counter(
+    "supabase_requests_total", "Allers-retours HTTP vers Supabase", ["service", "method", "status"]
+)
+SUPABASE_DURATION = Histogram(
+    "supabase_request_duration_seconds",
+    "Durée d'un aller-retour HTTP vers Supabase (jusqu'à la réception des en-têtes)",
+    ["service"],
+)
+
+# Diffusion des événements en temps réel (SSE, WebSocket)
+EVENTS_PUBLISHED = Counter("events_published_total", "Événements diffusés aux abonnés", ["topic"])
+EVENTS_DROPPED = Counter(
+    "events_dropped_total", "Événements écartés de la file pleine d'un abonné trop lent"
+)
+EVENT_SUBSCRIBERS = Gauge("event_subscribers", "Abonnés connectés au flux d'événements")
+
+
+def instrument_node(name: str, node: Any) -> Callable[..., Awaitable[Dict[str, Any]]]:
+    """
+    Enveloppe un nœud LangGraph pour mesurer sa durée, ses exécutions et ses erreurs
+
+    Args:
+        name: Nom du nœud dans le graphe
+        node: Fonction asynchrone ou Runnable exécutant le nœud
+
+    Returns:
+        Fonction asynchrone équivalente, instrumentée
+    """
+    async def instrumented(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        NODE_RUNS.labels(name).inc()
+        start = time.perf_counter()
+        try:
+            if isinstance(node, Runnable):
+                return await node.ainvoke(state, config)
+            return await node(state)
+        except Exception:
+            NODE_ERRORS.labels(name).inc()
+            raise
+        finally:
+            NODE_DURATION.labels(name).observe(time.perf_counter() - start)
+
+    instrumented.__name__ = getattr(node, "__name__", name)
+    return instrumented
+
+
+def track_vector_store(operation: str):
+    """Décorateur mesurant la durée et les erreurs d'une méthode asynchrone du stockage vectoriel"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                VECTOR_STORE_ERRORS.labels(operation).inc()
+                raise
+            finally:
+                VECTOR_STORE_DURATION.labels(operation).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def supabase_event_hooks(service: str) -> Dict[str, list]:
+    """
+    Hooks httpx comptant les allers-retours vers Supabase et leur latence
+
+    Args:
+        service: Sous-client Supabase (postgrest, storage)
+
+    Returns:
+        Dictionnaire event_hooks pour httpx.Client
+    """
+    def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    def on_response(response: httpx.Response) -> None:
+        start = response.request.extensions.get("metrics_start")
+        if start is not None:
+            SUPABASE_DURATION.labels(service).observe(time.perf_counter() - start)
+        SUPABASE_REQUESTS.labels(service, response.request.method, str(response.status_code)).inc()
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Callback LangChain comptant les appels, la latence et les tokens des modèles de chat"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._observe(run_id)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            LLM_TOKENS.labels(self.model, "in").inc(usage.get("prompt_tokens", 0))
+            LLM_TOKENS.labels(self.model, "out").inc(usage.get("completion_tokens", 0))
+            return
+        # En streaming, l'usage est porté par le message agrégé de la génération
+        for generations in response.generations:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                LLM_TOKENS.labels(self.model, "in").inc(usage_metadata.get("input_tokens", 0))
+                LLM_TOKENS.labels(self.model, "out").inc(usage_metadata.get("output_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._observe(run_id)
+        LLM_ERRORS.labels(self.model).inc()
+
+    def _observe(self, run_id: UUID) -> None:
+        LLM_CALLS.labels(self.model).inc()
+        start: Optional[float] = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_DURATION.labels(self.model).observe(time.perf_counter() - start)
@@ -12,13 +12,98 @@ class Settings(BaseSettings):
     debug: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
+    data_dir: str = os.getenv("DATA_DIR", ".data")
     
     # Supabase
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_key: str = os.getenv("SUPABASE_KEY", "")
+    supabase_pool_max_connections: int = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+    supabase_pool_max_keepalive: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+    supabase_pool_keepalive_expiry: float = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+    
+    # Jobs (file de traitement en arrière-plan)
+    job_workers: int = int(os.getenv("JOB_WORKERS", "2"))
+    job_poll_interval: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    batch_max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    rescore_batch_size: int = int(os.getenv("RESCORE_BATCH_SIZE", "2000"))
+    
+    # Ingestion en flux (mémoire de travail bornée)
+    ingest_read_chunk_bytes: int = int(os.getenv("INGEST_READ_CHUNK_BYTES", str(64 * 1024)))
+    ingest_buffer_chars: int = int(os.getenv("INGEST_BUFFER_CHARS", "32000"))
+    ingest_batch_max_bytes: int = int(os.getenv("INGEST_BATCH_MAX_BYTES", str(256 * 1024)))
+    ingest_max_record_chars: int = int(os.getenv("INGEST_MAX_RECORD_CHARS", str(8 * 1024 * 1024)))
+    ingest_content_preview_chars: int = int(os.getenv("INGEST_CONTENT_PREVIEW_CHARS", "20000"))
+    
+    # Upload de fichiers (taille maximale, lecture par blocs)
+    upload_max_bytes: int = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+    upload_chunk_bytes: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    
+    # Détection des feedbacks dupliqués (empreinte exacte et MinHash des segments)
+    feedback_dedup_enabled: bool = os.getenv("FEEDBACK_DEDUP_ENABLED", "True").lower() in ("true", "1", "t")
+    feedback_near_duplicate_threshold: float = float(os.getenv("FEEDBACK_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+    
+    # Flux d'événements temps réel (SSE, WebSocket) ; l'écoute Postgres (LISTEN)
+    # n'est active que si une connexion directe à la base est configurée
+    events_database_url: str = os.getenv("EVENTS_DATABASE_URL", "")
+    events_queue_size: int = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+    events_heartbeat_seconds: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    events_reconnect_seconds: float = float(os.getenv("EVENTS_RECONNECT_SECONDS", "5"))
+    events_stream_flush_seconds: float = float(os.getenv("EVENTS_STREAM_FLUSH_SECONDS", "0.25"))
     
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    llm_pool_max_connections: int = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+    llm_pool_max_keepalive: int = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "120"))
+    
+    # Configuration des chaînes LLM
+    extract_llm_model: str = os.getenv("EXTRACT_LLM_MODEL", "gpt-4o")
+    extract_llm_temperature: float = float(os.getenv("EXTRACT_LLM_TEMPERATURE", "0.3"))
+    synthesize_llm_model: str = os.getenv("SYNTHESIZE_LLM_MODEL", "gpt-4o")
+    synthesize_llm_temperature: float = float(os.getenv("SYNTHESIZE_LLM_TEMPERATURE", "0.4"))
+    generate_llm_model: str = os.getenv("GENERATE_LLM_MODEL", "gpt-4o")
+    generate_llm_temperature: float = float(os.getenv("GENERATE_LLM_TEMPERATURE", "0.5"))
+    # Diffusion de la synthèse et des stories au fil des tokens (flux d'événements "stream")
+    llm_streaming_enabled: bool = os.getenv("LLM_STREAMING_ENABLED", "True").lower() in ("true", "1", "t")
+    
+    # Extraction d'insights (map-reduce)
+    extract_group_chars: int = int(os.getenv("EXTRACT_GROUP_CHARS", "12000"))
+    extract_max_concurrency: int = int(os.getenv("EXTRACT_MAX_CONCURRENCY", "4"))
+    extract_llm_reduce: bool = os.getenv("EXTRACT_LLM_REDUCE", "False").lower() in ("true", "1", "t")
+    
+    # Stockage vectoriel : "supabase" (pgvector) ou "local" (index NumPy projeté en mémoire)
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "supabase")
+    vector_ef_search: int = int(os.getenv("VECTOR_EF_SEARCH", "40"))
+    hybrid_search_candidates: int = int(os.getenv("HYBRID_SEARCH_CANDIDATES", "20"))
+    local_vector_refresh_seconds: float = float(os.getenv("LOCAL_VECTOR_REFRESH_SECONDS", "1.0"))
+    # Part de lignes supprimées au-delà de laquelle l'index local est compacté
+    local_vector_compact_ratio: float = float(os.getenv("LOCAL_VECTOR_COMPACT_RATIO", "0.25"))
+    
+    # Déduplication des stories générées (similarité cosinus minimale avec une story existante)
+    story_dedup_enabled: bool = os.getenv("STORY_DEDUP_ENABLED", "True").lower() in ("true", "1", "t")
+    story_dedup_threshold: float = float(os.getenv("STORY_DEDUP_THRESHOLD", "0.92"))
+    
+    # Cache de recherche sémantique
+    search_cache_enabled: bool = os.getenv("SEARCH_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+    search_cache_ttl_seconds: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+    search_cache_max_entries: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    
+    # Cache d'embeddings
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+    embedding_cache_persistent: bool = os.getenv("EMBEDDING_CACHE_PERSISTENT", "True").lower() in ("true", "1", "t")
+    embedding_cache_memory_mb: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", "64"))
+    # Nombre maximal de vecteurs conservés sur disque (les moins récemment lus sont évincés)
+    embedding_cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+    
+    # Cache des réponses LLM
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() in ("true", "1", "t")
+    llm_cache_persistent: bool = os.getenv("LLM_CACHE_PERSISTENT", "True").lower() in ("true", "1", "t")
+    llm_cache_ttl_seconds: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    llm_cache_max_mb: int = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+    llm_cache_memory_entries: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
     
     # LangSmith
     langchain_api_key: Optional[str] = os.getenv("LANGCHAIN_API_KEY")
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Type
+import hashlib
+import os
+import threading
+
+from langchain.output_parsers import PydanticOutputParser
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.lib.llm import clients_generation, get_chat_model
+from ai_product_pilot.models.backlog import UserStories
+from ai_product_pilot.models.insights import ExtractedInsights
+from ai_product_pilot.services.llm_cache import CachedChatModel, get_llm_cache
+
+PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "../..", "prompts")
+
+
+@dataclass(frozen=True)
+class ChainSpec:
+    """Configuration d'une chaîne LLM : prompt, modèle et format de sortie"""
+    prompt_file: str
+    model: str
+    temperature: float
+    output_model: Optional[Type[BaseModel]] = None
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """Template de prompt chargé depuis le disque"""
+    template: str
+    version: str  # sha256 du contenu du fichier
+    mtime_ns: int
+
+
+class PromptRegistry:
+    """
+    Charge les fichiers de prompts une seule fois par processus et les
+    recharge automatiquement lorsque leur date de modification change.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._prompts: Dict[str, Prompt] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> Prompt:
+        path = os.path.join(self.directory, filename)
+        mtime_ns = os.stat(path).st_mtime_ns
+        prompt = self._prompts.get(filename)
+        if prompt is not None and prompt.mtime_ns == mtime_ns:
+            return prompt
+
+        with self._lock:
+            with open(path, "r") as f:
+                template = f.read()
+            prompt = Prompt(
+                template=template,
+                version=hashlib.sha256(template.encode("utf-8")).hexdigest()[:16],
+                mtime_ns=mtime_ns,
+            )
+            self._prompts[filename] = prompt
+        return prompt
+
+
+@dataclass(frozen=True)
+class CompiledChain:
+    """Chaîne compilée avec la version du prompt et la génération des clients LLM utilisées pour la construire"""
+    spec: ChainSpec
+    prompt_version: str
+    prompt: ChatPromptTemplate
+    llm: Runnable
+    parser: BaseOutputParser
+    runnable: Runnable
+    clients_generation: int = 0
+
+
+class ChainRegistry:
+    """
+    Registre des chaînes LLM du pipeline.
+
+    Chaque chaîne (prompt | LLM | parser) est compilée une fois, avec les
+    instructions de format pré-calculées et un modèle de chat partagé ; elle
+    n'est reconstruite que si son fichier de prompt est modifié ou si les
+    clients LLM partagés ont été fermés. Les réponses du modèle passent par
+    le cache LLM lorsqu'il est activé.
+    """
+
+    def __init__(self, prompts: PromptRegistry, specs: Dict[str, ChainSpec]):
+        self.prompts = prompts
+        self.specs = specs
+        self._compiled: Dict[str, CompiledChain] = {}
+
+    def _compile(self, spec: ChainSpec, template: str, version: str) -> CompiledChain:
+        prompt = ChatPromptTemplate.from_template(template)
+        llm = get_chat_model(spec.model, spec.temperature)
+        if settings.llm_cache_enabled:
+            llm = CachedChatModel(llm, get_llm_cache(), spec.model, spec.temperature, version)
+
+        if spec.output_model is not None:
+            parser = PydanticOutputParser(pydantic_object=spec.output_model)
+            if "format_instructions" in prompt.input_variables:
+                prompt = prompt.partial(format_instructions=parser.get_format_instructions())
+        else:
+            parser = StrOutputParser()
+
+        return CompiledChain(
+            spec=spec,
+            prompt_version=version,
+            prompt=prompt,
+            llm=llm,
+            parser=parser,
+            runnable=prompt | llm | parser,
+            clients_generation=clients_generation(),
+        )
+
+    def compiled(self, name: str) -> CompiledChain:
+        spec = self.specs[name]
+        prompt = self.prompts.get(spec.prompt_file)
+        compiled = self._compiled.get(name)
+        if (
+            compiled is None
+            or compiled.prompt_version != prompt.version
+            # Clients HTTP fermés depuis la compilation (arrêt puis redémarrage de l'application)
+            or compiled.clients_generation != clients_generation()
+        ):
+            compiled = self._compile(spec, prompt.template, prompt.version)
+            self._compiled[name] = compiled
+        return compiled
+
+    def get(self, name: str) -> Runnable:
+        """
+        Retourne la chaîne compilée pour un nom donné
+
+        Args:
+            name: Nom de la chaîne (extract, reduce, synthesize, generate)
+
+        Returns:
+            Runnable prêt à être invoqué avec les variables du prompt
+        """
+        return self.compiled(name).runnable
+
+
+# Registre partagé par les nœuds du graphe
+chain_registry = ChainRegistry(
+    prompts=PromptRegistry(PROMPTS_DIR),
+    specs={
+        "extract": ChainSpec(
+            prompt_file="extract_insights.txt",
+            model=settings.extract_llm_model,
+            temperature=settings.extract_llm_temperature,
+            output_model=ExtractedInsights,
+        ),
+        "reduce": ChainSpec(
+            prompt_file="reduce_insights.txt",
+            model=settings.extract_llm_model,
+            temperature=settings.extract_llm_temperature,
+            output_model=ExtractedInsights,
+        ),
+        "synthesize": ChainSpec(
+            prompt_file="synthesize_insights.txt",
+            model=settings.synthesize_llm_model,
+            temperature=settings.synthesize_llm_temperature,
+        ),
+        "generate": ChainSpec(
+            prompt_file="generate_stories.txt",
+            model=settings.generate_llm_model,
+            temperature=settings.generate_llm_temperature,
+            output_model=UserStories,
+        ),
+    },
+)
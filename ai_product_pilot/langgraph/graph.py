@@ -1,6 +1,14 @@
-from typing import Dict, List, TypedDict, Annotated, Any
+from typing import Dict, List, TypedDict, Annotated, Any, Optional
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import StateGraph, END
+from langgraph.graph.state import CompiledStateGraph
+import aiosqlite
 import asyncio
+import os
+
+from ai_product_pilot.core.metrics import instrument_node
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.services.events import track_progress
 
 from ai_product_pilot.langgraph.nodes.ingest import ingest_feedback
 from ai_product_pilot.langgraph.nodes.extract import extract_insights
@@ -13,10 +21,17 @@ from ai_product_pilot.langgraph.nodes.prioritize import prioritize_stories
 class FeedbackState(TypedDict):
     feedback_id: str  # ID du feedback en cours de traitement
     feedback_data: Dict[str, Any]  # Données brutes du feedback
-    docs: List[Dict[str, Any]]  # Documents vectorisés
+    docs: List[Dict[str, Any]]  # Échantillon des documents vectorisés
+    chunk_count: int  # Nombre de segments vectorisés (espace de noms `feedback:{id}`)
     entities: Dict[str, Any]  # Entités extraites (thèmes, sentiments, etc.)
     summary: str  # Résumé des insights
     stories: List[Dict[str, Any]]  # User stories générées
+    duplicate_chunks: int  # Segments écartés car déjà traités dans un autre feedback
+
+
+def route_after_ingest(state: FeedbackState) -> str:
+    """Un feedback sans nouveau segment n'est pas analysé (statut duplicate ou error fixé à l'ingestion)"""
+    return "extract" if state["chunk_count"] else END
 
 
 # Construction du graphe de traitement
@@ -24,15 +39,20 @@ def build_feedback_graph() -> StateGraph:
     # Initialisation du graphe
     graph = StateGraph(FeedbackState)
     
-    # Ajout des nœuds
-    graph.add_node("ingest", ingest_feedback)
-    graph.add_node("extract", extract_insights)
-    graph.add_node("synthesize", synthesize_insights)
-    graph.add_node("generate", generate_stories)
-    graph.add_node("prioritize", prioritize_stories)
+    # Ajout des nœuds, instrumentés (durée, exécutions, erreurs) et publiant
+    # leur avancement sur le flux d'événements
+    nodes = {
+        "ingest": ingest_feedback,
+        "extract": extract_insights,
+        "synthesize": synthesize_insights,
+        "generate": generate_stories,
+        "prioritize": prioritize_stories,
+    }
+    for name, node in nodes.items():
+        graph.add_node(name, track_progress(name, instrument_node(name, node)))
     
     # Définition du flux de traitement
-    graph.add_edge("ingest", "extract")
+    graph.add_conditional_edges("ingest", route_after_ingest, ["extract", END])
     graph.add_edge("extract", "synthesize")
     graph.add_edge("synthesize", "generate")
     graph.add_edge("generate", "prioritize")
@@ -44,5 +64,49 @@ def build_feedback_graph() -> StateGraph:
     return graph
 
 
-# Création du graphe
-feedback_processing_graph = build_feedback_graph().compile()
\ No newline at end of file
+# Graphe compilé avec son checkpointer SQLite, ouvert au premier appel
+_feedback_graph: Optional[CompiledStateGraph] = None
+_checkpointer: Optional[AsyncSqliteSaver] = None
+_init_lock = asyncio.Lock()
+
+
+def checkpoint_config(feedback_id: str) -> Dict[str, Any]:
+    """Configuration désignant le fil de checkpoints d'un feedback (un fil par feedback)"""
+    return {"configurable": {"thread_id": feedback_id}}
+
+
+async def get_feedback_graph() -> CompiledStateGraph:
+    """
+    Retourne le graphe de traitement partagé, compilé avec un checkpointer SQLite
+
+    L'état est enregistré après chaque nœud dans DATA_DIR/checkpoints.sqlite3,
+    par feedback : un traitement interrompu reprend au nœud en échec sans
+    rejouer les nœuds déjà terminés.
+
+    Returns:
+        Graphe compilé, à invoquer avec checkpoint_config(feedback_id)
+    """
+    global _feedback_graph, _checkpointer
+    async with _init_lock:
+        if _feedback_graph is None:
+            os.makedirs(settings.data_dir, exist_ok=True)
+            conn = await aiosqlite.connect(os.path.join(settings.data_dir, "checkpoints.sqlite3"))
+            _checkpointer = AsyncSqliteSaver(conn)
+            await _checkpointer.setup()
+            _feedback_graph = build_feedback_graph().compile(checkpointer=_checkpointer)
+    return _feedback_graph
+
+
+async def delete_feedback_checkpoints(feedback_id: str) -> None:
+    """Supprime les checkpoints d'un feedback (nouveau traitement ou traitement terminé)"""
+    await get_feedback_graph()
+    await _checkpointer.adelete_thread(feedback_id)
+
+
+async def close_feedback_graph() -> None:
+    """Ferme la base des checkpoints (appelé à l'arrêt de l'application)"""
+    global _feedback_graph, _checkpointer
+    if _checkpointer is not None:
+        await _checkpointer.conn.close()
+    _feedback_graph = None
+    _checkpointer = None
\ No newline at end of file
@@ -1,90 +1,187 @@
-from typing import Dict, List, Any
-import os
+from typing import AsyncIterable, AsyncIterator, Dict, List, Any, Tuple
+import asyncio
 import json
 
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from ai_product_pilot.langgraph.chains import chain_registry
 from ai_product_pilot.lib.supabase import get_supabase_client
 from ai_product_pilot.core.settings import settings
+from ai_product_pilot.models.insights import ExtractedInsights
+from ai_product_pilot.services.vector_store import VectorStoreService
 
 
-# Modèle Pydantic pour l'extraction structurée
-class ExtractedInsights(BaseModel):
-    themes: List[str] = Field(
-        description="Liste des thèmes principaux identifiés dans les feedbacks"
-    )
-    sentiments: Dict[str, float] = Field(
-        description="Score de sentiment pour chaque thème (entre -1 et 1)"
-    )
-    pain_points: List[str] = Field(
-        description="Liste des points de douleur identifiés"
-    )
-    feature_requests: List[str] = Field(
-        description="Liste des fonctionnalités demandées ou suggestions"
-    )
-    user_personas: List[Dict[str, str]] = Field(
-        description="Personas utilisateurs identifiés dans les feedbacks"
-    )
-    key_metrics: Dict[str, Any] = Field(
-        description="Métriques clés extraites des feedbacks (si disponibles)"
+async def iter_groups(docs: AsyncIterable[Dict[str, Any]], max_chars: int) -> AsyncIterator[str]:
+    """
+    Regroupe les segments consécutifs en textes d'au plus max_chars caractères
+
+    Args:
+        docs: Segments du feedback, dans leur ordre d'ingestion
+        max_chars: Taille maximale d'un groupe (contexte d'un appel LLM)
+
+    Yields:
+        Textes à analyser, un par groupe
+    """
+    current: List[str] = []
+    current_length = 0
+    async for doc in docs:
+        content = doc["content"][:max_chars]
+        if current and current_length + len(content) + 2 > max_chars:
+            yield "\n\n".join(current)
+            current, current_length = [], 0
+        current.append(content)
+        current_length += len(content) + 2
+    if current:
+        yield "\n\n".join(current)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def _rank_by_support(values: List[Tuple[str, float]]) -> List[str]:
+    """Dédoublonne des libellés et les ordonne par support décroissant puis ordre d'apparition"""
+    support: Dict[str, float] = {}
+    labels: Dict[str, str] = {}
+    for value, weight in values:
+        key = _normalize(value)
+        if not key:
+            continue
+        labels.setdefault(key, value)
+        support[key] = support.get(key, 0.0) + weight
+    order = {key: index for index, key in enumerate(labels)}
+    return [labels[key] for key in sorted(labels, key=lambda key: (-support[key], order[key]))]
+
+
+def merge_insights(partials: List[Tuple[ExtractedInsights, float]]) -> ExtractedInsights:
+    """
+    Fusionne de façon déterministe les insights extraits de plusieurs groupes
+
+    Args:
+        partials: Insights de chaque groupe avec leur poids (taille du texte analysé)
+
+    Returns:
+        Insights consolidés : thèmes et listes ordonnés par support, sentiments
+        moyennés et pondérés par le support de chaque groupe
+    """
+    themes = _rank_by_support([
+        (theme, weight) for insights, weight in partials for theme in insights.themes
+    ])
+    theme_labels = {_normalize(theme): theme for theme in themes}
+
+    # Moyenne des sentiments pondérée par le poids des groupes qui les expriment
+    sentiment_sums: Dict[str, float] = {}
+    sentiment_weights: Dict[str, float] = {}
+    for insights, weight in partials:
+        for theme, score in insights.sentiments.items():
+            key = _normalize(theme)
+            theme_labels.setdefault(key, theme)
+            sentiment_sums[key] = sentiment_sums.get(key, 0.0) + score * weight
+            sentiment_weights[key] = sentiment_weights.get(key, 0.0) + weight
+    sentiments = {
+        theme_labels[key]: round(sentiment_sums[key] / sentiment_weights[key], 3)
+        for key in sentiment_sums
+        if sentiment_weights[key] > 0
+    }
+
+    # Personas dédoublonnés sur l'ensemble de leurs attributs
+    personas: List[Dict[str, str]] = []
+    seen_personas = set()
+    for insights, _ in partials:
+        for persona in insights.user_personas:
+            key = tuple(sorted((_normalize(k), _normalize(v)) for k, v in persona.items()))
+            if key not in seen_personas:
+                seen_personas.add(key)
+                personas.append(persona)
+
+    # Métriques : moyenne pondérée si numériques, sinon première valeur rencontrée
+    metric_values: Dict[str, List[Tuple[Any, float]]] = {}
+    for insights, weight in partials:
+        for name, value in insights.key_metrics.items():
+            metric_values.setdefault(name, []).append((value, weight))
+    key_metrics: Dict[str, Any] = {}
+    for name, values in metric_values.items():
+        numeric = [
+            (value, weight) for value, weight in values
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        total_weight = sum(weight for _, weight in numeric)
+        if len(numeric) == len(values) and total_weight > 0:
+            key_metrics[name] = round(sum(value * weight for value, weight in numeric) / total_weight, 3)
+        else:
+            key_metrics[name] = values[0][0]
+
+    return ExtractedInsights(
+        themes=themes,
+        sentiments=sentiments,
+        pain_points=_rank_by_support([
+            (item, weight) for insights, weight in partials for item in insights.pain_points
+        ]),
+        feature_requests=_rank_by_support([
+            (item, weight) for insights, weight in partials for item in insights.feature_requests
+        ]),
+        user_personas=personas,
+        key_metrics=key_metrics,
     )
 
 
 async def extract_insights(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Nœud qui extrait des insights structurés à partir des documents
+    Nœud qui extrait des insights structurés à partir des documents.
+
+    Les segments sont relus depuis le stockage vectoriel et regroupés en
+    textes de taille bornée, analysés en parallèle par fenêtres de
+    extract_max_concurrency groupes (map), puis les insights de chaque groupe
+    sont fusionnés (reduce) : l'intégralité du feedback est couverte sans
+    que son texte complet soit chargé en mémoire.
     
     Args:
-        state: État contenant les documents et les données de feedback
+        state: État contenant l'ID du feedback et le nombre de segments ingérés
         
     Returns:
         État mis à jour avec les entités extraites
     """
     feedback_id = state["feedback_id"]
-    docs = state["docs"]
-    
-    # Combiner tous les textes des documents
-    all_text = "\n\n".join([doc["content"] for doc in docs])
-    
-    # Limiter la longueur du texte pour éviter les dépassements de contexte
-    max_length = 12000
-    if len(all_text) > max_length:
-        all_text = all_text[:max_length] + "... [texte tronqué]"
+    vector_store = VectorStoreService()
     
-    # Charger le template de prompt pour l'extraction
-    with open(os.path.join(os.path.dirname(__file__), "../../..", "prompts/extract_insights.txt"), "r") as f:
-        template = f.read()
+    # Chaîne de traitement compilée (prompt | LLM | parser)
+    chain = chain_registry.get("extract")
     
-    # Créer le prompt
-    prompt = ChatPromptTemplate.from_template(template)
+    async def analyze(texts: List[str]) -> List[Tuple[ExtractedInsights, float]]:
+        # Extraction par groupe via l'API batch, avec un nombre limité d'appels simultanés
+        results = await chain.abatch(
+            [{"feedback_text": text} for text in texts],
+            config={"max_concurrency": settings.extract_max_concurrency},
+        )
+        return [(partial, float(len(text))) for partial, text in zip(results, texts)]
     
-    # Configurer le modèle LLM
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.3,
-        openai_api_key=settings.openai_api_key
-    )
-    
-    # Configurer le parser de sortie
-    parser = PydanticOutputParser(pydantic_object=ExtractedInsights)
+    # Regrouper les segments en textes compatibles avec le contexte du modèle
+    partials: List[Tuple[ExtractedInsights, float]] = []
+    window: List[str] = []
+    chunks = vector_store.iter_chunks(f"feedback:{feedback_id}")
+    async for text in iter_groups(chunks, settings.extract_group_chars):
+        window.append(text)
+        if len(window) >= settings.extract_max_concurrency:
+            partials.extend(await analyze(window))
+            window = []
+    if window:
+        partials.extend(await analyze(window))
     
-    # Chaîne de traitement
-    chain = prompt | llm | parser
-    
-    # Exécuter l'extraction
-    insights = await chain.ainvoke({
-        "feedback_text": all_text,
-        "format_instructions": parser.get_format_instructions()
-    })
+    if len(partials) == 1:
+        insights = partials[0][0]
+    else:
+        insights = merge_insights(partials)
+        
+        # Consolidation optionnelle des doublons sémantiques par le LLM
+        if settings.extract_llm_reduce and len(partials) > 1:
+            insights = await chain_registry.get("reduce").ainvoke({
+                "merged_insights": json.dumps(insights.model_dump(), ensure_ascii=False, indent=2)
+            })
     
     # Mettre à jour le statut du feedback
     supabase = get_supabase_client()
-    supabase.table("feedback").update({
+    await asyncio.to_thread(lambda: supabase.table("feedback").update({
         "status": "analyzed",
         "analysis": json.dumps(insights.model_dump())
-    }).eq("id", feedback_id).execute()
+    }).eq("id", feedback_id).execute())
     
     # Retourner l'état mis à jour
     return {
@@ -1,14 +1,40 @@
 from typing import Dict, List, Any
-import os
 import json
 
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field, field_validator
 from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.chains import chain_registry
+from ai_product_pilot.langgraph.streaming import JsonItemStream, stream_chain
 from ai_product_pilot.models.backlog import UserStories
-from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.events import StreamPublisher
+
+
+async def _stream_stories(feedback_id: str, context: Dict[str, Any]) -> UserStories:
+    """
+    Génère les stories en publiant chacune dès que son JSON est complet
+
+    Args:
+        feedback_id: Feedback en cours de traitement
+        context: Variables du prompt de génération
+
+    Returns:
+        Stories analysées à partir de la réponse complète
+    """
+    stream = StreamPublisher(feedback_id, "generate")
+    items = JsonItemStream("stories")
+    published = 0
+
+    async def on_text(delta: str) -> None:
+        nonlocal published
+        await stream.text(delta)
+        for story in items.feed(delta):
+            await stream.story(published, story)
+            published += 1
+
+    result = await stream_chain("generate", context, on_text=on_text)
+    for index, story in enumerate(result.stories[published:], start=published):
+        await stream.story(index, story.model_dump())
+    await stream.flush()
+    return result
 
 
 async def generate_stories(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -25,10 +51,6 @@ async def generate_stories(state: Dict[str, Any]) -> Dict[str, Any]:
     summary = state["summary"]
     entities = state["entities"]
     
-    # Charger le template de prompt
-    with open(os.path.join(os.path.dirname(__file__), "../../..", "prompts/generate_stories.txt"), "r") as f:
-        template = f.read()
-    
     # Créer le contexte pour la génération
     context = {
         "summary": summary,
@@ -39,27 +61,12 @@ async def generate_stories(state: Dict[str, Any]) -> Dict[str, Any]:
         "sentiments": entities.get("sentiments", {}),
     }
     
-    # Configurer le prompt
-    prompt = ChatPromptTemplate.from_template(template)
-    
-    # Configurer le LLM
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.5,
-        openai_api_key=settings.openai_api_key
-    )
-    
-    # Configurer le parser
-    parser = PydanticOutputParser(pydantic_object=UserStories)
-    
-    # Chaîne de traitement
-    chain = prompt | llm | parser
-    
-    # Exécuter la génération
-    result = await chain.ainvoke({
-        **context,
-        "format_instructions": parser.get_format_instructions()
-    })
+    # Exécuter la génération avec la chaîne compilée (prompt | LLM | parser),
+    # en diffusant les stories au fil des tokens
+    if settings.llm_streaming_enabled:
+        result = await _stream_stories(feedback_id, context)
+    else:
+        result = await chain_registry.get("generate").ainvoke(context)
     
     # Convertir les objets Pydantic en dictionnaires
     stories_dicts = []
@@ -1,122 +1,196 @@
-from typing import Dict, List, Any
-import json
-import csv
-import io
+from typing import Dict, Iterator, List, Any
+import asyncio
+import itertools
+import uuid
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from ai_product_pilot.core.metrics import INGEST_CHUNKS
+from ai_product_pilot.core.settings import settings
 from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.fingerprint import chunk_fingerprints, find_duplicate_chunks, record_chunk_fingerprints
+from ai_product_pilot.services.ingestion import iter_batches, iter_chunks, iter_records
 from ai_product_pilot.services.vector_store import VectorStoreService
 
+# Segments conservés dans l'état du graphe, comme exemples pour la synthèse :
+# les nœuds suivants relisent l'ensemble des segments depuis le stockage vectoriel
+SAMPLE_DOCS = 3
+
+
+def _iter_storage_file(supabase, file_path: str) -> Iterator[bytes]:
+    """Télécharge un fichier du bucket "feedback_raw" par blocs, sans le charger en entier"""
+    storage = supabase.storage
+    with storage.session.stream("GET", f"object/feedback_raw/{file_path}") as response:
+        response.raise_for_status()
+        yield from response.iter_bytes(settings.ingest_read_chunk_bytes)
+
 
 async def ingest_feedback(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Nœud d'ingestion qui charge les données de feedback et les prépare pour l'analyse
-    
+    Nœud d'ingestion qui charge les données de feedback et les prépare pour l'analyse.
+
+    Les fichiers sont lus en flux : les enregistrements sont découpés en
+    segments au fil de l'eau et vectorisés par lots de taille bornée, de sorte
+    que la mémoire de travail ne dépend pas de la taille du fichier.
+
+    Les segments déjà traités dans un autre feedback (même contenu ou
+    quasi-doublon MinHash) ne sont ni vectorisés ni analysés : un feedback
+    entièrement dupliqué passe au statut "duplicate", un feedback sans
+    contenu au statut "error".
+
+    Les segments sont numérotés (métadonnée `chunk`) et rattachés à cette
+    ingestion (`ingest_run`) : ceux d'un traitement précédent ne sont
+    supprimés qu'une fois tous les nouveaux segments enregistrés. Seuls leur
+    nombre et quelques exemples sont conservés dans l'état.
+
     Args:
         state: État actuel contenant feedback_id et feedback_data
-        
+
     Returns:
-        État mis à jour avec les documents extraits
+        État mis à jour avec le nombre de segments et un échantillon
     """
     feedback_id = state["feedback_id"]
     feedback_data = state["feedback_data"]
-    
+
     supabase = get_supabase_client()
     vector_store = VectorStoreService()
-    
-    # Traitement différent selon le type de contenu
-    content = ""
-    
-    # Si le feedback a un fichier associé, le récupérer depuis Supabase Storage
+
+    # Enregistrements textuels à découper, selon le type de contenu
+    records: Iterator[str] = iter([])
+    separator = "\n\n"
+
+    # Si le feedback a un fichier associé, le lire en flux depuis Supabase Storage
     if feedback_data.get("file_path"):
         file_path = feedback_data["file_path"]
         file_extension = file_path.split(".")[-1].lower()
-        
-        # Télécharger le fichier
-        file_data = supabase.storage.from_("feedback_raw").download(file_path)
-        
-        # Traiter selon le type de fichier
-        if file_extension == "json":
-            # Charger le JSON
-            try:
-                json_data = json.loads(file_data.decode("utf-8"))
-                
-                # Si c'est une liste de commentaires/avis
-                if isinstance(json_data, list):
-                    content = "\n\n".join([
-                        json.dumps(item, ensure_ascii=False) 
-                        for item in json_data
-                    ])
-                else:
-                    content = json.dumps(json_data, ensure_ascii=False, indent=2)
-            except json.JSONDecodeError:
-                content = f"Erreur de parsing JSON: {file_data.decode('utf-8')}"
-        
-        elif file_extension == "csv":
-            # Charger le CSV
-            try:
-                csv_data = csv.DictReader(io.StringIO(file_data.decode("utf-8")))
-                rows = list(csv_data)
-                content = "\n\n".join([
-                    ", ".join([f"{k}: {v}" for k, v in row.items()])
-                    for row in rows
-                ])
-            except Exception as e:
-                content = f"Erreur de parsing CSV: {str(e)}"
-        
-        else:
-            # Fichier texte par défaut
-            content = file_data.decode("utf-8")
-    
+        records = iter_records(
+            file_extension,
+            _iter_storage_file(supabase, file_path),
+            max_record_chars=settings.ingest_max_record_chars,
+        )
+        if file_extension not in ("json", "csv"):
+            separator = ""
+
     # Si le feedback a du contenu textuel direct, l'utiliser
     elif feedback_data.get("content"):
-        content = feedback_data["content"]
-    
-    # Si on a une description, l'ajouter au contenu
+        records = iter([feedback_data["content"]])
+
+    # Si on a une description, l'ajouter en tête du contenu
     if feedback_data.get("description"):
-        content = f"{feedback_data['description']}\n\n{content}"
-    
-    # Mettre à jour le feedback avec le contenu extrait
-    supabase.table("feedback").update({
-        "content": content,
-        "status": "ingested"
-    }).eq("id", feedback_id).execute()
-    
+        description = feedback_data["description"] if separator else f"{feedback_data['description']}\n\n"
+        records = itertools.chain([description], records)
+
     # Découper le contenu en segments pour vectorisation
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=100,
         separators=["\n\n", "\n", ". ", " ", ""]
     )
-    text_chunks = text_splitter.split_text(content)
-    
-    # Créer les métadonnées pour chaque segment
-    metadatas = [{
-        "feedback_id": feedback_id,
-        "source": feedback_data.get("source", ""),
-        "title": feedback_data.get("title", ""),
-        "type": "feedback"
-    } for _ in text_chunks]
-    
-    # Vectoriser et stocker les segments
-    doc_ids = await vector_store.add_documents(
-        texts=text_chunks,
-        metadatas=metadatas,
-        namespace=f"feedback:{feedback_id}"
+    batches = iter_batches(
+        iter_chunks(
+            records,
+            text_splitter.split_text,
+            separator=separator,
+            buffer_chars=settings.ingest_buffer_chars,
+        ),
+        max_batch_bytes=settings.ingest_batch_max_bytes,
+    )
+
+    # Les empreintes d'un traitement précédent de ce feedback sont recalculées
+    namespace = f"feedback:{feedback_id}"
+    ingest_run = uuid.uuid4().hex
+    if settings.feedback_dedup_enabled:
+        await asyncio.to_thread(
+            lambda: supabase.table("chunk_fingerprints").delete().eq("feedback_id", feedback_id).execute()
+        )
+
+    docs = []
+    chunk_count = 0
+    preview = ""
+    duplicate_chunks = 0
+    while True:
+        # Lecture et découpage bloquants exécutés hors de la boucle d'événements
+        text_chunks: List[str] = await asyncio.to_thread(next, batches, None)
+        if text_chunks is None:
+            break
+        INGEST_CHUNKS.inc(len(text_chunks))
+
+        if len(preview) < settings.ingest_content_preview_chars:
+            preview += "\n\n".join(text_chunks) + "\n\n"
+
+        # Écarter les segments déjà traités dans un autre feedback
+        fingerprints = []
+        if settings.feedback_dedup_enabled:
+            fingerprints = await asyncio.to_thread(chunk_fingerprints, text_chunks)
+            duplicates = await asyncio.to_thread(
+                find_duplicate_chunks,
+                supabase,
+                feedback_id,
+                fingerprints,
+                settings.feedback_near_duplicate_threshold,
+            )
+            duplicate_chunks += sum(duplicates)
+            text_chunks = [chunk for chunk, duplicate in zip(text_chunks, duplicates) if not duplicate]
+            fingerprints = [fingerprint for fingerprint, duplicate in zip(fingerprints, duplicates) if not duplicate]
+            if not text_chunks:
+                continue
+
+        # Créer les métadonnées pour chaque segment
+        metadatas = [{
+            "feedback_id": feedback_id,
+            "source": feedback_data.get("source", ""),
+            "title": feedback_data.get("title", ""),
+            "type": "feedback",
+            "chunk": chunk_count + index,
+            "ingest_run": ingest_run
+        } for index in range(len(text_chunks))]
+        chunk_count += len(text_chunks)
+
+        # Vectoriser et stocker le lot de segments
+        doc_ids = await vector_store.add_documents(
+            texts=text_chunks,
+            metadatas=metadatas,
+            namespace=namespace
+        )
+
+        # Échantillon des documents pour l'étape de synthèse
+        docs.extend(
+            {
+                "id": doc_id,
+                "content": chunk,
+                "metadata": metadata
+            }
+            for doc_id, chunk, metadata in itertools.islice(
+                zip(doc_ids, text_chunks, metadatas), SAMPLE_DOCS - len(docs)
+            )
+        )
+        await asyncio.to_thread(record_chunk_fingerprints, supabase, feedback_id, fingerprints)
+
+    # Nouveaux segments enregistrés : supprimer ceux d'un traitement précédent
+    await vector_store.delete_stale_chunks(namespace, ingest_run)
+
+    # Mettre à jour le feedback : le contenu textuel direct est conservé tel
+    # quel, un fichier n'est conservé que sous forme d'aperçu
+    if feedback_data.get("file_path"):
+        content = preview[:settings.ingest_content_preview_chars].strip()
+    else:
+        content = "\n\n".join(
+            part for part in (feedback_data.get("description"), feedback_data.get("content")) if part
+        )
+    # Sans nouveau segment, le traitement s'arrête ici : le statut est définitif
+    update = {"content": content, "status": "ingested"}
+    if not chunk_count:
+        if duplicate_chunks:
+            update["status"] = "duplicate"
+        else:
+            update.update({"status": "error", "error": "Aucun contenu à analyser"})
+    await asyncio.to_thread(
+        lambda: supabase.table("feedback").update(update).eq("id", feedback_id).execute()
     )
-    
-    # Préparation des documents pour l'étape suivante
-    docs = [
-        {
-            "id": doc_id,
-            "content": chunk,
-            "metadata": metadata
-        }
-        for doc_id, chunk, metadata in zip(doc_ids, text_chunks, metadatas)
-    ]
-    
+
     # Mettre à jour l'état
     return {
         **state,
-        "docs": docs
-    }
\ No newline at end of file
+        "docs": docs,
+        "chunk_count": chunk_count,
+        "duplicate_chunks": duplicate_chunks
+    }
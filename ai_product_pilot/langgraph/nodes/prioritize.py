@@ -1,11 +1,129 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Optional, Tuple, Any
+import asyncio
 import json
+import logging
+import math
 import uuid
 
-from ai_product_pilot.services.scoring import calculate_rice_score, estimate_rice_parameters
+from ai_product_pilot.core.metrics import STORIES_DEDUPLICATED
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.services.scoring import calculate_rice_score, estimate_story_rice_parameters
 from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.events import publish_story_changes
 from ai_product_pilot.services.vector_store import VectorStoreService
 
+logger = logging.getLogger(__name__)
+
+
+async def _persist_stories(
+    supabase,
+    vector_store: VectorStoreService,
+    stories: List[Dict[str, Any]],
+    contents: List[str],
+    metadatas: List[Dict[str, Any]],
+    embeddings: Optional[List[List[float]]] = None,
+) -> None:
+    """
+    Insère toutes les stories en une requête et les vectorise en un seul lot,
+    les deux opérations s'exécutant en parallèle.
+
+    Si l'une des deux échoue, l'autre est annulée (suppression des lignes ou
+    des vecteurs déjà écrits) afin de ne pas laisser de données orphelines.
+    """
+    insert_result, vector_result = await asyncio.gather(
+        asyncio.to_thread(lambda: supabase.table("stories").insert(stories).execute()),
+        vector_store.add_documents(texts=contents, metadatas=metadatas, embeddings=embeddings),
+        return_exceptions=True,
+    )
+    
+    insert_failed = isinstance(insert_result, BaseException)
+    vector_failed = isinstance(vector_result, BaseException)
+    if not insert_failed and not vector_failed:
+        return
+    
+    # Compensation de l'opération qui a réussi
+    try:
+        if not insert_failed:
+            await asyncio.to_thread(
+                lambda: supabase.table("stories").delete().in_("id", [story["id"] for story in stories]).execute()
+            )
+        if not vector_failed:
+            await vector_store.delete_by_ids(vector_result)
+    except Exception:
+        logger.exception("Rollback of partially persisted stories failed")
+    
+    raise insert_result if insert_failed else vector_result
+
+
+async def _find_duplicates(
+    vector_store: VectorStoreService,
+    contents: List[str],
+) -> Tuple[Optional[List[List[float]]], List[Optional[str]]]:
+    """
+    Recherche, pour chaque nouvelle story, une story existante quasi identique
+
+    Les embeddings des stories sont calculés une fois, comparés aux stories
+    existantes en une seule requête, puis réutilisés pour l'insertion.
+
+    Returns:
+        Embeddings des stories et, pour chacune, l'ID de la story existante
+        correspondante (None si la story est nouvelle)
+    """
+    if not settings.story_dedup_enabled or not contents:
+        return None, [None] * len(contents)
+    
+    embeddings = await vector_store.embed_documents(contents)
+    matches = await vector_store.find_similar(
+        embeddings, settings.story_dedup_threshold, filter_type="story"
+    )
+    return embeddings, [match["id"] if match else None for match in matches]
+
+
+def _distinct_stories(
+    indices: List[int],
+    stories: List[Dict[str, Any]],
+    embeddings: List[List[float]],
+    threshold: float,
+) -> List[int]:
+    """
+    Dédoublonne entre elles des stories du lot, de la mieux notée à la moins bien notée
+
+    Returns:
+        Indices des stories retenues : chacune a une similarité cosinus
+        inférieure à threshold avec toutes les stories retenues avant elle
+    """
+    def cosine(a: List[float], b: List[float]) -> float:
+        norms = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return sum(x * y for x, y in zip(a, b)) / norms if norms else 0.0
+
+    kept: List[int] = []
+    for index in sorted(indices, key=lambda i: stories[i]["rice_score"], reverse=True):
+        if all(cosine(embeddings[index], embeddings[other]) < threshold for other in kept):
+            kept.append(index)
+    return kept
+
+
+def _merge_duplicates(supabase, merges: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fusionne des stories dans les stories existantes correspondantes, en une requête
+
+    Args:
+        supabase: Client Supabase
+        merges: Story à fusionner par ID de story existante
+
+    Returns:
+        Stories existantes mises à jour (feedbacks sources et score RICE)
+    """
+    payload = [
+        {
+            "id": target_id,
+            "feedback_ids": story["feedback_ids"],
+            **{column: story[column] for column in ("reach", "impact", "confidence", "effort", "rice_score")},
+        }
+        for target_id, story in merges.items()
+    ]
+    return supabase.rpc("merge_duplicate_stories", {"merges": payload}).execute().data
+
 
 async def prioritize_stories(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -25,37 +143,13 @@ async def prioritize_stories(state: Dict[str, Any]) -> Dict[str, Any]:
     supabase = get_supabase_client()
     vector_store = VectorStoreService()
     
-    # Données pour l'estimation RICE
-    theme_importance = {}
-    sentiment_scores = entities.get("sentiments", {})
-    
-    # Calculer l'importance des thèmes en fonction de leur fréquence d'apparition
-    all_themes = entities.get("themes", [])
-    for theme in all_themes:
-        theme_importance[theme] = all_themes.count(theme) / len(all_themes) * 10
-    
     # Estimer les paramètres RICE pour chaque story
     prioritized_stories = []
+    story_contents = []
+    story_metadatas = []
     for story in stories:
         # Estimer la portée, l'impact, la confiance et l'effort
-        # La portée est basée sur les personas et les thèmes
-        user_count = len(entities.get("user_personas", [])) * 100  # estimation
-        
-        # Calculer le sentiment moyen pour les thèmes associés à cette story
-        relevant_sentiments = [
-            sentiment_scores.get(theme, 0) 
-            for theme in story["themes"] 
-            if theme in sentiment_scores
-        ]
-        avg_sentiment = sum(relevant_sentiments) / len(relevant_sentiments) if relevant_sentiments else 0
-        
-        # Estimer les paramètres RICE
-        reach, impact, confidence, effort = estimate_rice_parameters(
-            story_text=story["description"],
-            theme_importance=theme_importance,
-            sentiment_score=avg_sentiment,
-            user_count=user_count
-        )
+        reach, impact, confidence, effort = estimate_story_rice_parameters(story, entities)
         
         # Calculer le score RICE
         rice_score = calculate_rice_score(reach, impact, confidence, effort)
@@ -76,35 +170,81 @@ async def prioritize_stories(state: Dict[str, Any]) -> Dict[str, Any]:
         # Ajouter à la liste des stories priorisées
         prioritized_stories.append(prioritized_story)
         
-        # Insérer dans la base de données
-        supabase.table("stories").insert(prioritized_story).execute()
-        
-        # Vectoriser la story pour permettre la recherche sémantique
-        story_content = f"Title: {story['title']}\nAs a {story['as_a']}, I want {story['i_want']} so that {story['so_that']}\n\n{story['description']}"
-        story_metadata = {
+        # Préparer la vectorisation pour permettre la recherche sémantique
+        story_contents.append(
+            f"Title: {story['title']}\nAs a {story['as_a']}, I want {story['i_want']} so that {story['so_that']}\n\n{story['description']}"
+        )
+        story_metadatas.append({
             "id": story_id,
             "title": story["title"],
             "themes": story["themes"],
             "rice_score": rice_score,
             "type": "story",
-            "feedback_ids": story["feedback_ids"]
-        }
-        
-        # Ajouter au vector store
-        await vector_store.add_documents(
-            texts=[story_content],
-            metadatas=[story_metadata],
-            namespace=f"story:{story_id}"
+            "feedback_ids": story["feedback_ids"],
+            "namespace": f"story:{story_id}"
+        })
+    
+    # Les stories quasi identiques à une story existante y sont fusionnées
+    embeddings, duplicate_of = await _find_duplicates(vector_store, story_contents)
+    candidates: Dict[str, List[int]] = {}
+    new_indices = []
+    for index, target_id in enumerate(duplicate_of):
+        if target_id is None:
+            new_indices.append(index)
+        else:
+            candidates.setdefault(target_id, []).append(index)
+    # La mieux notée des stories correspondant à une même story existante y est fusionnée
+    merges = {
+        target_id: prioritized_stories[max(indices, key=lambda i: prioritized_stories[i]["rice_score"])]
+        for target_id, indices in candidates.items()
+    }
+    
+    merged_stories = await asyncio.to_thread(_merge_duplicates, supabase, merges) if merges else []
+    
+    # Une story existante supprimée depuis sa vectorisation n'est pas mise à
+    # jour : les stories qui devaient y être fusionnées sont dédoublonnées
+    # entre elles et insérées comme nouvelles stories, et le vecteur orphelin
+    # est supprimé
+    missing_targets = set(merges) - {story["id"] for story in merged_stories}
+    if missing_targets:
+        await vector_store.delete_by_namespaces([f"story:{target_id}" for target_id in missing_targets])
+        for target_id in missing_targets:
+            new_indices += _distinct_stories(
+                candidates[target_id], prioritized_stories, embeddings, settings.story_dedup_threshold
+            )
+        new_indices.sort()
+    STORIES_DEDUPLICATED.inc(len(prioritized_stories) - len(new_indices))
+    
+    # Les métadonnées vectorielles des stories fusionnées suivent leur score
+    # et leurs feedbacks sources (résultats de find_similar et de la recherche)
+    if merged_stories:
+        await vector_store.update_metadata_by_namespaces({
+            f"story:{story['id']}": {key: story[key] for key in ("rice_score", "feedback_ids") if key in story}
+            for story in merged_stories
+        })
+    
+    new_stories = [prioritized_stories[index] for index in new_indices]
+    if new_stories:
+        await _persist_stories(
+            supabase,
+            vector_store,
+            new_stories,
+            [story_contents[index] for index in new_indices],
+            [story_metadatas[index] for index in new_indices],
+            [embeddings[index] for index in new_indices] if embeddings is not None else None,
         )
+    prioritized_stories = new_stories + merged_stories
+    publish_story_changes("INSERT", new_stories)
+    publish_story_changes("UPDATE", merged_stories)
     
     # Trier les stories par score RICE
     prioritized_stories.sort(key=lambda x: x["rice_score"], reverse=True)
     
     # Mettre à jour le statut du feedback
-    supabase.table("feedback").update({
+    await asyncio.to_thread(lambda: supabase.table("feedback").update({
         "status": "completed",
         "stories_count": len(prioritized_stories)
-    }).eq("id", feedback_id).execute()
+    }).eq("id", feedback_id).execute())
     
     # Retourner l'état mis à jour
     return {
@@ -1,11 +1,13 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import asyncio
 import json
 
-from langchain.schema.runnable import Runnable
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from langchain.schema.runnable import Runnable, RunnableConfig
 from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.chains import chain_registry
+from ai_product_pilot.langgraph.streaming import stream_chain
 from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.events import StreamPublisher
 
 
 class InsightSynthesizer(Runnable):
@@ -15,56 +17,23 @@ class InsightSynthesizer(Runnable):
     """
     
     def __init__(self):
-        """Initialise le synthesizer avec un modèle LLM et un template de prompt"""
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.4,
-            openai_api_key=settings.openai_api_key
-        )
-        
-        self.template = """
-        En tant qu'analyste de produit, synthétise les insights extraits des feedbacks utilisateurs en un résumé cohérent et actionnable.
-        
-        ## Contexte
-        - Source du feedback: {feedback_source}
-        - Titre: {feedback_title}
-        
-        ## Thèmes identifiés
-        {themes}
-        
-        ## Sentiments par thème
-        {sentiments}
-        
-        ## Points de douleur
-        {pain_points}
-        
-        ## Fonctionnalités demandées
-        {feature_requests}
-        
-        ## Personas utilisateurs
-        {user_personas}
-        
-        ## Exemples de feedback
-        {sample_feedback}
-        
-        ## Instructions
-        1. Synthétise ces données en un résumé de 2-3 paragraphes
-        2. Mets en évidence les tendances principales
-        3. Identifie les opportunités d'amélioration les plus importantes
-        4. Souligne les besoins utilisateurs non satisfaits
-        
-        ## Synthèse
-        """
-        
-        self.prompt = ChatPromptTemplate.from_template(self.template)
-        self.chain = self.prompt | self.llm
+        """Initialise le synthesizer à partir du registre de chaînes partagé"""
+        self.chain_name = "synthesize"
+    
+    @property
+    def chain(self):
+        """Chaîne compilée (rechargée si le fichier de prompt change)"""
+        return chain_registry.get(self.chain_name)
     
-    async def ainvoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def ainvoke(
+        self, state: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
         """
         Méthode asynchrone pour synthétiser les insights
         
         Args:
             state: État contenant les entités extraites
+            config: Configuration d'exécution transmise par LangGraph
             
         Returns:
             État mis à jour avec le résumé
@@ -85,15 +54,19 @@ class InsightSynthesizer(Runnable):
             "feedback_title": state["feedback_data"].get("title", "")
         }
         
-        # Exécuter la synthèse
-        result = await self.chain.ainvoke(context)
-        summary = result.content
+        # Exécuter la synthèse, diffusée au fil des tokens sur le flux d'événements
+        if settings.llm_streaming_enabled:
+            stream = StreamPublisher(feedback_id, "synthesize")
+            summary = await stream_chain(self.chain_name, context, on_text=stream.text, config=config)
+            await stream.flush()
+        else:
+            summary = await self.chain.ainvoke(context, config=config)
         
         # Mettre à jour le feedback avec la synthèse
         supabase = get_supabase_client()
-        supabase.table("feedback").update({
+        await asyncio.to_thread(lambda: supabase.table("feedback").update({
             "summary": summary
-        }).eq("id", feedback_id).execute()
+        }).eq("id", feedback_id).execute())
         
         # Retourner l'état mis à jour
         return {
@@ -101,12 +74,15 @@ class InsightSynthesizer(Runnable):
             "summary": summary
         }
     
-    def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def invoke(
+        self, state: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
         """
         Méthode synchrone pour synthétiser les insights
         
         Args:
             state: État contenant les entités extraites
+            config: Configuration d'exécution transmise par LangGraph
             
         Returns:
             État mis à jour avec le résumé
@@ -121,7 +97,7 @@ class InsightSynthesizer(Runnable):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
         
-        return loop.run_until_complete(self.ainvoke(state))
+        return loop.run_until_complete(self.ainvoke(state, config))
 
 
 # Pour maintenir la compatibilité avec le code existant
@@ -0,0 +1,191 @@
+from typing import Any, Dict, List
+import asyncio
+import time
+
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.graph import checkpoint_config, delete_feedback_checkpoints, get_feedback_graph
+from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.events import JOB_ID_CONFIG_KEY, publish_progress
+from ai_product_pilot.services.jobs import JobContext, job_handler
+from ai_product_pilot.services.llm_cache import LLM_CACHE_BYPASS
+
+# Type de job pour le traitement complet d'un feedback
+PROCESS_FEEDBACK_JOB = "process_feedback"
+# Type de job pour le traitement d'un lot de feedbacks
+PROCESS_FEEDBACK_BATCH_JOB = "process_feedback_batch"
+
+
+def initial_state(feedback_id: str, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    """État d'entrée du graphe de traitement pour un feedback"""
+    return {
+        "feedback_id": feedback_id,
+        "feedback_data": feedback,
+        "docs": [],
+        "chunk_count": 0,
+        "entities": {},
+        "summary": "",
+        "stories": [],
+        "duplicate_chunks": 0
+    }
+
+
+def graph_config(feedback_id: str, job_id: str, bypass_cache: bool) -> Dict[str, Any]:
+    """Configuration d'exécution du graphe pour un feedback : fil de checkpoints, job et cache LLM"""
+    config = checkpoint_config(feedback_id)
+    config["configurable"].update({LLM_CACHE_BYPASS: bypass_cache, JOB_ID_CONFIG_KEY: job_id})
+    return config
+
+
+@job_handler(PROCESS_FEEDBACK_JOB)
+async def run_feedback_job(job: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Exécute le graphe de traitement pour un feedback et publie l'avancement
+
+    Avec resume=true (ou lorsqu'un worker interrompu est relancé), le graphe
+    reprend au nœud en échec à partir du dernier checkpoint ; sinon les
+    checkpoints précédents du feedback sont effacés et le traitement repart
+    de l'ingestion. Les checkpoints sont supprimés une fois le traitement
+    terminé.
+
+    Args:
+        job: Job contenant feedback_id (et éventuellement bypass_cache, resume) dans son payload
+        context: Contexte permettant d'enregistrer les étapes du graphe
+
+    Returns:
+        Résumé du traitement (nombre de stories générées, nœud de reprise)
+    """
+    payload = job["payload"]
+    feedback_id = payload["feedback_id"]
+    supabase = get_supabase_client()
+
+    result = await asyncio.to_thread(
+        lambda: supabase.table("feedback").select("*").eq("id", feedback_id).execute()
+    )
+    if not result.data:
+        raise ValueError(f"Feedback avec ID {feedback_id} non trouvé")
+
+    graph = await get_feedback_graph()
+    config = graph_config(feedback_id, job["id"], payload.get("bypass_cache", False))
+
+    resumed_from = None
+    if payload.get("resume") or job.get("attempts", 1) > 1:
+        snapshot = await graph.aget_state(config)
+        resumed_from = snapshot.next[0] if snapshot.next else None
+    if resumed_from is None:
+        await delete_feedback_checkpoints(feedback_id)
+
+    stories_count = 0
+    try:
+        await context.start_stage(resumed_from or "ingest")
+        async for update in graph.astream(
+            # Sans entrée, le graphe reprend à partir du dernier checkpoint
+            None if resumed_from else initial_state(feedback_id, result.data[0]),
+            config=config,
+            stream_mode="updates",
+        ):
+            # Chaque mise à jour correspond à la fin d'un nœud du graphe
+            for node_name, node_state in update.items():
+                await context.complete_stage(node_name)
+                if node_state and "stories" in node_state:
+                    stories_count = len(node_state["stories"])
+    except Exception as e:
+        await _mark_error(supabase, feedback_id, e)
+        await publish_progress(feedback_id, "failed", job_id=job["id"], error=str(e))
+        raise
+
+    await delete_feedback_checkpoints(feedback_id)
+    await publish_progress(feedback_id, "completed", job_id=job["id"], stories_count=stories_count)
+    return {"feedback_id": feedback_id, "stories_count": stories_count, "resumed_from": resumed_from}
+
+
+async def _mark_error(supabase, feedback_id: str, error: Exception) -> None:
+    """Passe un feedback en erreur avec le message de l'exception"""
+    await asyncio.to_thread(
+        lambda: supabase.table("feedback").update({"status": "error", "error": str(error)}).eq("id", feedback_id).execute()
+    )
+
+
+@job_handler(PROCESS_FEEDBACK_BATCH_JOB)
+async def run_feedback_batch_job(job: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Exécute le graphe de traitement sur un lot de feedbacks, avec une
+    concurrence bornée, et agrège les résultats
+
+    Le lot est exécuté via l'API batch de LangChain (abatch_as_completed) :
+    un feedback en erreur n'interrompt pas les autres.
+
+    Args:
+        job: Job contenant feedback_ids, max_concurrency et bypass_cache dans son payload
+        context: Contexte permettant de publier l'avancement du lot
+
+    Returns:
+        Débit global et résultat de chaque feedback
+    """
+    payload = job["payload"]
+    feedback_ids: List[str] = payload["feedback_ids"]
+    supabase = get_supabase_client()
+
+    # Chargement de tous les feedbacks du lot en une requête
+    rows = (await asyncio.to_thread(
+        lambda: supabase.table("feedback").select("*").in_("id", feedback_ids).execute()
+    )).data
+    feedbacks = {row["id"]: row for row in rows}
+    found_ids = [feedback_id for feedback_id in feedback_ids if feedback_id in feedbacks]
+
+    items: Dict[str, Dict[str, Any]] = {
+        feedback_id: {"feedback_id": feedback_id, "status": "failed", "error": "Feedback non trouvé"}
+        for feedback_id in feedback_ids
+        if feedback_id not in feedbacks
+    }
+
+    # Un fil de checkpoints par feedback : un feedback en échec peut ensuite
+    # être repris individuellement (POST /api/feedback/{id}/resume)
+    graph = await get_feedback_graph()
+    max_concurrency = payload.get("max_concurrency") or settings.batch_max_concurrency
+    configs = []
+    for feedback_id in found_ids:
+        await delete_feedback_checkpoints(feedback_id)
+        config = graph_config(feedback_id, job["id"], payload.get("bypass_cache", False))
+        configs.append({**config, "max_concurrency": max_concurrency})
+
+    started_at = time.perf_counter()
+    done = 0
+    await context.start_stage(f"0/{len(found_ids)}")
+    async for index, output in graph.abatch_as_completed(
+        [initial_state(feedback_id, feedbacks[feedback_id]) for feedback_id in found_ids],
+        config=configs,
+        return_exceptions=True,
+    ):
+        feedback_id = found_ids[index]
+        if isinstance(output, Exception):
+            await _mark_error(supabase, feedback_id, output)
+            item = {"feedback_id": feedback_id, "status": "failed", "error": str(output)}
+        else:
+            await delete_feedback_checkpoints(feedback_id)
+            item = {
+                "feedback_id": feedback_id,
+                "status": "succeeded",
+                "stories_count": len(output.get("stories", [])),
+            }
+        item["completed_after_seconds"] = round(time.perf_counter() - started_at, 3)
+        await publish_progress(
+            feedback_id,
+            "completed" if item["status"] == "succeeded" else "failed",
+            job_id=job["id"],
+            stories_count=item.get("stories_count"),
+            error=item.get("error"),
+        )
+        items[feedback_id] = item
+        done += 1
+        await context.start_stage(f"{done}/{len(found_ids)}")
+
+    duration = time.perf_counter() - started_at
+    succeeded = sum(1 for item in items.values() if item["status"] == "succeeded")
+    return {
+        "total": len(feedback_ids),
+        "succeeded": succeeded,
+        "failed": len(feedback_ids) - succeeded,
+        "duration_seconds": round(duration, 3),
+        "throughput_per_minute": round(succeeded * 60 / duration, 2) if duration > 0 else 0.0,
+        "items": [items[feedback_id] for feedback_id in feedback_ids],
+    }
@@ -0,0 +1,117 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import json
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+
+from ai_product_pilot.langgraph.chains import chain_registry
+
+TextCallback = Callable[[str], Awaitable[None]]
+
+
+async def stream_chain(
+    name: str,
+    inputs: Dict[str, Any],
+    on_text: TextCallback,
+    config: Optional[RunnableConfig] = None,
+) -> Any:
+    """
+    Exécute une chaîne du registre en diffusant le texte du LLM au fil des tokens
+
+    Le texte complet est ensuite analysé par le parser de la chaîne : le
+    résultat est identique à celui de chain_registry.get(name).ainvoke.
+
+    Args:
+        name: Nom de la chaîne (synthesize, generate)
+        inputs: Variables du prompt
+        on_text: Callback appelée avec chaque fragment de texte reçu
+        config: Configuration d'exécution (cache LLM, callbacks)
+
+    Returns:
+        Sortie analysée de la chaîne
+    """
+    compiled = chain_registry.compiled(name)
+    parts: List[str] = []
+    async for chunk in (compiled.prompt | compiled.llm).astream(inputs, config=config):
+        if isinstance(chunk.content, str) and chunk.content:
+            parts.append(chunk.content)
+            await on_text(chunk.content)
+    return await compiled.parser.ainvoke(AIMessage(content="".join(parts)), config=config)
+
+
+class JsonItemStream:
+    """
+    Analyse incrémentale d'une liste JSON en cours de génération
+
+    Le texte reçu est parcouru une seule fois, au fil des fragments : chaque
+    élément de la liste `key` de l'objet racine est renvoyé dès que son
+    accolade fermante arrive. Seul le texte de l'élément en cours est
+    conservé ; le texte avant l'objet racine (bloc ```json) est ignoré.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        # Dernière chaîne lue dans l'objet racine et clé de la valeur en cours
+        self._string: List[str] = []
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        # Profondeur des éléments de la liste, une fois celle-ci ouverte
+        self._items_depth: Optional[int] = None
+        self._item: Optional[List[str]] = None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Ajoute un fragment de texte
+
+        Args:
+            text: Fragment reçu du LLM
+
+        Returns:
+            Éléments de la liste terminés dans ce fragment
+        """
+        items: List[Dict[str, Any]] = []
+        for char in text:
+            if self._item is not None:
+                self._item.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = "".join(self._string)
+                elif self._depth == 1:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif char == "," and self._depth == 1:
+                self._current_key = None
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._current_key == self.key:
+                    self._items_depth = 2
+                elif char == "{" and self._depth == self._items_depth and self._item is None:
+                    self._item = [char]
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._item is not None and self._depth == self._items_depth:
+                    item, self._item = "".join(self._item), None
+                    try:
+                        parsed = json.loads(item)
+                    except ValueError:
+                        continue
+                    if isinstance(parsed, dict):
+                        items.append(parsed)
+                elif char == "]" and self._depth == 1:
+                    self._items_depth = None
+        return items
@@ -0,0 +1,92 @@
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from ai_product_pilot.core.metrics import LLMMetricsCallback
+from ai_product_pilot.core.settings import settings
+
+# Clients HTTP partagés par tous les modèles OpenAI (chat et embeddings)
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+# Modèles de chat instanciés une fois par (modèle, température)
+_chat_models: Dict[Tuple[str, float], ChatOpenAI] = {}
+
+# Incrémentée à chaque fermeture des clients : les chaînes compilées avec
+# des modèles dont les clients sont fermés doivent être reconstruites
+_clients_generation = 0
+
+
+def _pool_limits() -> httpx.Limits:
+    """Limites du pool de connexions keep-alive vers l'API OpenAI"""
+    return httpx.Limits(
+        max_connections=settings.llm_pool_max_connections,
+        max_keepalive_connections=settings.llm_pool_max_keepalive,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Client HTTP synchrone partagé vers l'API OpenAI"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_pool_limits(), timeout=settings.llm_timeout)
+    return _http_client
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """Client HTTP asynchrone partagé vers l'API OpenAI"""
+    global _http_async_client
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(limits=_pool_limits(), timeout=settings.llm_timeout)
+    return _http_async_client
+
+
+def get_chat_model(model: str, temperature: float) -> ChatOpenAI:
+    """
+    Retourne le modèle de chat partagé pour une configuration donnée
+
+    Args:
+        model: Nom du modèle OpenAI
+        temperature: Température d'échantillonnage
+
+    Returns:
+        Instance ChatOpenAI réutilisant le pool de connexions partagé, dont les
+        appels et tokens sont exportés dans les métriques
+    """
+    key = (model, temperature)
+    if key not in _chat_models:
+        _chat_models[key] = ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            openai_api_key=settings.openai_api_key,
+            http_client=get_http_client(),
+            http_async_client=get_http_async_client(),
+            # Usage des tokens également rapporté pour les réponses diffusées en flux
+            stream_usage=True,
+            callbacks=[LLMMetricsCallback(model)],
+        )
+    return _chat_models[key]
+
+
+def clients_generation() -> int:
+    """Génération des modèles de chat partagés (change à chaque close_llm_clients)"""
+    return _clients_generation
+
+
+async def close_llm_clients() -> None:
+    """
+    Ferme les connexions HTTP partagées (appelé à l'arrêt de l'application)
+
+    Les modèles de chat sont oubliés et les chaînes compilées qui les
+    utilisent seront reconstruites à leur prochain usage.
+    """
+    global _http_client, _http_async_client, _clients_generation
+    _chat_models.clear()
+    _clients_generation += 1
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
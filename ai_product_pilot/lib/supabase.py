@@ -1,5 +1,97 @@
+from typing import Optional
+
+import httpx
+from supabase import Client, create_client
+
+from ai_product_pilot.core.metrics import supabase_event_hooks
 from ai_product_pilot.core.settings import settings
-from supabase import create_client
 
-def get_supabase_client():
-    return create_client(settings.supabase_url, settings.supabase_key)
\ No newline at end of file
+# Client partagé par toute l'application (routes et nœuds LangGraph)
+_client: Optional[Client] = None
+
+
+def _pool_limits() -> httpx.Limits:
+    """Limites du pool de connexions HTTP keep-alive vers Supabase"""
+    return httpx.Limits(
+        max_connections=settings.supabase_pool_max_connections,
+        max_keepalive_connections=settings.supabase_pool_max_keepalive,
+        keepalive_expiry=settings.supabase_pool_keepalive_expiry,
+    )
+
+
+def _pooled_session(session: httpx.Client, service: str) -> httpx.Client:
+    """
+    Recrée une session HTTP du SDK Supabase avec les limites de pool configurées
+
+    Args:
+        session: Session créée par défaut par postgrest/storage3
+        service: Nom du sous-client, utilisé comme label des métriques
+
+    Returns:
+        Nouvelle session de même type, avec les mêmes en-têtes et timeout,
+        instrumentée (nombre et latence des allers-retours)
+    """
+    pooled = type(session)(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        follow_redirects=True,
+        http2=True,
+        limits=_pool_limits(),
+        event_hooks=supabase_event_hooks(service),
+    )
+    session.close()
+    return pooled
+
+
+def _create_pooled_client() -> Client:
+    client = create_client(settings.supabase_url, settings.supabase_key)
+
+    # Les sous-clients sont créés paresseusement par le SDK : on les instancie
+    # une fois pour remplacer leurs sessions par des sessions poolées. Ces
+    # attributs internes dépendent des versions épinglées dans pyproject.toml
+    # (ClientOptions.httpx_client, apparu en 2.16, partage un seul client et
+    # sa base_url entre postgrest et storage)
+    postgrest = client.postgrest
+    postgrest.session = _pooled_session(postgrest.session, "postgrest")
+
+    storage = client.storage
+    storage.session = _pooled_session(storage.session, "storage")
+    storage._client = storage.session
+
+    return client
+
+
+def init_supabase_client() -> Client:
+    """
+    Initialise le client Supabase partagé (appelé au démarrage de l'application)
+
+    Returns:
+        Le client partagé
+    """
+    global _client
+    if _client is None:
+        _client = _create_pooled_client()
+    return _client
+
+
+def get_supabase_client() -> Client:
+    """
+    Retourne le client Supabase partagé, en le créant au besoin.
+
+    Utilisable directement ou comme dépendance FastAPI (`Depends`).
+    """
+    return init_supabase_client()
+
+
+def close_supabase_client() -> None:
+    """Ferme les connexions du client partagé (appelé à l'arrêt de l'application)"""
+    global _client
+    if _client is None:
+        return
+
+    client, _client = _client, None
+    if client._postgrest is not None:
+        client._postgrest.session.close()
+    if client._storage is not None:
+        client._storage.session.close()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 
@@ -31,6 +32,37 @@ class StoryResponse(StoryBase):
     class Config:
         from_attributes = True
 
+class StorySummary(BaseModel):
+    """Ligne du backlog : seules les colonnes demandées (fields=) sont renseignées"""
+    id: str
+    title: Optional[str] = None
+    themes: Optional[List[str]] = None
+    reach: Optional[float] = None
+    impact: Optional[float] = None
+    confidence: Optional[float] = None
+    effort: Optional[float] = None
+    rice_score: Optional[float] = None
+    status: Optional[str] = None
+    as_a: Optional[str] = None
+    i_want: Optional[str] = None
+    so_that: Optional[str] = None
+    description: Optional[str] = None
+    acceptance_criteria: Optional[List[str]] = None
+    feedback_ids: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+# Colonnes renvoyées par défaut par le backlog (sans description ni critères)
+STORY_SUMMARY_FIELDS = ("id", "title", "themes", "rice_score", "status", "created_at")
+
+class ThemeStats(BaseModel):
+    """Statistiques d'un thème, lues dans le catalogue theme_stats"""
+    theme: str
+    story_count: int
+    avg_rice_score: Optional[float] = None
+
+
 # Modèle pour la liste de user stories
 class UserStories(BaseModel):
     stories: List[StoryBase] = Field(description="Liste des user stories générées")
\ No newline at end of file
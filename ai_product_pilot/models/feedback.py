@@ -1,11 +1,50 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class FeedbackResponse(BaseModel):
         id: str = Field(description="Titre concis de la user story")
         title: str = Field(description="Titre concis de la user story")
-        description: str = Field(description="Titre concis de la user story")
+        description: Optional[str] = Field(default=None, description="Titre concis de la user story")
         source: str = Field(description="Titre concis de la user story")
-        file_path: str = Field(description="Titre concis de la user story")
-        content: str = Field(description="Titre concis de la user story")
-        status: str = Field(description="Titre concis de la user story")
\ No newline at end of file
+        file_path: Optional[str] = Field(default=None, description="Titre concis de la user story")
+        content: Optional[str] = Field(default=None, description="Titre concis de la user story")
+        status: str = Field(description="Titre concis de la user story")
+        duplicate: bool = Field(default=False, description="Contenu identique à un feedback existant, dont l'ID est renvoyé")
+
+
+class FeedbackSummary(BaseModel):
+    """Ligne de la liste des feedbacks : seules les colonnes demandées (fields=) sont renseignées"""
+    id: str
+    title: Optional[str] = None
+    source: Optional[str] = None
+    status: Optional[str] = None
+    description: Optional[str] = None
+    file_path: Optional[str] = None
+    error: Optional[str] = None
+    stories_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    content: Optional[str] = None
+    summary: Optional[str] = None
+    analysis: Optional[Any] = None
+
+
+# Colonnes renvoyées par défaut par la liste des feedbacks (sans contenu ni analyse)
+FEEDBACK_SUMMARY_FIELDS = ("id", "title", "source", "status", "stories_count", "created_at")
+
+
+class BatchProcessRequest(BaseModel):
+    feedback_ids: Optional[List[str]] = Field(default=None, description="Feedbacks à traiter")
+    status: Optional[str] = Field(default=None, description="Traiter les feedbacks ayant ce statut (ex: pending)")
+    limit: int = Field(default=100, ge=1, description="Nombre maximum de feedbacks sélectionnés par statut")
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Nombre de feedbacks traités simultanément")
+    bypass_cache: bool = Field(default=False, description="Recalculer les réponses LLM au lieu de lire le cache")
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "BatchProcessRequest":
+        if bool(self.feedback_ids) == bool(self.status):
+            raise ValueError("Fournir soit feedback_ids, soit status")
+        return self
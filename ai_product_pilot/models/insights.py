@@ -0,0 +1,24 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+
+# Modèle Pydantic pour l'extraction structurée
+class ExtractedInsights(BaseModel):
+    themes: List[str] = Field(
+        description="Liste des thèmes principaux identifiés dans les feedbacks"
+    )
+    sentiments: Dict[str, float] = Field(
+        description="Score de sentiment pour chaque thème (entre -1 et 1)"
+    )
+    pain_points: List[str] = Field(
+        description="Liste des points de douleur identifiés"
+    )
+    feature_requests: List[str] = Field(
+        description="Liste des fonctionnalités demandées ou suggestions"
+    )
+    user_personas: List[Dict[str, str]] = Field(
+        description="Personas utilisateurs identifiés dans les feedbacks"
+    )
+    key_metrics: Dict[str, Any] = Field(
+        description="Métriques clés extraites des feedbacks (si disponibles)"
+    )
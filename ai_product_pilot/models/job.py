@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class JobStage(BaseModel):
+    name: str = Field(description="Nom de l'étape (nœud du graphe)")
+    started_at: datetime = Field(description="Début de l'étape")
+    finished_at: datetime = Field(description="Fin de l'étape")
+    duration_ms: float = Field(description="Durée de l'étape en millisecondes")
+
+
+class JobResponse(BaseModel):
+    id: str = Field(description="Identifiant du job")
+    kind: str = Field(description="Type de job")
+    status: str = Field(description="Statut: queued, running, succeeded ou failed")
+    stage: Optional[str] = Field(default=None, description="Dernière étape en cours ou terminée")
+    stages: List[JobStage] = Field(default_factory=list, description="Étapes terminées avec leurs timings")
+    payload: Dict[str, Any] = Field(description="Paramètres du job")
+    result: Optional[Any] = Field(default=None, description="Résultat du job une fois terminé")
+    error: Optional[str] = Field(default=None, description="Message d'erreur en cas d'échec")
+    attempts: int = Field(description="Nombre de tentatives d'exécution")
+    created_at: datetime = Field(description="Date de mise en file")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobAccepted(BaseModel):
+    message: str
+    job_id: str
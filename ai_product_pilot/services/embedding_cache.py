@@ -0,0 +1,240 @@
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from ai_product_pilot.core.metrics import EMBEDDING_TEXTS
+from ai_product_pilot.core.settings import settings
+
+# Cache partagé par toutes les instances de VectorStoreService du processus
+_cache: Optional["EmbeddingCache"] = None
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Clé de cache d'un embedding : (modèle, sha256 du texte)"""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    Cache d'embeddings à deux niveaux :
+    - un LRU en mémoire, borné par la taille des vecteurs stockés
+    - un stockage SQLite local, partagé par les workers d'une même machine
+
+    Les vecteurs sont stockés en float32 ; au-delà de max_entries, les
+    vecteurs les moins récemment lus sont évincés du stockage persistant.
+    """
+
+    def __init__(self, path: Optional[str], max_memory_bytes: int, max_entries: Optional[int] = None):
+        self.path = path
+        self.max_memory_bytes = max_memory_bytes
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL DEFAULT 0)"
+                )
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(embeddings)")]
+                if "accessed_at" not in columns:
+                    # Cache créé avant l'éviction : les vecteurs existants sont les premiers évincés
+                    conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings (accessed_at)"
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, vector: array) -> None:
+        """Ajoute un vecteur au LRU en évinçant les plus anciens si nécessaire"""
+        size = len(vector) * vector.itemsize
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous) * previous.itemsize
+            self._memory[key] = vector
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted) * evicted.itemsize
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Recherche des embeddings dans le cache
+
+        Args:
+            keys: Clés calculées par embedding_key
+
+        Returns:
+            Un vecteur par clé, ou None si absent des deux niveaux
+        """
+        found: Dict[str, array] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+
+        now = time.time()
+        memory_found = len(found)
+        if missing and self.path:
+            with self._connect() as conn:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    placeholders = ",".join("?" for _ in batch)
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        found[key] = vector
+                        self._remember(key, vector)
+                    if rows and self.max_entries:
+                        conn.executemany(
+                            "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                            [(now, key) for key, _ in rows],
+                        )
+
+        results = [found[key].tolist() if key in found else None for key in keys]
+        with self._lock:
+            self.memory_hits += memory_found
+            self.disk_hits += len(found) - memory_found
+            self.misses += sum(1 for result in results if result is None)
+        return results
+
+    def set_many(self, items: Sequence[Tuple[str, List[float]]]) -> None:
+        """Enregistre des embeddings dans les deux niveaux de cache"""
+        vectors = [(key, array("f", vector)) for key, vector in items]
+        for key, vector in vectors:
+            self._remember(key, vector)
+        if self.path and vectors:
+            now = time.time()
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                    [(key, vector.tobytes(), now) for key, vector in vectors],
+                )
+
+                # Éviction des vecteurs les moins récemment lus au-delà du nombre maximal
+                if self.max_entries:
+                    excess = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        conn.execute(
+                            "DELETE FROM embeddings WHERE key IN "
+                            "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                            (excess,),
+                        )
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs de hits/miss et occupation mémoire du cache"""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Enveloppe un modèle d'embeddings LangChain avec un EmbeddingCache :
+    seuls les textes jamais vus (et dédoublonnés) sont envoyés à l'API.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: Optional[str] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[str]]:
+        vectors = self.cache.get_many([embedding_key(self.model, text) for text in texts])
+        # Textes manquants, dédoublonnés en conservant l'ordre
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(texts, vectors) if vector is None
+        ))
+        return vectors, missing
+
+    def _merge(
+        self,
+        texts: List[str],
+        vectors: List[Optional[List[float]]],
+        missing: List[str],
+        computed: List[List[float]],
+    ) -> List[List[float]]:
+        by_text = dict(zip(missing, computed))
+        EMBEDDING_TEXTS.labels("api").inc(len(missing))
+        EMBEDDING_TEXTS.labels("cache").inc(len(texts) - sum(1 for vector in vectors if vector is None))
+        self.cache.set_many([
+            (embedding_key(self.model, text), vector) for text, vector in by_text.items()
+        ])
+        return [
+            vector if vector is not None else by_text[text]
+            for text, vector in zip(texts, vectors)
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._lookup(texts)
+        computed = self.embeddings.embed_documents(missing) if missing else []
+        return self._merge(texts, vectors, missing, computed)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = await asyncio.to_thread(self._lookup, texts)
+        computed = await self.embeddings.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(self._merge, texts, vectors, missing, computed)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Retourne le cache d'embeddings partagé du processus"""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(
+            path=(
+                os.path.join(settings.data_dir, "embeddings.sqlite3")
+                if settings.embedding_cache_persistent
+                else None
+            ),
+            max_memory_bytes=settings.embedding_cache_memory_mb * 1024 * 1024,
+            max_entries=settings.embedding_cache_max_entries,
+        )
+    return _cache
@@ -0,0 +1,361 @@
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+import asyncio
+import json
+import logging
+import time
+
+from langchain_core.runnables import RunnableConfig, ensure_config
+
+from ai_product_pilot.core.metrics import EVENT_SUBSCRIBERS, EVENTS_DROPPED, EVENTS_PUBLISHED
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.lib.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+# Sujets des événements diffusés aux clients
+PROGRESS_TOPIC = "progress"
+STREAM_TOPIC = "stream"
+STORIES_TOPIC = "stories"
+TOPICS = (PROGRESS_TOPIC, STREAM_TOPIC, STORIES_TOPIC)
+
+# Canaux Postgres écoutés (NOTIFY) : stories (déclencheur notify_story_changes)
+# et avancement du pipeline (notify_pipeline_event)
+STORIES_CHANNEL = "stories"
+PIPELINE_CHANNEL = "pipeline"
+
+# Clé de la configuration LangGraph portant l'ID du job en cours
+JOB_ID_CONFIG_KEY = "job_id"
+
+# Taille maximale d'une notification Postgres (pg_notify refuse 8000 octets et plus)
+NOTIFY_MAX_BYTES = 7999
+# Longueur maximale du texte d'un événement "text" diffusé (4 octets UTF-8 au plus par caractère)
+STREAM_TEXT_MAX_CHARS = 1000
+
+
+class Subscription:
+    """File d'événements bornée d'un abonné, filtrée par sujet et par feedback"""
+
+    def __init__(self, topics: Iterable[str], feedback_id: Optional[str], max_size: int):
+        self.topics: FrozenSet[str] = frozenset(topics)
+        self.feedback_id = feedback_id
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        if event["topic"] not in self.topics:
+            return False
+        if self.feedback_id is None:
+            return True
+        if event["topic"] == STORIES_TOPIC:
+            # Un recalcul groupé des scores concerne potentiellement toutes les stories
+            if "story" not in event:
+                return True
+            return self.feedback_id in (event["story"].get("feedback_ids") or [])
+        return event.get("feedback_id") == self.feedback_id
+
+    def put(self, event: Dict[str, Any]) -> None:
+        # Un abonné trop lent perd ses événements les plus anciens plutôt que
+        # de ralentir la diffusion ou de faire grossir la mémoire
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self._queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self._queue.get()
+
+
+class EventBroker:
+    """
+    Diffusion en mémoire des événements du processus vers ses abonnés
+
+    Chaque abonné (connexion SSE ou WebSocket) dispose de sa propre file
+    bornée : la publication est synchrone, sans attente ni copie de
+    l'événement, quel que soit le nombre d'abonnés.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Set[Subscription] = set()
+
+    def subscribe(self, topics: Iterable[str] = TOPICS, feedback_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(topics, feedback_id, self.queue_size)
+        self._subscriptions.add(subscription)
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            EVENT_SUBSCRIBERS.dec()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        EVENTS_PUBLISHED.labels(event["topic"]).inc()
+        for subscription in self._subscriptions:
+            if subscription.accepts(event):
+                subscription.put(event)
+
+
+# Diffuseur partagé par l'application
+event_broker = EventBroker(queue_size=settings.events_queue_size)
+
+
+# Champs d'une story diffusés aux abonnés (ceux de la notification notify_story_changes)
+STORY_EVENT_FIELDS = ("id", "title", "themes", "feedback_ids", "rice_score", "status", "updated_at")
+# Champs d'une story en cours de génération diffusés sur le flux "stream" (sans
+# description ni critères d'acceptation, de longueur non bornée)
+STREAM_STORY_FIELDS = ("title", "as_a", "i_want", "so_that", "themes")
+
+
+def story_event(operation: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Événement de création ou de mise à jour d'une story"""
+    return {"topic": STORIES_TOPIC, "type": operation.lower(), "story": record}
+
+
+def rescore_event(count: int) -> Dict[str, Any]:
+    """Événement de recalcul des scores d'un lot de stories (sans le détail des stories)"""
+    return {"topic": STORIES_TOPIC, "type": "rescore", "count": count}
+
+
+def decode_notification(channel: str, payload: str) -> Optional[Dict[str, Any]]:
+    """
+    Convertit une notification Postgres en événement
+
+    Args:
+        channel: Canal de la notification
+        payload: Contenu JSON de la notification
+
+    Returns:
+        Événement à diffuser, ou None si la notification est invalide
+    """
+    try:
+        data = json.loads(payload)
+        if channel == STORIES_CHANNEL:
+            if data["type"] == "RESCORE":
+                return rescore_event(data["count"])
+            return story_event(data["type"], data["record"])
+        if channel == PIPELINE_CHANNEL and data.get("topic") in (PROGRESS_TOPIC, STREAM_TOPIC):
+            return data
+    except (ValueError, KeyError, TypeError):
+        pass
+    logger.warning("Ignoring invalid notification on channel %s", channel)
+    return None
+
+
+class PostgresEventListener:
+    """
+    Écoute unique (LISTEN) des canaux Postgres, relayée au diffuseur
+
+    Une seule connexion par processus reçoit les notifications des stories
+    et de l'avancement du pipeline, quel que soit le nombre d'abonnés. La
+    connexion est rouverte après une erreur.
+    """
+
+    def __init__(self, dsn: str, broker: EventBroker, reconnect_seconds: float):
+        self.dsn = dsn
+        self.broker = broker
+        self.reconnect_seconds = reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+        logger.info("Event listener started on channels %s, %s", STORIES_CHANNEL, PIPELINE_CHANNEL)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+                    for channel in (STORIES_CHANNEL, PIPELINE_CHANNEL):
+                        await conn.execute(f"LISTEN {channel}")
+                    async for notification in conn.notifies():
+                        event = decode_notification(notification.channel, notification.payload)
+                        if event is not None:
+                            self.broker.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener disconnected, retrying in %ss", self.reconnect_seconds)
+                await asyncio.sleep(self.reconnect_seconds)
+
+
+# Écoute partagée, active uniquement si une connexion directe à Postgres est configurée
+event_listener: Optional[PostgresEventListener] = (
+    PostgresEventListener(settings.events_database_url, event_broker, settings.events_reconnect_seconds)
+    if settings.events_database_url
+    else None
+)
+
+
+async def publish_event(event: Dict[str, Any]) -> None:
+    """
+    Publie un événement du pipeline (avancement, texte diffusé)
+
+    Avec l'écoute Postgres active, l'événement passe par NOTIFY pour atteindre
+    les abonnés de tous les processus ; sinon il est diffusé localement. Un
+    événement trop volumineux pour une notification (NOTIFY_MAX_BYTES) est
+    écarté. Une erreur de publication n'interrompt jamais le traitement.
+
+    Args:
+        event: Événement, avec son sujet et le feedback concerné
+    """
+    if event_listener is None:
+        event_broker.publish(event)
+        return
+    # Taille du texte produit par event::text côté Postgres (UTF-8, mêmes séparateurs)
+    size = len(json.dumps(event, default=str, ensure_ascii=False).encode("utf-8"))
+    if size > NOTIFY_MAX_BYTES:
+        logger.warning(
+            "Dropping %s event for feedback %s: %d bytes exceeds the notification limit",
+            event["topic"], event.get("feedback_id"), size,
+        )
+        return
+    try:
+        await asyncio.to_thread(
+            lambda: get_supabase_client().rpc("notify_pipeline_event", {"event": event}).execute()
+        )
+    except Exception:
+        logger.exception("Failed to publish %s event for feedback %s", event["topic"], event.get("feedback_id"))
+
+
+def publish_story_changes(operation: str, stories: Iterable[Dict[str, Any]]) -> None:
+    """
+    Diffuse la création ou la mise à jour de stories aux abonnés du processus
+
+    Avec l'écoute Postgres active, ces changements arrivent déjà par le
+    déclencheur notify_story_changes et ne sont pas publiés une seconde fois.
+
+    Args:
+        operation: INSERT ou UPDATE
+        stories: Stories écrites (seuls les champs STORY_EVENT_FIELDS sont diffusés)
+    """
+    if event_listener is not None:
+        return
+    for story in stories:
+        event_broker.publish(story_event(operation, {field: story.get(field) for field in STORY_EVENT_FIELDS}))
+
+
+def publish_stories_rescored(count: int) -> None:
+    """Diffuse le recalcul des scores d'un lot de stories aux abonnés du processus (sans écoute Postgres)"""
+    if event_listener is None:
+        event_broker.publish(rescore_event(count))
+
+
+async def publish_progress(
+    feedback_id: str,
+    status: str,
+    node: Optional[str] = None,
+    job_id: Optional[str] = None,
+    **details: Any,
+) -> None:
+    """
+    Publie un événement d'avancement du traitement d'un feedback
+
+    Args:
+        feedback_id: Feedback en cours de traitement
+        status: started, completed ou failed
+        node: Nœud du graphe concerné (None pour le traitement complet)
+        job_id: Job exécutant le traitement
+        details: Informations complémentaires (nombre de stories, erreur...)
+    """
+    await publish_event({
+        "topic": PROGRESS_TOPIC,
+        "feedback_id": feedback_id,
+        "job_id": job_id,
+        "node": node,
+        "status": status,
+        "at": time.time(),
+        **details,
+    })
+
+
+class StreamPublisher:
+    """
+    Publie la sortie d'un nœud au fil de sa génération par le LLM
+
+    Le texte est regroupé en paquets publiés au plus toutes les
+    flush_seconds, pour limiter le nombre d'événements (et de NOTIFY) à
+    quelques-uns par seconde quel que soit le débit de tokens.
+    """
+
+    def __init__(self, feedback_id: str, node: str, flush_seconds: Optional[float] = None):
+        self.feedback_id = feedback_id
+        self.node = node
+        self.flush_seconds = settings.events_stream_flush_seconds if flush_seconds is None else flush_seconds
+        # Job en cours, lu dans la configuration LangGraph propagée au nœud
+        self.job_id = ensure_config().get("configurable", {}).get(JOB_ID_CONFIG_KEY)
+        self._pending: List[str] = []
+        self._flushed_at = time.monotonic()
+
+    def _event(self, type: str, **data: Any) -> Dict[str, Any]:
+        return {
+            "topic": STREAM_TOPIC,
+            "feedback_id": self.feedback_id,
+            "job_id": self.job_id,
+            "node": self.node,
+            "type": type,
+            **data,
+        }
+
+    async def text(self, delta: str) -> None:
+        """Ajoute un fragment de texte, publié avec les suivants au prochain paquet"""
+        self._pending.append(delta)
+        if time.monotonic() - self._flushed_at >= self.flush_seconds:
+            await self.flush()
+
+    async def story(self, index: int, story: Dict[str, Any]) -> None:
+        """Publie une story générée, réduite aux champs STREAM_STORY_FIELDS"""
+        await self.item("story", index=index, story={field: story.get(field) for field in STREAM_STORY_FIELDS})
+
+    async def item(self, type: str, **data: Any) -> None:
+        """Publie immédiatement un élément complet (par exemple une story), après le texte en attente"""
+        await self.flush()
+        await publish_event(self._event(type, **data))
+
+    async def flush(self) -> None:
+        """Publie le texte en attente"""
+        self._flushed_at = time.monotonic()
+        if self._pending:
+            text, self._pending = "".join(self._pending), []
+            # Découpé pour que chaque événement tienne dans une notification
+            for start in range(0, len(text), STREAM_TEXT_MAX_CHARS):
+                await publish_event(self._event("text", text=text[start:start + STREAM_TEXT_MAX_CHARS]))
+
+
+def track_progress(name: str, node: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[..., Awaitable[Dict[str, Any]]]:
+    """
+    Enveloppe un nœud LangGraph pour publier son début et sa fin
+
+    Args:
+        name: Nom du nœud dans le graphe
+        node: Fonction asynchrone (state, config) exécutant le nœud
+
+    Returns:
+        Fonction asynchrone équivalente, publiant son avancement
+    """
+    async def tracked(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        feedback_id = state["feedback_id"]
+        job_id = (config or {}).get("configurable", {}).get(JOB_ID_CONFIG_KEY)
+        await publish_progress(feedback_id, "started", node=name, job_id=job_id)
+        try:
+            result = await node(state, config)
+        except Exception as e:
+            await publish_progress(feedback_id, "failed", node=name, job_id=job_id, error=str(e))
+            raise
+        await publish_progress(feedback_id, "completed", node=name, job_id=job_id)
+        return result
+
+    tracked.__name__ = node.__name__
+    return tracked
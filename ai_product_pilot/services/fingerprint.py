@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Sequence, Union
+import hashlib
+import re
+
+import numpy as np
+
+# Signatures MinHash : NUM_PERM permutations découpées en LSH_BANDS bandes de
+# LSH_ROWS valeurs. Deux segments de similarité de Jaccard s partagent au
+# moins une bande avec une probabilité 1 - (1 - s^LSH_ROWS)^LSH_BANDS
+# (> 0,999 pour s = 0,8 ; < 0,06 pour s = 0,3).
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Permutations fixes : les signatures restent comparables entre processus et versions
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def content_hash(content: Union[bytes, str]) -> str:
+    """Empreinte exacte (sha256) d'un fichier ou d'un contenu textuel"""
+    if isinstance(content, str):
+        content = content.strip().encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def _normalize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.casefold())
+
+
+def chunk_hash(text: str) -> str:
+    """Empreinte exacte d'un segment, insensible à la casse, à la ponctuation et aux espaces"""
+    return hashlib.sha256(" ".join(_normalize(text)).encode("utf-8")).hexdigest()
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    Signature MinHash d'un texte, calculée sur ses n-grammes de mots
+
+    Args:
+        text: Texte du segment
+
+    Returns:
+        Tableau de NUM_PERM valeurs (uint64) ; la proportion de valeurs égales
+        entre deux signatures estime la similarité de Jaccard des textes
+    """
+    words = _normalize(text)
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS])
+        for i in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Permutations universelles (a * x + b) mod p, sur 32 bits
+    permuted = ((hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def lsh_bands(signature: np.ndarray) -> List[str]:
+    """Clés des bandes LSH d'une signature (index de la bande et condensé de ses valeurs)"""
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(signature: np.ndarray, other: Sequence[int]) -> float:
+    """Similarité de Jaccard estimée entre deux signatures MinHash"""
+    return float(np.mean(signature == np.asarray(other, dtype=np.uint64)))
+
+
+def chunk_fingerprints(chunks: List[str]) -> List[Dict[str, Any]]:
+    """Empreinte exacte, signature MinHash et bandes LSH de chaque segment"""
+    fingerprints = []
+    for chunk in chunks:
+        signature = minhash_signature(chunk)
+        fingerprints.append({
+            "chunk_hash": chunk_hash(chunk),
+            "signature": signature.tolist(),
+            "bands": lsh_bands(signature),
+        })
+    return fingerprints
+
+
+def find_duplicate_chunks(
+    supabase,
+    feedback_id: str,
+    fingerprints: List[Dict[str, Any]],
+    threshold: float,
+) -> List[bool]:
+    """
+    Détermine quels segments ont déjà été traités dans un autre feedback
+
+    Un segment est un doublon si son empreinte exacte est connue, ou si un
+    segment partageant une de ses bandes LSH a une similarité de Jaccard
+    estimée d'au moins threshold. Les candidats de tout le lot sont lus en
+    une seule requête (index chunk_fingerprints).
+
+    Args:
+        supabase: Client Supabase
+        feedback_id: Feedback en cours d'ingestion (ses propres segments sont ignorés)
+        fingerprints: Empreintes des segments du lot (chunk_fingerprints)
+        threshold: Similarité minimale d'un quasi-doublon
+
+    Returns:
+        Pour chaque segment, True s'il est un doublon
+    """
+    if not fingerprints:
+        return []
+    candidates = supabase.rpc("match_chunk_fingerprints", {
+        "chunk_hashes": [fingerprint["chunk_hash"] for fingerprint in fingerprints],
+        "bands": sorted({band for fingerprint in fingerprints for band in fingerprint["bands"]}),
+        "exclude_feedback_id": feedback_id,
+    }).execute().data
+
+    known_hashes = {candidate["chunk_hash"] for candidate in candidates}
+    by_band: Dict[str, List[Dict[str, Any]]] = {}
+    for candidate in candidates:
+        for band in candidate["bands"]:
+            by_band.setdefault(band, []).append(candidate)
+
+    duplicates = []
+    for fingerprint in fingerprints:
+        signature = np.asarray(fingerprint["signature"], dtype=np.uint64)
+        duplicates.append(
+            fingerprint["chunk_hash"] in known_hashes
+            or any(
+                estimate_similarity(signature, candidate["signature"]) >= threshold
+                for band in fingerprint["bands"]
+                for candidate in by_band.get(band, [])
+            )
+        )
+    return duplicates
+
+
+def record_chunk_fingerprints(supabase, feedback_id: str, fingerprints: List[Dict[str, Any]]) -> None:
+    """Enregistre les empreintes des segments traités d'un feedback, en une requête"""
+    if not fingerprints:
+        return
+    supabase.table("chunk_fingerprints").insert([
+        {"feedback_id": feedback_id, **fingerprint} for fingerprint in fingerprints
+    ]).execute()
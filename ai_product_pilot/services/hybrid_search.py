@@ -0,0 +1,44 @@
+from typing import Dict, Hashable, List, Sequence
+import re
+
+# Constante de lissage de la fusion par rang réciproque (valeur usuelle)
+RRF_K = 60
+
+# Référence de ticket (#4528, PROJ-123) ou expression entre guillemets ; un
+# simple mot (« export ») passe par la fusion des deux recherches
+_KEYWORD_PATTERNS = (
+    re.compile(r"#\d+"),
+    re.compile(r"\b[A-Z][A-Z0-9]+-\d+\b"),
+    re.compile(r'^\s*"[^"]+"\s*$'),
+)
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    Indique si une requête désigne un élément précis (numéro de ticket,
+    expression exacte entre guillemets), pour lequel la recherche plein
+    texte suffit, plutôt qu'un sujet ou une question en langage naturel
+    """
+    return any(pattern.search(query) for pattern in _KEYWORD_PATTERNS)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Dict]], k: int = RRF_K) -> List[Dict]:
+    """
+    Fusionne plusieurs classements de résultats par rang réciproque (RRF)
+
+    Args:
+        rankings: Listes de résultats triées par pertinence, identifiés par "id"
+        k: Constante de lissage (les premiers rangs pèsent moins lourd quand k augmente)
+
+    Returns:
+        Résultats dédoublonnés, triés par score fusionné (placé dans "similarity")
+    """
+    scores: Dict[Hashable, float] = {}
+    results: Dict[Hashable, Dict] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            key = result.get("id") or result.get("content")
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            results.setdefault(key, result)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [{**results[key], "similarity": round(scores[key], 6)} for key in ordered]
@@ -0,0 +1,238 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+import codecs
+import csv
+import json
+
+
+class IngestionError(ValueError):
+    """Erreur de lecture d'un fichier de feedback"""
+
+
+def iter_text(byte_chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Décode un flux d'octets de façon incrémentale (caractères multi-octets inclus)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(texts: Iterable[str], max_line_chars: Optional[int] = None) -> Iterator[str]:
+    """Découpe un flux de texte en lignes (fin de ligne conservée), d'au plus max_line_chars caractères"""
+    pending: List[str] = []
+    pending_chars = 0
+    for text in texts:
+        lines = text.split("\n")
+        if len(lines) > 1:
+            pending.append(lines[0])
+            lines[0] = "".join(pending)
+            for line in lines[:-1]:
+                if max_line_chars is not None and len(line) > max_line_chars:
+                    raise IngestionError("Erreur de lecture: ligne trop volumineuse")
+                yield line + "\n"
+            pending, pending_chars = [], 0
+        # Fin de ligne non encore reçue : conservée par fragments, sans recopie
+        pending.append(lines[-1])
+        pending_chars += len(lines[-1])
+        if max_line_chars is not None and pending_chars > max_line_chars:
+            raise IngestionError("Erreur de lecture: ligne trop volumineuse")
+    if pending_chars:
+        yield "".join(pending)
+
+
+def iter_csv_records(byte_chunks: Iterable[bytes], max_record_chars: int) -> Iterator[str]:
+    """Lit un CSV ligne à ligne et formate chaque enregistrement `colonne: valeur`"""
+    reader = csv.DictReader(iter_lines(iter_text(byte_chunks), max_record_chars))
+    try:
+        for row in reader:
+            record = ", ".join([f"{k}: {v}" for k, v in row.items()])
+            if len(record) > max_record_chars:
+                raise IngestionError("Erreur de parsing CSV: enregistrement trop volumineux")
+            yield record
+    except csv.Error as e:
+        raise IngestionError(f"Erreur de parsing CSV: {str(e)}") from e
+
+
+def _iter_json_array(texts: Iterator[str], max_record_chars: int) -> Iterator[Any]:
+    """Parse un tableau JSON élément par élément sans charger tout le document"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    exhausted = False
+    # Taille à atteindre avant de retenter le décodage d'un élément incomplet :
+    # doublée à chaque échec, pour que le coût total reste linéaire
+    retry_chars = 0
+
+    while True:
+        # Avancer jusqu'au prochain élément
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != "[":
+                    raise IngestionError("Erreur de parsing JSON: tableau attendu")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            # Un élément qui touche la fin du tampon peut être incomplet (nombre)
+            if end is not None and (end < len(buffer) or exhausted):
+                yield item
+                position = end
+                retry_chars = 0
+                continue
+            if exhausted:
+                raise IngestionError("Erreur de parsing JSON: document incomplet ou invalide")
+            retry_chars = 2 * (len(buffer) - position)
+        elif exhausted:
+            if started:
+                raise IngestionError("Erreur de parsing JSON: tableau non terminé")
+            return
+
+        # Besoin de plus de données : lire au moins un bloc, et jusqu'à
+        # retry_chars caractères non consommés, avant de compacter le tampon
+        parts = [buffer[position:]]
+        size = len(parts[0])
+        while len(parts) == 1 or size < retry_chars:
+            if size > max_record_chars:
+                raise IngestionError("Erreur de parsing JSON: élément trop volumineux")
+            try:
+                text = next(texts)
+            except StopIteration:
+                exhausted = True
+                break
+            parts.append(text)
+            size += len(text)
+        buffer = "".join(parts)
+        position = 0
+
+
+def iter_json_records(byte_chunks: Iterable[bytes], max_record_chars: int) -> Iterator[str]:
+    """
+    Lit un fichier JSON en flux et produit un enregistrement texte par élément.
+
+    Formats supportés :
+    - tableau JSON (`[{...}, {...}]`), parsé élément par élément
+    - NDJSON (un document JSON par ligne)
+    - document JSON unique, chargé entièrement (borné par max_record_chars)
+    """
+    texts = iter_text(byte_chunks)
+
+    # Lire jusqu'au premier caractère significatif pour détecter le format
+    head = ""
+    for text in texts:
+        head += text
+        if head.strip():
+            break
+    stripped = head.lstrip()
+    if not stripped:
+        return
+
+    def replay() -> Iterator[str]:
+        yield head
+        yield from texts
+
+    if stripped[0] == "[":
+        for item in _iter_json_array(replay(), max_record_chars):
+            yield json.dumps(item, ensure_ascii=False)
+        return
+
+    lines = iter_lines(replay(), max_record_chars)
+    first_line = ""
+    for line in lines:
+        if line.strip():
+            first_line = line
+            break
+    try:
+        first = json.loads(first_line)
+    except json.JSONDecodeError:
+        first = None
+
+    if first is not None:
+        # NDJSON : un document par ligne
+        yield json.dumps(first, ensure_ascii=False)
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.dumps(json.loads(line), ensure_ascii=False)
+            except json.JSONDecodeError as e:
+                raise IngestionError(f"Erreur de parsing JSON: {str(e)}") from e
+        return
+
+    # Document unique réparti sur plusieurs lignes
+    document = first_line
+    for line in lines:
+        document += line
+        if len(document) > max_record_chars:
+            raise IngestionError("Erreur de parsing JSON: document trop volumineux")
+    try:
+        yield json.dumps(json.loads(document), ensure_ascii=False, indent=2)
+    except json.JSONDecodeError as e:
+        raise IngestionError(f"Erreur de parsing JSON: {str(e)}") from e
+
+
+def iter_records(file_extension: str, byte_chunks: Iterable[bytes], max_record_chars: int) -> Iterator[str]:
+    """
+    Produit les enregistrements textuels d'un fichier selon son extension
+
+    Chaque lecteur borne la taille d'un enregistrement (ligne CSV ou NDJSON,
+    élément JSON) à max_record_chars caractères ; un fichier texte est
+    produit par blocs de lecture.
+    """
+    if file_extension == "json":
+        yield from iter_json_records(byte_chunks, max_record_chars)
+    elif file_extension == "csv":
+        yield from iter_csv_records(byte_chunks, max_record_chars)
+    else:
+        # Fichier texte par défaut
+        yield from iter_text(byte_chunks)
+
+
+def iter_chunks(
+    records: Iterable[str],
+    split_text: Callable[[str], List[str]],
+    separator: str,
+    buffer_chars: int,
+) -> Iterator[str]:
+    """
+    Découpe un flux d'enregistrements en segments avec un tampon borné.
+
+    Les enregistrements sont accumulés jusqu'à buffer_chars caractères puis
+    découpés ; le dernier segment (potentiellement coupé) est réinjecté dans
+    le tampon suivant afin de préserver les frontières naturelles du texte.
+    """
+    buffer = ""
+    for record in records:
+        buffer = f"{buffer}{separator}{record}" if buffer else record
+        if len(buffer) >= buffer_chars:
+            chunks = split_text(buffer)
+            buffer = chunks.pop() if chunks else ""
+            yield from chunks
+    if buffer.strip():
+        yield from split_text(buffer)
+
+
+def iter_batches(chunks: Iterable[str], max_batch_bytes: int) -> Iterator[List[str]]:
+    """Regroupe des segments en lots dont la taille totale est bornée"""
+    batch: List[str] = []
+    batch_bytes = 0
+    for chunk in chunks:
+        size = len(chunk.encode("utf-8"))
+        if batch and batch_bytes + size > max_batch_bytes:
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(chunk)
+        batch_bytes += size
+    if batch:
+        yield batch
@@ -0,0 +1,416 @@
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+from ai_product_pilot.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuts possibles d'un job
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobStore:
+    """
+    Stockage durable des jobs dans une base SQLite locale.
+
+    La base est partagée par tous les processus de l'application : la
+    réservation d'un job se fait dans une transaction IMMEDIATE et est
+    protégée par un bail (lease) renouvelé tant que le job s'exécute. Un job
+    dont le bail expire (processus arrêté brutalement) est repris par un
+    autre worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    stages TEXT NOT NULL DEFAULT '[]',
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_created "
+                "ON jobs (status, created_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["stages"] = json.loads(job["stages"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), JOB_QUEUED, time.time()),
+            )
+        return self.get(job_id)
+
+    @staticmethod
+    def _active_for_feedbacks(conn: sqlite3.Connection, feedback_ids: List[str]) -> bool:
+        # Jobs en attente ou en cours portant sur l'un des feedbacks, seul
+        # (feedback_id) ou dans un lot (feedback_ids)
+        row = conn.execute(
+            "SELECT 1 FROM jobs, json_each(?) AS wanted WHERE jobs.status IN (?, ?) AND ("
+            "json_extract(jobs.payload, '$.feedback_id') = wanted.value "
+            "OR EXISTS (SELECT 1 FROM json_each(jobs.payload, '$.feedback_ids') WHERE value = wanted.value)"
+            ") LIMIT 1",
+            (json.dumps(feedback_ids), JOB_QUEUED, JOB_RUNNING),
+        ).fetchone()
+        return row is not None
+
+    def has_active_job(self, feedback_id: str) -> bool:
+        """Indique si un job en attente ou en cours traite ce feedback"""
+        return self.has_active_jobs([feedback_id])
+
+    def has_active_jobs(self, feedback_ids: List[str]) -> bool:
+        """Indique si un job en attente ou en cours traite l'un de ces feedbacks"""
+        with self._connect() as conn:
+            return self._active_for_feedbacks(conn, feedback_ids)
+
+    def create_exclusive(self, kind: str, payload: Dict[str, Any], feedback_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Crée un job sauf si un autre job en attente ou en cours traite déjà l'un des feedbacks
+
+        La vérification et l'insertion sont faites dans la même transaction
+        IMMEDIATE : deux appels concurrents ne peuvent pas créer deux jobs.
+
+        Returns:
+            Le job créé, ou None si l'un des feedbacks est déjà en cours de traitement
+        """
+        job_id = str(uuid.uuid4())
+        with self._transaction() as conn:
+            if self._active_for_feedbacks(conn, feedback_ids):
+                return None
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), JOB_QUEUED, time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """
+        Réserve le plus ancien job en attente (ou dont le bail a expiré)
+
+        Returns:
+            Le job réservé, ou None si la file est vide
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Les jobs abandonnés trop souvent sont marqués en échec
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+                (JOB_FAILED, "Nombre maximum de tentatives atteint", now,
+                 JOB_RUNNING, now, max_attempts),
+            )
+
+            row = conn.execute(
+                "SELECT id FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, JOB_RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, started_at = COALESCE(started_at, ?) "
+                "WHERE id = ?",
+                (JOB_RUNNING, worker_id, now + lease_seconds, now, row["id"]),
+            )
+
+        return self.get(row["id"])
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker_id = ?",
+                (time.time() + lease_seconds, job_id, worker_id),
+            )
+
+    def record_stage(self, job_id: str, name: str, started_at: float, finished_at: float) -> None:
+        """Ajoute une étape terminée (avec ses timings) à l'historique du job"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            stages = json.loads(row["stages"]) if row else []
+            stages.append({
+                "name": name,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "duration_ms": round((finished_at - started_at) * 1000, 2),
+            })
+            conn.execute(
+                "UPDATE jobs SET stage = ?, stages = ? WHERE id = ?",
+                (name, json.dumps(stages), job_id),
+            )
+
+    def set_stage(self, job_id: str, name: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET stage = ? WHERE id = ?", (name, job_id))
+
+    def complete(self, job_id: str, result: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ?, "
+                "lease_expires_at = NULL WHERE id = ?",
+                (JOB_SUCCEEDED, json.dumps(result, default=str), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, "
+                "lease_expires_at = NULL WHERE id = ?",
+                (JOB_FAILED, error, time.time(), job_id),
+            )
+
+    def release(self, job_id: str) -> None:
+        """Remet un job en file (arrêt propre d'un worker en cours d'exécution)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE id = ? AND status = ?",
+                (JOB_QUEUED, job_id, JOB_RUNNING),
+            )
+
+
+class JobContext:
+    """Contexte passé aux handlers pour publier l'avancement d'un job"""
+
+    def __init__(self, store: JobStore, job: Dict[str, Any]):
+        self.store = store
+        self.job = job
+        self._stage_started_at = time.time()
+
+    @property
+    def job_id(self) -> str:
+        return self.job["id"]
+
+    async def start_stage(self, name: str) -> None:
+        """Indique l'étape en cours d'exécution"""
+        self._stage_started_at = time.time()
+        await asyncio.to_thread(self.store.set_stage, self.job_id, name)
+
+    async def complete_stage(self, name: str) -> None:
+        """Enregistre la fin d'une étape ; la suivante démarre immédiatement"""
+        finished_at = time.time()
+        await asyncio.to_thread(
+            self.store.record_stage, self.job_id, name, self._stage_started_at, finished_at
+        )
+        self._stage_started_at = finished_at
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+# Handlers enregistrés par type de job
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Décorateur enregistrant le handler d'un type de job"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+class JobQueue:
+    """File de jobs durable drainée par un pool de workers asyncio"""
+
+    def __init__(
+        self,
+        path: str,
+        concurrency: int,
+        poll_interval: float,
+        lease_seconds: float,
+        max_attempts: int,
+    ):
+        self.path = path
+        self._store: Optional[JobStore] = None
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, str] = {}
+
+    @property
+    def store(self) -> JobStore:
+        # Création paresseuse pour éviter d'écrire sur disque à l'import
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ajoute un job à la file et réveille les workers
+
+        Returns:
+            Le job créé (statut "queued")
+        """
+        if kind not in _handlers:
+            raise ValueError(f"Type de job inconnu: {kind}")
+        job = await asyncio.to_thread(self.store.create, kind, payload)
+        self._wakeup.set()
+        return job
+
+    async def enqueue_exclusive(self, kind: str, payload: Dict[str, Any], feedback_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Ajoute un job à la file sauf si l'un des feedbacks est déjà en cours de traitement
+
+        Deux exécutions simultanées sur le même fil de checkpoints
+        dupliqueraient les stories d'un feedback.
+
+        Returns:
+            Le job créé, ou None si un job en attente ou en cours traite l'un des feedbacks
+        """
+        if kind not in _handlers:
+            raise ValueError(f"Type de job inconnu: {kind}")
+        job = await asyncio.to_thread(self.store.create_exclusive, kind, payload, feedback_ids)
+        if job is not None:
+            self._wakeup.set()
+        return job
+
+    async def has_active_job(self, feedback_id: str) -> bool:
+        return await asyncio.to_thread(self.store.has_active_job, feedback_id)
+
+    async def has_active_jobs(self, feedback_ids: List[str]) -> bool:
+        return await asyncio.to_thread(self.store.has_active_jobs, feedback_ids)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def start(self) -> None:
+        process_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        for index in range(self.concurrency):
+            worker_id = f"{process_id}-{index}"
+            self._workers.append(asyncio.create_task(self._worker(worker_id)))
+        logger.info("Job queue started with %d workers", self.concurrency)
+
+    async def stop(self) -> None:
+        interrupted = list(self._running)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Les jobs interrompus sont remis en file pour le prochain démarrage
+        for job_id in interrupted:
+            await asyncio.to_thread(self.store.release, job_id)
+
+    async def _worker(self, worker_id: str) -> None:
+        while True:
+            # Remis à zéro avant la réservation : un job ajouté entre une
+            # réservation vide et l'attente réveille tout de même le worker
+            self._wakeup.clear()
+            job = await asyncio.to_thread(
+                self.store.claim, worker_id, self.lease_seconds, self.max_attempts
+            )
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(worker_id, job)
+
+    async def _run(self, worker_id: str, job: Dict[str, Any]) -> None:
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            await asyncio.to_thread(self.store.fail, job["id"], f"Type de job inconnu: {job['kind']}")
+            return
+
+        self._running[job["id"]] = worker_id
+        heartbeat = asyncio.create_task(self._heartbeat(worker_id, job["id"]))
+        try:
+            result = await handler(job, JobContext(self.store, job))
+            await asyncio.to_thread(self.store.complete, job["id"], result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            await asyncio.to_thread(self.store.fail, job["id"], str(e))
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job["id"], None)
+
+    async def _heartbeat(self, worker_id: str, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self.store.renew, job_id, worker_id, self.lease_seconds)
+
+
+# File partagée par l'application
+job_queue = JobQueue(
+    path=os.path.join(settings.data_dir, "jobs.sqlite3"),
+    concurrency=settings.job_workers,
+    poll_interval=settings.job_poll_interval,
+    lease_seconds=settings.job_lease_seconds,
+    max_attempts=settings.job_max_attempts,
+)
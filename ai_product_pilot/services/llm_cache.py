@@ -0,0 +1,294 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ai_product_pilot.core.metrics import LLM_CACHE_LOOKUPS
+from ai_product_pilot.core.settings import settings
+
+# Clé de RunnableConfig["configurable"] permettant d'ignorer le cache pour une exécution
+LLM_CACHE_BYPASS = "llm_cache_bypass"
+
+# Cache partagé par toutes les chaînes du processus
+_cache: Optional["LLMCache"] = None
+
+
+def llm_cache_key(model: str, temperature: float, prompt_version: str, prompt: PromptValue) -> str:
+    """Clé de cache d'une réponse : (modèle, température, version du prompt, sha256 du prompt rendu)"""
+    rendered = json.dumps(
+        [[message.type, message.content] for message in prompt.to_messages()],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(rendered.encode("utf-8")).hexdigest()
+    return f"{model}:{temperature}:{prompt_version}:{digest}"
+
+
+class LLMCache:
+    """
+    Cache des réponses LLM à deux niveaux :
+    - un LRU en mémoire, borné en nombre d'entrées
+    - un stockage SQLite local, partagé par les workers d'une même machine
+
+    Les entrées expirent après ttl_seconds ; au-delà de max_bytes, les
+    entrées les moins récemment lues sont évincées du stockage persistant.
+    """
+
+    def __init__(self, path: Optional[str], ttl_seconds: float, max_bytes: int, memory_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed "
+                    "ON llm_responses (accessed_at)"
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, response: str, created_at: float) -> None:
+        """Ajoute une réponse au LRU en évinçant les plus anciennes si nécessaire"""
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (response, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Recherche une réponse dans le cache
+
+        Args:
+            key: Clé calculée par llm_cache_key
+
+        Returns:
+            Contenu de la réponse, ou None si absente ou expirée
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    LLM_CACHE_LOOKUPS.labels("memory_hit").inc()
+                    return entry[0]
+                del self._memory[key]
+
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.disk_hits += 1
+                LLM_CACHE_LOOKUPS.labels("disk_hit").inc()
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        LLM_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Enregistre une réponse dans les deux niveaux de cache"""
+        now = time.time()
+        self._remember(key, response, now)
+        if not self.path:
+            return
+
+        size = len(response.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, model, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+            # Éviction des entrées les moins récemment lues au-delà de la taille maximale
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = conn.execute(
+                    "SELECT key, size FROM llm_responses ORDER BY accessed_at"
+                ).fetchall()
+                evicted = []
+                for evicted_key, evicted_size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((evicted_key,))
+                    total -= evicted_size
+                conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+                with self._lock:
+                    for (evicted_key,) in evicted:
+                        self._memory.pop(evicted_key, None)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+        LLM_CACHE_LOOKUPS.labels("bypass").inc()
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de hits/miss et taux de succès du cache"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+class CachedChatModel(Runnable[PromptValue, BaseMessage]):
+    """
+    Enveloppe un modèle de chat avec un LLMCache : une réponse déjà obtenue
+    pour le même prompt rendu (et la même version du fichier de prompt) est
+    relue sans appel à l'API.
+
+    Le cache est ignoré (mais rafraîchi) lorsque la configuration d'exécution
+    contient configurable[LLM_CACHE_BYPASS] = True.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        cache: LLMCache,
+        model: str,
+        temperature: float,
+        prompt_version: str,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.prompt_version = prompt_version
+
+    def _key(self, input: PromptValue) -> str:
+        return llm_cache_key(self.model, self.temperature, self.prompt_version, input)
+
+    def _bypass(self, config: Optional[RunnableConfig]) -> bool:
+        bypass = bool(((config or {}).get("configurable") or {}).get(LLM_CACHE_BYPASS))
+        if bypass:
+            self.cache.record_bypass()
+        return bypass
+
+    def invoke(
+        self, input: PromptValue, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> BaseMessage:
+        key = self._key(input)
+        if not self._bypass(config):
+            cached = self.cache.get(key)
+            if cached is not None:
+                return AIMessage(content=cached)
+
+        message = self.llm.invoke(input, config=config, **kwargs)
+        if isinstance(message.content, str):
+            self.cache.set(key, self.model, message.content)
+        return message
+
+    async def ainvoke(
+        self, input: PromptValue, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> BaseMessage:
+        key = self._key(input)
+        if not self._bypass(config):
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return AIMessage(content=cached)
+
+        message = await self.llm.ainvoke(input, config=config, **kwargs)
+        if isinstance(message.content, str):
+            await asyncio.to_thread(self.cache.set, key, self.model, message.content)
+        return message
+
+    async def astream(
+        self, input: PromptValue, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> AsyncIterator[BaseMessage]:
+        """
+        Diffuse la réponse du modèle au fil des tokens
+
+        Une réponse en cache est émise d'un bloc ; sinon la réponse complète
+        est mise en cache à la fin du flux, comme avec ainvoke.
+        """
+        key = self._key(input)
+        if not self._bypass(config):
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                yield AIMessageChunk(content=cached)
+                return
+
+        content = []
+        async for chunk in self.llm.astream(input, config=config, **kwargs):
+            if isinstance(chunk.content, str):
+                content.append(chunk.content)
+            yield chunk
+        await asyncio.to_thread(self.cache.set, key, self.model, "".join(content))
+
+
+def get_llm_cache() -> LLMCache:
+    """Retourne le cache de réponses LLM partagé du processus"""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(
+            path=(
+                os.path.join(settings.data_dir, "llm_cache.sqlite3")
+                if settings.llm_cache_persistent
+                else None
+            ),
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_bytes=settings.llm_cache_max_mb * 1024 * 1024,
+            memory_entries=settings.llm_cache_memory_entries,
+        )
+    return _cache
@@ -0,0 +1,169 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.services.events import publish_stories_rescored
+from ai_product_pilot.services.jobs import JobContext, job_handler
+from ai_product_pilot.services.scoring import calculate_rice_scores, estimate_story_rice_parameters
+
+# Type de job pour le recalcul des scores RICE du backlog
+RESCORE_STORIES_JOB = "rescore_stories"
+
+# Colonnes recalculées et réécrites par le job
+SCORE_COLUMNS = ("reach", "impact", "confidence", "effort", "rice_score")
+
+ProgressCallback = Callable[[int, int, int], Awaitable[None]]
+
+
+def _parse_entities(entities: Any) -> Optional[Dict[str, Any]]:
+    """Insights du feedback source (None si le feedback n'a pas été analysé)"""
+    if isinstance(entities, str):
+        entities = json.loads(entities)
+    if not entities or not entities.get("themes"):
+        return None
+    return entities
+
+
+def rescore_batch(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Recalcule les paramètres et scores RICE d'un lot de stories
+
+    Les paramètres sont estimés story par story à partir des insights du
+    feedback source, puis les scores du lot sont calculés en une opération
+    vectorisée. Les stories sans feedback analysé (stories manuelles) sont
+    ignorées.
+
+    Args:
+        rows: Stories du lot avec les insights de leur feedback (stories_for_rescoring)
+
+    Returns:
+        Mises à jour des seules stories dont un paramètre ou le score change
+    """
+    candidates = []
+    parameters = []
+    for row in rows:
+        entities = _parse_entities(row.get("entities"))
+        if entities is None:
+            continue
+        candidates.append(row)
+        parameters.append(estimate_story_rice_parameters(row, entities))
+
+    if not candidates:
+        return []
+
+    reach, impact, confidence, effort = np.asarray(parameters, dtype=np.float64).T
+    new_values = np.column_stack([
+        reach, impact, confidence, effort,
+        calculate_rice_scores(reach, impact, confidence, effort),
+    ])
+    old_values = np.array(
+        [[row[column] for column in SCORE_COLUMNS] for row in candidates], dtype=np.float64
+    )
+    changed = ~np.isclose(new_values, old_values, rtol=0, atol=1e-9).all(axis=1)
+
+    return [
+        {"id": row["id"], **dict(zip(SCORE_COLUMNS, values))}
+        for row, values in zip(
+            (row for row, keep in zip(candidates, changed) if keep),
+            new_values[changed].tolist(),
+        )
+    ]
+
+
+async def rescore_stories(
+    supabase,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Recalcule le score RICE de toutes les stories avec le code de scoring actuel
+
+    Les stories sont parcourues par lots dans l'ordre de leurs ids
+    (pagination par curseur, une requête par lot) et les scores modifiés
+    sont réécrits en une requête par lot (bulk_update_story_scores).
+
+    Args:
+        supabase: Client Supabase
+        batch_size: Nombre de stories par lot
+        dry_run: Calculer sans écrire les nouveaux scores
+        on_progress: Callback appelée après chaque lot avec (traitées, total, modifiées)
+
+    Returns:
+        Nombre de stories traitées, modifiées et ignorées, durée et débit
+    """
+    batch_size = batch_size or settings.rescore_batch_size
+
+    count_result = await asyncio.to_thread(
+        lambda: supabase.table("stories").select("id", count="exact").limit(1).execute()
+    )
+    total = count_result.count or 0
+
+    started_at = time.perf_counter()
+    processed = updated = skipped = 0
+    after_id: Optional[str] = None
+    while True:
+        rows = (await asyncio.to_thread(
+            lambda: supabase.rpc(
+                "stories_for_rescoring", {"after_id": after_id, "batch_size": batch_size}
+            ).execute()
+        )).data
+        if not rows:
+            break
+
+        updates = rescore_batch(rows)
+        if updates and not dry_run:
+            await asyncio.to_thread(
+                lambda: supabase.rpc("bulk_update_story_scores", {"updates": updates}).execute()
+            )
+            publish_stories_rescored(len(updates))
+
+        processed += len(rows)
+        updated += len(updates)
+        skipped += sum(1 for row in rows if _parse_entities(row.get("entities")) is None)
+        after_id = rows[-1]["id"]
+        if on_progress is not None:
+            await on_progress(processed, total, updated)
+        if len(rows) < batch_size:
+            break
+
+    duration = time.perf_counter() - started_at
+    return {
+        "processed": processed,
+        "updated": updated,
+        "skipped": skipped,
+        "dry_run": dry_run,
+        "duration_seconds": round(duration, 3),
+        "throughput_per_second": round(processed / duration, 1) if duration > 0 else 0.0,
+    }
+
+
+@job_handler(RESCORE_STORIES_JOB)
+async def run_rescore_job(job: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Exécute le recalcul des scores RICE et publie l'avancement ("traitées/total")
+
+    Args:
+        job: Job contenant batch_size et dry_run dans son payload
+        context: Contexte permettant de publier l'avancement
+
+    Returns:
+        Résumé du recalcul
+    """
+    payload = job["payload"]
+
+    async def on_progress(processed: int, total: int, updated: int) -> None:
+        await context.start_stage(f"{processed}/{total}")
+
+    await context.start_stage("0/?")
+    return await rescore_stories(
+        get_supabase_client(),
+        batch_size=payload.get("batch_size"),
+        dry_run=payload.get("dry_run", False),
+        on_progress=on_progress,
+    )
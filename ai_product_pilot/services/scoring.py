@@ -1,4 +1,72 @@
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Bornes de normalisation des paramètres RICE
+REACH_RANGE = (0.0, 10.0)
+IMPACT_RANGE = (0.0, 10.0)
+CONFIDENCE_RANGE = (0.0, 10.0)
+EFFORT_RANGE = (0.1, 10.0)  # Éviter la division par zéro
+
+
+def calculate_rice_scores(
+    reach: ArrayLike,
+    impact: ArrayLike,
+    confidence: ArrayLike,
+    effort: ArrayLike
+) -> np.ndarray:
+    """
+    Calcule les scores RICE d'un lot de stories à partir de colonnes de paramètres
+    
+    Args:
+        reach: Portées (0-10)
+        impact: Impacts (0-10)
+        confidence: Niveaux de confiance (0-10)
+        effort: Efforts de développement (0.1-10)
+        
+    Returns:
+        Tableau des scores RICE arrondis à 2 décimales
+    """
+    # Normalisation des valeurs, colonne par colonne
+    normalized_reach = np.clip(np.asarray(reach, dtype=np.float64), *REACH_RANGE)
+    normalized_impact = np.clip(np.asarray(impact, dtype=np.float64), *IMPACT_RANGE)
+    normalized_confidence = np.clip(np.asarray(confidence, dtype=np.float64), *CONFIDENCE_RANGE) / 10
+    normalized_effort = np.clip(np.asarray(effort, dtype=np.float64), *EFFORT_RANGE)
+    
+    rice_scores = (normalized_reach * normalized_impact * normalized_confidence) / normalized_effort
+    
+    return np.round(rice_scores, 2)
+
+
+def top_k_indices(scores: ArrayLike, k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices des k meilleurs scores, par score décroissant
+    
+    Sélection partielle (argpartition) puis tri des seuls k candidats : le
+    coût est linéaire en la taille du backlog au lieu d'un tri complet.
+    À score égal, l'ordre d'origine est conservé.
+    
+    Args:
+        scores: Scores RICE
+        k: Nombre d'indices voulus (None pour tout le classement)
+        
+    Returns:
+        Indices triés par score décroissant
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    # Ex aequo avec le k-ième score : départager par position d'origine
+    threshold = scores[candidates].min()
+    candidates = np.union1d(candidates, np.flatnonzero(scores == threshold))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
 
 def calculate_rice_score(
     reach: float,
@@ -18,42 +86,36 @@ def calculate_rice_score(
     Returns:
         Score RICE calculé
     """
-    # Normalisation des valeurs
-    normalized_reach = max(0, min(reach, 10))
-    normalized_impact = max(0, min(impact, 10))
-    normalized_confidence = max(0, min(confidence, 10)) / 10  # Convertir en pourcentage (0-1)
-    normalized_effort = max(0.1, min(effort, 10))  # Éviter la division par zéro
-    
-    # Calcul du score RICE
-    rice_score = (normalized_reach * normalized_impact * normalized_confidence) / normalized_effort
-    
-    return round(rice_score, 2)
+    return float(calculate_rice_scores(reach, impact, confidence, effort))
 
 
-def prioritize_stories(stories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def prioritize_stories(stories: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Priorise une liste de user stories en fonction de leur score RICE
     
     Args:
         stories: Liste de dictionnaires représentant les user stories
+        top_k: Nombre de stories à conserver (None pour toutes)
         
     Returns:
-        Liste tri       Liste triée des stories par score RICE décroissant
+        Liste triée des stories par score RICE décroissant
     """
-    # Calculer le score RICE pour chaque story qui n'en a pas déjà un
-    for story in stories:
-        if "rice_score" not in story or story["rice_score"] is None:
-            story["rice_score"] = calculate_rice_score(
-                story["reach"],
-                story["impact"],
-                story["confidence"],
-                story["effort"]
-            )
-    
-    # Trier les stories par score RICE décroissant
-    sorted_stories = sorted(stories, key=lambda x: x["rice_score"], reverse=True)
-    
-    return sorted_stories
+    # Calculer en un seul lot le score RICE des stories qui n'en ont pas
+    missing = [story for story in stories if story.get("rice_score") is None]
+    if missing:
+        scores = calculate_rice_scores(
+            [story["reach"] for story in missing],
+            [story["impact"] for story in missing],
+            [story["confidence"] for story in missing],
+            [story["effort"] for story in missing],
+        )
+        for story, score in zip(missing, scores.tolist()):
+            story["rice_score"] = score
+    
+    # Classer les stories par score RICE décroissant
+    order = top_k_indices([story["rice_score"] for story in stories], top_k)
+    
+    return [stories[index] for index in order.tolist()]
 
 
 def estimate_rice_parameters(
@@ -90,4 +152,46 @@ def estimate_rice_parameters(
     # Estimer l'effort (par défaut à 5 = effort moyen)
     effort = 5.0
     
-    return reach, impact, confidence, effort
\ No newline at end of file
+    return reach, impact, confidence, effort
+
+
+def estimate_story_rice_parameters(
+    story: Dict[str, Any],
+    entities: Dict[str, Any]
+) -> Tuple[float, float, float, float]:
+    """
+    Estime les paramètres RICE d'une story à partir des insights de son feedback
+    
+    Args:
+        story: User story (themes et description)
+        entities: Insights extraits du feedback source (themes, sentiments, user_personas)
+        
+    Returns:
+        Tuple (reach, impact, confidence, effort)
+    """
+    sentiment_scores = entities.get("sentiments") or {}
+    
+    # Calculer l'importance des thèmes en fonction de leur fréquence d'apparition
+    all_themes = entities.get("themes") or []
+    theme_importance = {
+        theme: all_themes.count(theme) / len(all_themes) * 10
+        for theme in all_themes
+    }
+    
+    # La portée est basée sur les personas et les thèmes
+    user_count = len(entities.get("user_personas") or []) * 100  # estimation
+    
+    # Calculer le sentiment moyen pour les thèmes associés à cette story
+    relevant_sentiments = [
+        sentiment_scores.get(theme, 0)
+        for theme in story["themes"]
+        if theme in sentiment_scores
+    ]
+    avg_sentiment = sum(relevant_sentiments) / len(relevant_sentiments) if relevant_sentiments else 0
+    
+    return estimate_rice_parameters(
+        story_text=story["description"],
+        theme_importance=theme_importance,
+        sentiment_score=avg_sentiment,
+        user_count=user_count
+    )
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+import copy
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ai_product_pilot.core.metrics import SEARCH_CACHE_LOOKUPS
+from ai_product_pilot.core.settings import settings
+
+# Cache partagé par toutes les instances de VectorStoreService du processus
+_cache: Optional["SearchCache"] = None
+
+
+def normalize_query(query: str) -> str:
+    """Normalise une requête de recherche (casse et espaces) pour le cache"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """
+    Cache des résultats de recherche sémantique, en mémoire avec TTL.
+
+    Chaque entrée est associée à la génération du corpus au moment de la
+    recherche : toute écriture (ajout ou suppression de documents) incrémente
+    la génération et rend les entrées existantes obsolètes. La génération est
+    stockée dans une base SQLite locale pour être partagée par les workers
+    d'une même machine.
+    """
+
+    def __init__(self, path: Optional[str], ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS corpus_generation (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO corpus_generation (id, value) VALUES (1, 0)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def generation(self) -> int:
+        """Génération courante du corpus"""
+        if not self.path:
+            return self._generation
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM corpus_generation WHERE id = 1").fetchone()[0]
+
+    def invalidate(self) -> None:
+        """Signale une modification du corpus : les résultats en cache deviennent obsolètes"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("UPDATE corpus_generation SET value = value + 1 WHERE id = 1")
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recherche des résultats en cache
+
+        Args:
+            key: Clé de recherche (requête normalisée, limite, filtre)
+
+        Returns:
+            Copie des résultats, ou None si absents, expirés ou obsolètes
+        """
+        generation = self.generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation and time.monotonic() - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                SEARCH_CACHE_LOOKUPS.labels("hit").inc()
+                return copy.deepcopy(entry[2])
+            if entry is not None:
+                del self._entries[key]
+        SEARCH_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def set(self, key: Hashable, generation: int, results: List[Dict[str, Any]]) -> None:
+        """
+        Enregistre des résultats obtenus pour une génération du corpus
+
+        Args:
+            key: Clé de recherche
+            generation: Génération lue avant la recherche (une écriture concurrente rend l'entrée obsolète)
+            results: Résultats de la recherche
+        """
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), copy.deepcopy(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def get_search_cache() -> SearchCache:
+    """Retourne le cache de recherche partagé du processus"""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(
+            path=os.path.join(settings.data_dir, "search_cache.sqlite3"),
+            ttl_seconds=settings.search_cache_ttl_seconds,
+            max_entries=settings.search_cache_max_entries,
+        )
+    return _cache
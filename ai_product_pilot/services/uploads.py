@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+import asyncio
+import hashlib
+import os
+
+from fastapi import UploadFile
+
+
+class UploadTooLargeError(ValueError):
+    """Fichier téléchargé dépassant la taille maximale autorisée"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Le fichier dépasse la taille maximale autorisée ({max_bytes} octets)")
+        self.max_bytes = max_bytes
+
+
+@dataclass(frozen=True)
+class ReceivedUpload:
+    """Fichier téléchargé, déjà mis en tampon par Starlette, avec sa taille et son empreinte sha256"""
+    file: BinaryIO
+    size: int
+    content_hash: str
+
+
+async def read_upload(file: UploadFile, max_bytes: int, chunk_bytes: int) -> ReceivedUpload:
+    """
+    Calcule la taille et l'empreinte d'un fichier téléchargé, bloc par bloc
+
+    Le fichier est lu directement dans le tampon de Starlette (en mémoire
+    puis sur disque), sans être recopié ; la lecture s'interrompt dès que la
+    taille maximale est dépassée. La mémoire utilisée est bornée par
+    chunk_bytes, quelle que soit la taille du fichier.
+
+    Args:
+        file: Fichier reçu par FastAPI
+        max_bytes: Taille maximale acceptée
+        chunk_bytes: Taille des blocs lus
+
+    Returns:
+        Fichier rembobiné, taille et empreinte
+    """
+    def digest() -> ReceivedUpload:
+        source = file.file
+        source.seek(0)
+        content_hash = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = source.read(chunk_bytes)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            content_hash.update(chunk)
+        source.seek(0)
+        return ReceivedUpload(file=source, size=size, content_hash=content_hash.hexdigest())
+
+    return await asyncio.to_thread(digest)
+
+
+def upload_to_storage(supabase, bucket: str, path: str, upload: ReceivedUpload, content_type: Optional[str]):
+    """
+    Envoie un fichier téléchargé vers Supabase Storage, en flux
+
+    Args:
+        supabase: Client Supabase
+        bucket: Bucket de destination
+        path: Chemin du fichier dans le bucket
+        upload: Fichier lu par read_upload
+        content_type: Type MIME du fichier
+
+    Returns:
+        Réponse de Supabase Storage
+    """
+    file_options = {"content-type": content_type} if content_type else None
+    storage = supabase.storage.from_(bucket)
+    upload.file.seek(0)
+    try:
+        fd = upload.file.fileno()
+    except OSError:
+        # Fichier sans descripteur (tampon en mémoire) : envoyé tel quel
+        return storage.upload(path=path, file=upload.file.read(), file_options=file_options)
+    # storage3 ne transmet par blocs que les fichiers ouverts en lecture
+    # (BufferedReader) : le tampon de Starlette est rouvert ainsi, sans copie
+    with os.fdopen(os.dup(fd), "rb") as f:
+        f.seek(0)
+        return storage.upload(path=path, file=f, file_options=file_options)
@@ -0,0 +1,765 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+from langchain.schema.document import Document
+from langchain_community.vectorstores import SupabaseVectorStore
+from langchain_core.embeddings import Embeddings
+
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.lib.supabase import get_supabase_client
+
+# Index local partagé par toutes les instances de VectorStoreService du processus
+_local_index: Optional["LocalVectorIndex"] = None
+
+
+class VectorBackend(ABC):
+    """Stockage vectoriel utilisé par VectorStoreService"""
+
+    @abstractmethod
+    async def add(self, documents: List[Document], vectors: Optional[List[List[float]]] = None) -> None:
+        """Vectorise (sauf vecteurs fournis) et enregistre des documents (metadata["id"] est leur identifiant)"""
+
+    @abstractmethod
+    async def search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Retourne les k documents les plus similaires avec leur score de similarité"""
+
+    @abstractmethod
+    async def match_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        threshold: float,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """Retourne, pour chaque vecteur, ses k plus proches documents de similarité >= threshold"""
+
+    @abstractmethod
+    async def keyword_search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Retourne les k documents les plus pertinents en recherche plein texte, sans embedding"""
+
+    @abstractmethod
+    async def delete_ids(self, ids: List[str]) -> int:
+        """Supprime des documents par ID et retourne le nombre supprimé"""
+
+    @abstractmethod
+    async def delete_namespaces(self, namespaces: List[str]) -> int:
+        """Supprime les documents d'espaces de noms et retourne le nombre supprimé"""
+
+    @abstractmethod
+    async def delete_stale_chunks(self, namespace: str, ingest_run: str) -> int:
+        """Supprime les segments d'un espace de noms issus d'une autre ingestion que ingest_run"""
+
+    @abstractmethod
+    async def update_namespace_metadata(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Fusionne des champs dans les métadonnées des documents, par espace de noms, et retourne le nombre modifié"""
+
+    @abstractmethod
+    async def list_chunks(self, namespace: str, after_chunk: int, limit: int) -> List[Document]:
+        """Retourne, par numéro croissant, les segments d'un espace de noms de numéro > after_chunk"""
+
+
+class SupabaseVectorBackend(VectorBackend):
+    """Stockage dans la table documents de Supabase (pgvector, RPC match_documents)"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.supabase = get_supabase_client()
+        self.vector_store = SupabaseVectorStore(
+            client=self.supabase,
+            embedding=embeddings,
+            table_name="documents",
+            query_name="match_documents",
+        )
+
+    async def add(self, documents: List[Document], vectors: Optional[List[List[float]]] = None) -> None:
+        if vectors is None:
+            await self.vector_store.aadd_documents(documents)
+            return
+        await asyncio.to_thread(
+            self.vector_store.add_vectors, vectors, documents, [str(uuid.uuid4()) for _ in documents]
+        )
+
+    async def search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        # Appel direct de la RPC pour transmettre match_count et ef_search
+        # (paramètres de l'index HNSW, voir migrations/003_documents_hnsw.sql)
+        query_embedding = await self.embeddings.aembed_query(query)
+        # Client Supabase synchrone : appel exécuté hors de la boucle d'événements
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc("match_documents", {
+                "query_embedding": query_embedding,
+                "match_count": k,
+                "filter": filter,
+                "ef_search": settings.vector_ef_search,
+            }).execute()
+        )
+        return [
+            (Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {}), row["similarity"])
+            for row in result.data
+        ]
+
+    async def match_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        threshold: float,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        # Une seule RPC pour tous les vecteurs (migrations/008_story_dedup.sql)
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc("match_documents_batch", {
+                "query_embeddings": vectors,
+                "match_threshold": threshold,
+                "match_count": k,
+                "filter": filter,
+                "ef_search": settings.vector_ef_search,
+            }).execute()
+        )
+        matches: List[List[Tuple[Document, float]]] = [[] for _ in vectors]
+        for row in result.data:
+            matches[row["query_index"]].append(
+                (Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {}), row["similarity"])
+            )
+        return matches
+
+    async def keyword_search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        # Index plein texte documents.content_tsv (migrations/004_documents_fulltext.sql)
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc("search_documents_text", {
+                "query_text": query,
+                "match_count": k,
+                "filter": filter,
+            }).execute()
+        )
+        return [
+            (Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {}), row["rank"])
+            for row in result.data
+        ]
+
+    async def delete_ids(self, ids: List[str]) -> int:
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc("delete_documents_by_ids", {"doc_ids": list(ids)}).execute()
+        )
+        return result.data or 0
+
+    async def delete_namespaces(self, namespaces: List[str]) -> int:
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc(
+                "delete_documents_by_namespaces", {"namespaces": list(namespaces)}
+            ).execute()
+        )
+        return result.data or 0
+
+    async def delete_stale_chunks(self, namespace: str, ingest_run: str) -> int:
+        # migrations/011_ingest_chunks.sql
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc(
+                "delete_stale_chunks", {"ns": namespace, "current_run": ingest_run}
+            ).execute()
+        )
+        return result.data or 0
+
+    async def update_namespace_metadata(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        # migrations/012_documents_metadata_update.sql
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc("update_documents_metadata", {
+                "updates": [{"namespace": namespace, "patch": patch} for namespace, patch in updates.items()],
+            }).execute()
+        )
+        return result.data or 0
+
+    async def list_chunks(self, namespace: str, after_chunk: int, limit: int) -> List[Document]:
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc(
+                "list_namespace_chunks", {"ns": namespace, "after_chunk": after_chunk, "batch_size": limit}
+            ).execute()
+        )
+        return [
+            Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {})
+            for row in result.data
+        ]
+
+
+class LocalVectorIndex:
+    """
+    Index vectoriel local, en mémoire partagée entre processus.
+
+    - les vecteurs (normalisés, float32) sont stockés dans une matrice
+      contiguë projetée en mémoire (np.memmap) : les workers d'une machine
+      partagent les mêmes pages et démarrent sans chargement
+    - les IDs, contenus et métadonnées sont dans une base SQLite ; seuls les
+      résultats retenus en sont relus
+    - la recherche est un produit matriciel suivi d'un argpartition top-k ;
+      les filtres de métadonnées sont des masques booléens calculés une fois
+      par valeur et par version de l'index
+    - la recherche plein texte utilise un index FTS5 sur les contenus
+
+    Les suppressions sont logiques (masque des lignes vivantes) ; dès que la
+    part de lignes supprimées dépasse compact_ratio, l'index est compacté :
+    la matrice est réécrite avec les seules lignes vivantes, renumérotées.
+    """
+
+    def __init__(self, directory: str, refresh_seconds: float = 1.0, compact_ratio: float = 0.25):
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self.compact_ratio = compact_ratio
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "documents.sqlite3")
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self._lock = threading.RLock()
+        self._version = -1
+        self._layout = -1
+        self._checked_at = 0.0
+        self._dim = 0
+        self._count = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._alive: Optional[np.ndarray] = None
+        self._masks: Dict[Tuple[Tuple[str, str], ...], np.ndarray] = {}
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_id ON documents (id)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_documents_namespace "
+                "ON documents (json_extract(metadata, '$.namespace'))"
+            )
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'documents_fts'"
+            ).fetchone()
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts "
+                "USING fts5(content, content='documents', content_rowid='row')"
+            )
+            if not has_fts:
+                # Index créé avant la recherche plein texte : indexer l'existant
+                conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('rebuild')")
+            conn.execute("CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO index_state (key, value) VALUES ('version', 0), ('dim', 0), ('layout', 0)"
+            )
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "wb").close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("UPDATE index_state SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+
+    def _refresh(self, force: bool = False) -> None:
+        """Recharge la vue de l'index si un processus l'a modifiée"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            with self._connect() as conn:
+                state = dict(conn.execute("SELECT key, value FROM index_state").fetchall())
+                self._checked_at = now
+                if state["version"] == self._version:
+                    return
+                count = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM documents").fetchone()[0]
+                deleted = [row for (row,) in conn.execute("SELECT row FROM documents WHERE deleted = 1")]
+
+            self._dim = state["dim"]
+            self._count = count
+            if count and self._dim:
+                self._matrix = np.memmap(
+                    self.vectors_path, dtype=np.float32, mode="r", shape=(count, self._dim)
+                )
+            else:
+                self._matrix = None
+            alive = np.ones(count, dtype=bool)
+            alive[deleted] = False
+            self._alive = alive
+            self._masks = {}
+            self._version = state["version"]
+            self._layout = state["layout"]
+
+    def _mask(self, filter: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Masque des lignes vivantes correspondant au filtre (calculé une fois par version)"""
+        if not filter:
+            return self._alive
+        key = json.dumps(filter, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            clauses, values = _filter_clauses("metadata", filter)
+            with self._connect() as conn:
+                rows = [
+                    row for (row,) in conn.execute(
+                        f"SELECT row FROM documents WHERE deleted = 0 AND row < ?{clauses}",
+                        [self._count, *values],
+                    )
+                ]
+            mask = np.zeros(self._count, dtype=bool)
+            mask[rows] = True
+            self._masks[key] = mask
+        return mask
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict[str, Any]], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Ajoute des documents et leurs vecteurs à l'index
+
+        Args:
+            ids: Identifiants des documents
+            texts: Contenus textuels
+            metadatas: Métadonnées (filtrables)
+            vectors: Embeddings, normalisés avant stockage
+        """
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        with self._transaction() as conn:
+            dim = conn.execute("SELECT value FROM index_state WHERE key = 'dim'").fetchone()[0]
+            if dim == 0:
+                dim = matrix.shape[1]
+                conn.execute("UPDATE index_state SET value = ? WHERE key = 'dim'", (dim,))
+            elif dim != matrix.shape[1]:
+                raise ValueError(f"Dimension d'embedding {matrix.shape[1]} incompatible avec l'index ({dim})")
+
+            start = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM documents").fetchone()[0]
+            # Les vecteurs sont écrits avant la validation : un lecteur qui voit
+            # la nouvelle version trouve toujours les lignes correspondantes
+            with open(self.vectors_path, "r+b") as f:
+                f.seek(start * dim * 4)
+                f.write(matrix.tobytes())
+            conn.executemany(
+                "INSERT INTO documents (row, id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + offset, doc_id, text, json.dumps(metadata, ensure_ascii=False))
+                    for offset, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas))
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO documents_fts (rowid, content) VALUES (?, ?)",
+                [(start + offset, text) for offset, text in enumerate(texts)],
+            )
+        self._refresh(force=True)
+
+    def search(
+        self, vector: Sequence[float], k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """
+        Recherche les k documents les plus proches (similarité cosinus)
+
+        Args:
+            vector: Embedding de la requête
+            k: Nombre de résultats
+            filter: Métadonnées à contenir (ex: {"type": "story"})
+
+        Returns:
+            Liste de (id, contenu, métadonnées, similarité) par score décroissant
+        """
+        return self.search_batch([vector], k, filter)[0]
+
+    def search_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        threshold: Optional[float] = None,
+    ) -> List[List[Tuple[str, str, Dict[str, Any], float]]]:
+        """
+        Recherche les k plus proches documents de plusieurs vecteurs, en un
+        seul produit matriciel
+
+        Args:
+            vectors: Embeddings des requêtes
+            k: Nombre de résultats par requête
+            filter: Métadonnées à contenir (ex: {"type": "story"})
+            threshold: Similarité minimale des résultats
+
+        Returns:
+            Pour chaque requête, liste de (id, contenu, métadonnées, similarité)
+            par score décroissant
+        """
+        if not len(vectors):
+            return []
+        self._refresh()
+        results = self._search_view(vectors, k, filter, threshold)
+        if results is None:
+            # L'index a été compacté depuis le chargement de la vue : les
+            # numéros de ligne ont changé, la recherche est refaite
+            self._refresh(force=True)
+            results = self._search_view(vectors, k, filter, threshold)
+        return results or [[] for _ in vectors]
+
+    def _search_view(
+        self,
+        vectors: Sequence[Sequence[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        threshold: Optional[float],
+    ) -> Optional[List[List[Tuple[str, str, Dict[str, Any], float]]]]:
+        """Recherche dans la vue chargée, ou None si l'index a été compacté entre-temps"""
+        with self._lock:
+            matrix, mask, layout = self._matrix, self._mask(filter), self._layout
+        k = min(k, int(np.count_nonzero(mask))) if matrix is not None else 0
+        if k <= 0:
+            return [[] for _ in vectors]
+
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        scores = np.where(mask, queries @ matrix.T, -np.inf)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        selected = [
+            [int(row) for row in rows if threshold is None or scores[index, row] >= threshold]
+            for index, rows in enumerate(top)
+        ]
+
+        wanted = sorted({row for rows in selected for row in rows})
+        documents: Dict[int, Tuple[str, str, Dict[str, Any]]] = {}
+        if wanted:
+            with self._connect() as conn:
+                if conn.execute("SELECT value FROM index_state WHERE key = 'layout'").fetchone()[0] != layout:
+                    return None
+                documents = {
+                    row: (doc_id, content, json.loads(metadata))
+                    for row, doc_id, content, metadata in conn.execute(
+                        f"SELECT row, id, content, metadata FROM documents WHERE row IN ({','.join('?' * len(wanted))})",
+                        wanted,
+                    )
+                }
+        return [
+            [(*documents[row], float(scores[index, row])) for row in rows if row in documents]
+            for index, rows in enumerate(selected)
+        ]
+
+    def keyword_search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """
+        Recherche plein texte (BM25) : tous les termes de la requête doivent être présents
+
+        Args:
+            query: Texte de recherche
+            k: Nombre de résultats
+            filter: Métadonnées à contenir (ex: {"type": "story"})
+
+        Returns:
+            Liste de (id, contenu, métadonnées, score) par pertinence décroissante
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+        match = " ".join('"' + term + '"' for term in terms)
+
+        clauses, values = _filter_clauses("d.metadata", filter or {})
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.id, d.content, d.metadata, -bm25(documents_fts) AS score "
+                "FROM documents_fts JOIN documents d ON d.row = documents_fts.rowid "
+                f"WHERE documents_fts MATCH ? AND d.deleted = 0{clauses} "
+                "ORDER BY bm25(documents_fts) LIMIT ?",
+                [match, *values, k],
+            ).fetchall()
+        return [(doc_id, content, json.loads(metadata), score) for doc_id, content, metadata, score in rows]
+
+    def delete_ids(self, ids: Sequence[str]) -> int:
+        """Supprime logiquement des documents par ID"""
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                f"UPDATE documents SET deleted = 1 WHERE deleted = 0 AND id IN ({','.join('?' * len(ids))})",
+                list(ids),
+            ).rowcount
+            self._compact_if_needed(conn)
+        self._refresh(force=True)
+        return deleted
+
+    def delete_namespaces(self, namespaces: Sequence[str]) -> int:
+        """Supprime logiquement les documents d'espaces de noms"""
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                "UPDATE documents SET deleted = 1 WHERE deleted = 0 AND "
+                f"json_extract(metadata, '$.namespace') IN ({','.join('?' * len(namespaces))})",
+                list(namespaces),
+            ).rowcount
+            self._compact_if_needed(conn)
+        self._refresh(force=True)
+        return deleted
+
+    def delete_stale_chunks(self, namespace: str, ingest_run: str) -> int:
+        """Supprime logiquement les segments d'un espace de noms issus d'une autre ingestion"""
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                "UPDATE documents SET deleted = 1 WHERE deleted = 0 "
+                "AND json_extract(metadata, '$.namespace') = ? "
+                "AND json_extract(metadata, '$.ingest_run') IS NOT ?",
+                [namespace, ingest_run],
+            ).rowcount
+            self._compact_if_needed(conn)
+        self._refresh(force=True)
+        return deleted
+
+    def update_namespace_metadata(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Fusionne des champs dans les métadonnées des documents de chaque espace de noms"""
+        with self._transaction() as conn:
+            updated = 0
+            for namespace, patch in updates.items():
+                updated += conn.execute(
+                    "UPDATE documents SET metadata = json_patch(metadata, ?) "
+                    "WHERE deleted = 0 AND json_extract(metadata, '$.namespace') = ?",
+                    [json.dumps(patch, ensure_ascii=False), namespace],
+                ).rowcount
+        self._refresh(force=True)
+        return updated
+
+    def compact(self) -> int:
+        """Réécrit l'index sans les lignes supprimées et retourne le nombre de lignes libérées"""
+        with self._transaction() as conn:
+            freed = self._compact(conn)
+        self._refresh(force=True)
+        return freed
+
+    def _compact_if_needed(self, conn: sqlite3.Connection) -> None:
+        total, deleted = conn.execute("SELECT COUNT(*), COALESCE(SUM(deleted), 0) FROM documents").fetchone()
+        if deleted and deleted >= total * self.compact_ratio:
+            self._compact(conn)
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        """
+        Compacte l'index dans la transaction en cours
+
+        Les lignes vivantes sont renumérotées de 0 à n-1 dans SQLite et la
+        matrice est réécrite dans un nouveau fichier, substitué à l'ancien :
+        les vues déjà projetées en mémoire restent lisibles jusqu'à leur
+        rechargement, que le changement de "layout" impose.
+        """
+        dim = conn.execute("SELECT value FROM index_state WHERE key = 'dim'").fetchone()[0]
+        count = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM documents").fetchone()[0]
+        rows = [row for (row,) in conn.execute("SELECT row FROM documents WHERE deleted = 0 ORDER BY row")]
+        freed = count - len(rows)
+        if not freed:
+            return 0
+
+        conn.execute("DELETE FROM documents WHERE deleted = 1")
+        # Numéros croissants : chaque nouvelle ligne est libre au moment de sa renumérotation
+        conn.executemany(
+            "UPDATE documents SET row = ? WHERE row = ?",
+            [(new, old) for new, old in enumerate(rows) if new != old],
+        )
+        conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('rebuild')")
+        conn.execute("UPDATE index_state SET value = value + 1 WHERE key = 'layout'")
+
+        compacted_path = self.vectors_path + ".compact"
+        with open(compacted_path, "wb") as f:
+            if rows and dim:
+                matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, dim))
+                f.write(np.ascontiguousarray(matrix[rows]).tobytes())
+                del matrix
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted_path, self.vectors_path)
+        return freed
+
+    def list_chunks(self, namespace: str, after_chunk: int, limit: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Lit les segments d'un espace de noms par pages, dans l'ordre d'ingestion
+
+        Args:
+            namespace: Espace de noms (ex: `feedback:{id}`)
+            after_chunk: Dernier numéro de segment déjà lu (-1 pour le début)
+            limit: Taille de la page
+
+        Returns:
+            Liste de (id, contenu, métadonnées) par numéro de segment croissant
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, content, metadata FROM documents "
+                "WHERE deleted = 0 AND json_extract(metadata, '$.namespace') = ? "
+                "AND json_extract(metadata, '$.chunk') > ? "
+                "ORDER BY json_extract(metadata, '$.chunk') LIMIT ?",
+                [namespace, after_chunk, limit],
+            ).fetchall()
+        return [(doc_id, content, json.loads(metadata)) for doc_id, content, metadata in rows]
+
+
+def _sql_value(value: Any) -> Any:
+    """Valeur de filtre comparable au résultat de json_extract (les booléens JSON valent 0/1)"""
+    return int(value) if isinstance(value, bool) else value
+
+
+def _filter_clauses(column: str, filter: Dict[str, Any], path: str = "$") -> Tuple[str, List[Any]]:
+    """
+    Conditions SQL équivalentes au filtre Postgres `metadata @> filter`
+
+    Une valeur scalaire doit être égale, une liste doit être contenue dans la
+    liste des métadonnées et un objet est comparé récursivement.
+
+    Args:
+        column: Colonne JSON des métadonnées
+        filter: Filtre de métadonnées
+        path: Chemin JSON de l'objet comparé
+
+    Returns:
+        Conditions (chacune précédée de AND) et leurs paramètres
+    """
+    clauses, values = "", []
+    for name, value in filter.items():
+        if not name.isidentifier():
+            raise ValueError(f"Clé de filtre invalide: {name}")
+        key_path = f"{path}.{name}"
+        if isinstance(value, dict):
+            nested, nested_values = _filter_clauses(column, value, key_path)
+            clauses += f" AND json_type({column}, '{key_path}') = 'object'{nested}"
+            values.extend(nested_values)
+        elif isinstance(value, list):
+            clauses += f" AND json_type({column}, '{key_path}') = 'array'"
+            for item in value:
+                if isinstance(item, (dict, list)):
+                    raise ValueError(f"Filtre non supporté par l'index local: {name}")
+                clauses += f" AND EXISTS (SELECT 1 FROM json_each({column}, '{key_path}') WHERE value = ?)"
+                values.append(_sql_value(item))
+        elif value is None:
+            clauses += f" AND json_type({column}, '{key_path}') = 'null'"
+        else:
+            clauses += f" AND json_extract({column}, '{key_path}') = ?"
+            values.append(_sql_value(value))
+    return clauses, values
+
+
+class LocalVectorBackend(VectorBackend):
+    """Stockage dans l'index vectoriel local (NumPy, projeté en mémoire)"""
+
+    def __init__(self, embeddings: Embeddings, index: "LocalVectorIndex"):
+        self.embeddings = embeddings
+        self.index = index
+
+    async def add(self, documents: List[Document], vectors: Optional[List[List[float]]] = None) -> None:
+        texts = [doc.page_content for doc in documents]
+        if vectors is None:
+            vectors = await self.embeddings.aembed_documents(texts)
+        await asyncio.to_thread(
+            self.index.add,
+            [doc.metadata["id"] for doc in documents],
+            texts,
+            [doc.metadata for doc in documents],
+            vectors,
+        )
+
+    async def search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        vector = await self.embeddings.aembed_query(query)
+        # Produit matriciel et lecture SQLite exécutés hors de la boucle d'événements
+        results = await asyncio.to_thread(self.index.search, vector, k, filter)
+        return [
+            (Document(page_content=content, metadata=metadata), score)
+            for _, content, metadata, score in results
+        ]
+
+    async def match_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        threshold: float,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        results = await asyncio.to_thread(self.index.search_batch, vectors, k, filter, threshold)
+        return [
+            [(Document(page_content=content, metadata=metadata), score) for _, content, metadata, score in matches]
+            for matches in results
+        ]
+
+    async def keyword_search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        results = await asyncio.to_thread(self.index.keyword_search, query, k, filter)
+        return [
+            (Document(page_content=content, metadata=metadata), score)
+            for _, content, metadata, score in results
+        ]
+
+    async def delete_ids(self, ids: List[str]) -> int:
+        return await asyncio.to_thread(self.index.delete_ids, ids)
+
+    async def delete_namespaces(self, namespaces: List[str]) -> int:
+        return await asyncio.to_thread(self.index.delete_namespaces, namespaces)
+
+    async def delete_stale_chunks(self, namespace: str, ingest_run: str) -> int:
+        return await asyncio.to_thread(self.index.delete_stale_chunks, namespace, ingest_run)
+
+    async def update_namespace_metadata(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        return await asyncio.to_thread(self.index.update_namespace_metadata, updates)
+
+    async def list_chunks(self, namespace: str, after_chunk: int, limit: int) -> List[Document]:
+        rows = await asyncio.to_thread(self.index.list_chunks, namespace, after_chunk, limit)
+        return [Document(page_content=content, metadata=metadata) for _, content, metadata in rows]
+
+
+def get_local_vector_index() -> LocalVectorIndex:
+    """Retourne l'index vectoriel local partagé du processus"""
+    global _local_index
+    if _local_index is None:
+        _local_index = LocalVectorIndex(
+            os.path.join(settings.data_dir, "vector_index"),
+            refresh_seconds=settings.local_vector_refresh_seconds,
+            compact_ratio=settings.local_vector_compact_ratio,
+        )
+    return _local_index
+
+
+def create_vector_backend(embeddings: Embeddings) -> VectorBackend:
+    """
+    Crée le backend vectoriel configuré (settings.vector_backend)
+
+    Args:
+        embeddings: Modèle d'embeddings utilisé pour vectoriser documents et requêtes
+
+    Returns:
+        Backend "supabase" (pgvector) ou "local" (index NumPy)
+    """
+    if settings.vector_backend == "local":
+        return LocalVectorBackend(embeddings, get_local_vector_index())
+    if settings.vector_backend == "supabase":
+        return SupabaseVectorBackend(embeddings)
+    raise ValueError(f"Backend vectoriel inconnu: {settings.vector_backend}")
@@ -1,33 +1,53 @@
-from typing import Dict, List, Optional, Union, Any
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union, Any
+import asyncio
 import json
 import uuid
 
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
 from langchain.schema.document import Document
 
-from ai_product_pilot.lib.supabase import get_supabase_client
+from ai_product_pilot.lib.llm import get_http_async_client, get_http_client
+from ai_product_pilot.core.metrics import track_vector_store
 from ai_product_pilot.core.settings import settings
+from ai_product_pilot.services.embedding_cache import CachedEmbeddings, get_embedding_cache
+from ai_product_pilot.services.hybrid_search import is_keyword_query, reciprocal_rank_fusion
+from ai_product_pilot.services.search_cache import get_search_cache, normalize_query
+from ai_product_pilot.services.vector_backends import create_vector_backend
+
+# Modes de recherche acceptés par VectorStoreService.search
+SEARCH_MODES = ("semantic", "keyword", "hybrid")
 
 
 class VectorStoreService:
-    """Service pour gérer le stockage vectoriel dans Supabase via pgvector"""
+    """
+    Service pour gérer le stockage vectoriel, dans Supabase via pgvector ou
+    dans l'index local selon settings.vector_backend
+    """
     
     def __init__(self):
-        self.supabase = get_supabase_client()
-        self.embeddings = OpenAIEmbeddings(openai_api_key=settings.openai_api_key)
-        self.vector_store = SupabaseVectorStore(
-            client=self.supabase,
-            embedding=self.embeddings,
-            table_name="documents",
-            query_name="match_documents",
+        self.embeddings = OpenAIEmbeddings(
+            openai_api_key=settings.openai_api_key,
+            http_client=get_http_client(),
+            http_async_client=get_http_async_client(),
         )
+        if settings.embedding_cache_enabled:
+            # Les textes déjà vectorisés ne repassent pas par l'API
+            self.embeddings = CachedEmbeddings(self.embeddings, get_embedding_cache())
+        self.backend = create_vector_backend(self.embeddings)
+        self.search_cache = get_search_cache() if settings.search_cache_enabled else None
+    
+    def _invalidate_search_cache(self) -> None:
+        """Les résultats de recherche en cache sont obsolètes dès que le corpus change"""
+        if self.search_cache is not None:
+            self.search_cache.invalidate()
     
+    @track_vector_store("add_documents")
     async def add_documents(
         self, 
         texts: List[str], 
         metadatas: List[Dict[str, Any]],
-        namespace: Optional[str] = None
+        namespace: Optional[str] = None,
+        embeddings: Optional[List[List[float]]] = None
     ) -> List[str]:
         """
         Ajoute des documents au stockage vectoriel
@@ -36,6 +56,7 @@ class VectorStoreService:
             texts: Liste des contenus textuels
             metadatas: Liste des métadonnées correspondantes
             namespace: Espace de noms optionnel pour regrouper les documents
+            embeddings: Embeddings déjà calculés des textes (sinon calculés ici)
             
         Returns:
             Liste des IDs des documents ajoutés
@@ -44,7 +65,8 @@ class VectorStoreService:
         ids = []
         
         for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-            doc_id = str(uuid.uuid4())
+            # Un ID fourni dans les métadonnées (ex: ID de story) est conservé
+            doc_id = metadata.get("id") or str(uuid.uuid4())
             ids.append(doc_id)
             
             # Ajouter l'espace de noms aux métadonnées si fourni
@@ -61,39 +83,119 @@ class VectorStoreService:
                 )
             )
         
-        await self.vector_store.aadd_documents(documents)
+        try:
+            await self.backend.add(documents, embeddings)
+        finally:
+            self._invalidate_search_cache()
         return ids
     
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Calcule les embeddings de textes (via le cache d'embeddings s'il est actif)"""
+        return await self.embeddings.aembed_documents(texts)
+    
+    @track_vector_store("find_similar")
+    async def find_similar(
+        self,
+        embeddings: List[List[float]],
+        threshold: float,
+        filter_type: Optional[str] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Recherche, pour chaque embedding, le document le plus proche au-dessus
+        d'un seuil de similarité, en une seule requête pour tout le lot
+        
+        Args:
+            embeddings: Embeddings à comparer au corpus
+            threshold: Similarité cosinus minimale
+            filter_type: Type de document à filtrer (feedback ou story)
+            
+        Returns:
+            Pour chaque embedding, le document le plus proche ou None
+        """
+        if not embeddings:
+            return []
+        filter_dict = {"type": filter_type} if filter_type else None
+        matches = await self.backend.match_vectors(embeddings, k=1, threshold=threshold, filter=filter_dict)
+        return [self._to_results(results)[0] if results else None for results in matches]
+    
+    @track_vector_store("search")
     async def search(
         self, 
         query: str, 
         limit: int = 5,
-        filter_type: Optional[str] = None
+        filter_type: Optional[str] = None,
+        mode: str = "semantic"
     ) -> List[Dict]:
         """
-        Recherche des documents similaires à la requête
+        Recherche des documents similaires à la requête.
+        
+        Une recherche déjà effectuée sur le même corpus (requête identique à
+        la casse et aux espaces près) est servie depuis le cache, sans appel
+        d'embedding ni aller-retour vers la base.
         
         Args:
             query: Texte de recherche
             limit: Nombre maximum de résultats
             filter_type: Type de document à filtrer (feedback ou story)
+            mode: "semantic" (similarité vectorielle), "keyword" (plein texte,
+                sans embedding) ou "hybrid" (fusion des deux par rang réciproque)
             
         Returns:
             Liste des documents correspondants
         """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Mode de recherche inconnu: {mode}")
+        
+        # La forme normalisée ne sert qu'à la clé de cache : le backend reçoit
+        # la requête d'origine (casse des identifiants, ponctuation)
+        cache_key = (normalize_query(query), limit, filter_type, mode)
+        if self.search_cache is not None:
+            cached = await asyncio.to_thread(self.search_cache.get, cache_key)
+            if cached is not None:
+                return cached
+            generation = await asyncio.to_thread(self.search_cache.generation)
+        
         # Construire le filtre
-        filter_dict = {}
-        if filter_type:
-            filter_dict["type"] = filter_type
+        filter_dict = {"type": filter_type} if filter_type else None
         
         # Effectuer la recherche
-        results = await self.vector_store.asimilarity_search_with_score(
-            query=query,
-            k=limit,
-            filter=filter_dict if filter_dict else None
+        if mode == "keyword":
+            processed_results = self._to_results(
+                await self.backend.keyword_search(query, k=limit, filter=filter_dict)
+            )
+        elif mode == "hybrid":
+            processed_results = await self._hybrid_search(query, limit, filter_dict)
+        else:
+            processed_results = self._to_results(
+                await self.backend.search(query, k=limit, filter=filter_dict)
+            )
+        
+        if self.search_cache is not None:
+            await asyncio.to_thread(self.search_cache.set, cache_key, generation, processed_results)
+            
+        return processed_results
+    
+    async def _hybrid_search(
+        self, query: str, limit: int, filter_dict: Optional[Dict[str, Any]]
+    ) -> List[Dict]:
+        """Recherche plein texte puis, sauf requête de type mot-clé, fusion avec la recherche vectorielle"""
+        candidates = max(limit, settings.hybrid_search_candidates)
+        lexical = self._to_results(
+            await self.backend.keyword_search(query, k=candidates, filter=filter_dict)
         )
         
-        # Transformer les résultats
+        # Voie rapide : numéro de ticket ou expression exacte trouvés tels quels, sans embedding
+        if lexical and is_keyword_query(query):
+            return lexical[:limit]
+        
+        semantic = self._to_results(
+            await self.backend.search(query, k=candidates, filter=filter_dict)
+        )
+        return reciprocal_rank_fusion([lexical, semantic])[:limit]
+    
+    @staticmethod
+    def _to_results(results: List[Tuple[Document, float]]) -> List[Dict]:
+        """Transforme les résultats du backend en dictionnaires"""
         processed_results = []
         for doc, score in results:
             result = {
@@ -103,10 +205,97 @@ class VectorStoreService:
                 **{k: v for k, v in doc.metadata.items() if k != "id"}
             }
             processed_results.append(result)
-            
         return processed_results
     
-    async def delete_by_ids(self, ids: List[str]) -> None:
-        """Supprime des documents par leurs IDs"""
-        for doc_id in ids:
-            self.supabase.table("documents").delete().eq("metadata->>id", doc_id).execute()
\ No newline at end of file
+    @track_vector_store("delete_by_ids")
+    async def delete_by_ids(self, ids: List[str]) -> int:
+        """
+        Supprime des documents par leurs IDs, en une seule requête
+
+        Returns:
+            Nombre de documents supprimés
+        """
+        if not ids:
+            return 0
+        try:
+            return await self.backend.delete_ids(list(ids))
+        finally:
+            self._invalidate_search_cache()
+    
+    async def delete_by_namespace(self, namespace: str) -> int:
+        """
+        Supprime tous les documents d'un espace de noms (ex: `feedback:{id}`)
+
+        Returns:
+            Nombre de documents supprimés
+        """
+        return await self.delete_by_namespaces([namespace])
+    
+    @track_vector_store("delete_by_namespaces")
+    async def delete_by_namespaces(self, namespaces: List[str]) -> int:
+        """
+        Supprime tous les documents de plusieurs espaces de noms, en une seule requête
+
+        Returns:
+            Nombre de documents supprimés
+        """
+        if not namespaces:
+            return 0
+        try:
+            return await self.backend.delete_namespaces(list(namespaces))
+        finally:
+            self._invalidate_search_cache()
+    
+    @track_vector_store("delete_stale_chunks")
+    async def delete_stale_chunks(self, namespace: str, ingest_run: str) -> int:
+        """
+        Supprime les segments d'un espace de noms qui ne proviennent pas de
+        l'ingestion ingest_run (segments d'un traitement précédent)
+
+        Returns:
+            Nombre de documents supprimés
+        """
+        try:
+            return await self.backend.delete_stale_chunks(namespace, ingest_run)
+        finally:
+            self._invalidate_search_cache()
+    
+    @track_vector_store("update_metadata")
+    async def update_metadata_by_namespaces(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Met à jour des champs des métadonnées de documents, en une seule requête
+
+        Args:
+            updates: Champs à remplacer par espace de noms (ex: `story:{id}`)
+
+        Returns:
+            Nombre de documents modifiés
+        """
+        if not updates:
+            return 0
+        try:
+            return await self.backend.update_namespace_metadata(updates)
+        finally:
+            self._invalidate_search_cache()
+    
+    async def iter_chunks(self, namespace: str, batch_size: int = 500) -> AsyncIterator[Dict]:
+        """
+        Relit les segments d'un espace de noms dans leur ordre d'ingestion,
+        par pages de batch_size documents
+
+        Args:
+            namespace: Espace de noms (ex: `feedback:{id}`)
+            batch_size: Nombre de segments lus par requête
+
+        Yields:
+            Documents au format des résultats de recherche (sans score)
+        """
+        after_chunk = -1
+        while True:
+            documents = await self.backend.list_chunks(namespace, after_chunk, batch_size)
+            for result in self._to_results([(doc, None) for doc in documents]):
+                result.pop("similarity")
+                yield result
+            if len(documents) < batch_size:
+                return
+            after_chunk = documents[-1].metadata["chunk"]
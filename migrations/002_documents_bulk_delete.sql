@@ -0,0 +1,35 @@
+-- Index sur les clés de métadonnées utilisées pour supprimer des documents
+-- (ID de document et espace de noms `feedback:{id}` / `story:{id}`)
+CREATE INDEX IF NOT EXISTS idx_documents_metadata_id
+    ON public.documents ((metadata->>'id'));
+
+CREATE INDEX IF NOT EXISTS idx_documents_namespace
+    ON public.documents ((metadata->>'namespace'));
+
+-- Suppression en une seule requête d'une liste de documents par ID
+CREATE OR REPLACE FUNCTION delete_documents_by_ids(doc_ids TEXT[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    deleted_count INTEGER;
+BEGIN
+    DELETE FROM documents
+    WHERE metadata->>'id' = ANY(doc_ids);
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;$$;
+
+-- Suppression de tous les documents d'un ou plusieurs espaces de noms
+CREATE OR REPLACE FUNCTION delete_documents_by_namespaces(namespaces TEXT[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    deleted_count INTEGER;
+BEGIN
+    DELETE FROM documents
+    WHERE metadata->>'namespace' = ANY(namespaces);
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;$$;
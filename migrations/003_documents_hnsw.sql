@@ -0,0 +1,69 @@
+-- Index HNSW sur les embeddings (distance cosinus) : la recherche de
+-- similarité ne parcourt plus toute la table.
+-- m / ef_construction règlent le compromis qualité du graphe / temps de
+-- construction (voir scripts/bench_vector_index.py pour les mesurer).
+CREATE INDEX IF NOT EXISTS idx_documents_embedding_hnsw
+    ON public.documents USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- Index GIN pour les filtres `metadata @> filter`
+CREATE INDEX IF NOT EXISTS idx_documents_metadata
+    ON public.documents USING GIN (metadata jsonb_path_ops);
+
+-- Recherche de similarité utilisant l'index HNSW.
+--
+-- ef_search règle le nombre de candidats explorés (rappel vs latence).
+-- Avec un filtre, le parcours itératif de l'index (pgvector >= 0.8) continue
+-- d'explorer le graphe jusqu'à obtenir match_count lignes satisfaisant le
+-- filtre, au lieu de filtrer les seuls ef_search premiers candidats ; sur
+-- les versions antérieures, un ef_search plus élevé compense le filtrage.
+DROP FUNCTION IF EXISTS match_documents(VECTOR(1536), INT, JSONB);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding VECTOR(1536),
+    match_count INT DEFAULT 5,
+    filter JSONB DEFAULT NULL,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE(
+    id BIGINT,
+    content TEXT,
+    metadata JSONB,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$BEGIN
+    -- Paramètres locaux à la transaction de l'appel RPC (hnsw.ef_search est
+    -- limité à 1000 par pgvector)
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::TEXT, TRUE);
+    IF (
+        SELECT string_to_array(extversion, '.')::INT[] >= ARRAY[0, 8]
+        FROM pg_extension WHERE extname = 'vector'
+    ) THEN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', TRUE);
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        r.id,
+        r.content,
+        r.metadata,
+        1 - r.distance AS similarity
+    FROM (
+        SELECT
+            d.id,
+            d.content,
+            d.metadata,
+            d.embedding <=> query_embedding AS distance
+        FROM
+            documents d
+        WHERE
+            filter IS NULL OR d.metadata @> filter
+        ORDER BY
+            d.embedding <=> query_embedding
+        LIMIT match_count
+    ) r
+    -- Le parcours itératif en ordre relâché peut rendre des résultats
+    -- légèrement désordonnés : ils sont retriés une fois sélectionnés
+    ORDER BY r.distance;
+END;$$;
@@ -0,0 +1,42 @@
+-- Index plein texte sur le contenu des documents (segments de feedback et
+-- stories vectorisées). La configuration 'simple' conserve les identifiants
+-- et numéros tels quels (ex: ticket #4528), sans racinisation.
+ALTER TABLE public.documents
+    ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_documents_content_tsv
+    ON public.documents USING GIN (content_tsv);
+
+-- Recherche plein texte, sans embedding : tous les termes de la requête
+-- doivent être présents, classement par ts_rank_cd
+CREATE OR REPLACE FUNCTION search_documents_text(
+    query_text TEXT,
+    match_count INT DEFAULT 5,
+    filter JSONB DEFAULT NULL
+)
+RETURNS TABLE(
+    id BIGINT,
+    content TEXT,
+    metadata JSONB,
+    rank FLOAT
+)
+LANGUAGE plpgsql
+AS $$DECLARE
+    ts_query TSQUERY := plainto_tsquery('simple', query_text);
+BEGIN
+    RETURN QUERY
+    SELECT
+        d.id,
+        d.content,
+        d.metadata,
+        ts_rank_cd(d.content_tsv, ts_query)::FLOAT AS rank
+    FROM
+        documents d
+    WHERE
+        d.content_tsv @@ ts_query
+        AND (filter IS NULL OR d.metadata @> filter)
+    ORDER BY
+        ts_rank_cd(d.content_tsv, ts_query) DESC
+    LIMIT match_count;
+END;$$;
@@ -0,0 +1,10 @@
+-- Index de pagination par curseur (keyset) des listes :
+-- feedbacks par (created_at, id), backlog par (rice_score, id)
+CREATE INDEX IF NOT EXISTS idx_feedback_created_at_id
+    ON public.feedback (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_feedback_status_created_at_id
+    ON public.feedback (status, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_stories_rice_score_id
+    ON public.stories (rice_score DESC, id DESC);
@@ -0,0 +1,141 @@
+-- Catalogue des thèmes maintenu de façon incrémentale : nombre de stories
+-- et score RICE moyen par thème. /api/themes lit cette table (O(thèmes))
+-- au lieu de dépiler les thèmes de toutes les stories à chaque appel.
+CREATE TABLE IF NOT EXISTS public.theme_stats (
+    theme TEXT PRIMARY KEY,
+    story_count INTEGER NOT NULL DEFAULT 0,
+    rice_score_sum FLOAT NOT NULL DEFAULT 0,
+    avg_rice_score FLOAT GENERATED ALWAYS AS (
+        CASE WHEN story_count > 0 THEN rice_score_sum / story_count END
+    ) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_theme_stats_story_count
+    ON public.theme_stats (story_count DESC);
+
+-- Applique des variations (nombre de stories, somme des scores) par thème
+CREATE OR REPLACE FUNCTION apply_theme_stats_delta(
+    themes TEXT[],
+    counts INTEGER[],
+    score_sums FLOAT[]
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$BEGIN
+    INSERT INTO theme_stats AS ts (theme, story_count, rice_score_sum)
+    SELECT d.theme, d.story_count, d.rice_score_sum
+    FROM unnest(themes, counts, score_sums) AS d(theme, story_count, rice_score_sum)
+    WHERE d.story_count <> 0 OR d.rice_score_sum <> 0
+    ON CONFLICT (theme) DO UPDATE SET
+        story_count = ts.story_count + EXCLUDED.story_count,
+        rice_score_sum = ts.rice_score_sum + EXCLUDED.rice_score_sum,
+        updated_at = NOW();
+
+    DELETE FROM theme_stats ts
+    WHERE ts.theme = ANY(themes) AND ts.story_count <= 0;
+END;$$;
+
+-- Déclencheur par instruction (tables de transition) : une insertion ou
+-- une mise à jour en masse des stories ne déclenche qu'une mise à jour
+-- agrégée du catalogue. Un thème répété dans une story ne compte qu'une fois.
+CREATE OR REPLACE FUNCTION update_theme_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    delta_themes TEXT[];
+    delta_counts INTEGER[];
+    delta_sums FLOAT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(d.theme), array_agg(d.story_count), array_agg(d.rice_score_sum)
+        INTO delta_themes, delta_counts, delta_sums
+        FROM (
+            SELECT t.theme, COUNT(*)::INTEGER AS story_count, SUM(n.rice_score) AS rice_score_sum
+            FROM new_rows n, LATERAL (SELECT DISTINCT unnest(n.themes) AS theme) t
+            GROUP BY t.theme
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(d.theme), array_agg(d.story_count), array_agg(d.rice_score_sum)
+        INTO delta_themes, delta_counts, delta_sums
+        FROM (
+            SELECT t.theme, -COUNT(*)::INTEGER AS story_count, -SUM(o.rice_score) AS rice_score_sum
+            FROM old_rows o, LATERAL (SELECT DISTINCT unnest(o.themes) AS theme) t
+            GROUP BY t.theme
+        ) d;
+    ELSE
+        -- Seules les stories dont les thèmes ou le score ont changé comptent
+        SELECT array_agg(d.theme), array_agg(d.story_count), array_agg(d.rice_score_sum)
+        INTO delta_themes, delta_counts, delta_sums
+        FROM (
+            SELECT c.theme, SUM(c.sign)::INTEGER AS story_count, SUM(c.sign * c.rice_score) AS rice_score_sum
+            FROM (
+                SELECT t.theme, 1 AS sign, n.rice_score
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                CROSS JOIN LATERAL (SELECT DISTINCT unnest(n.themes) AS theme) t
+                WHERE n.themes IS DISTINCT FROM o.themes OR n.rice_score IS DISTINCT FROM o.rice_score
+                UNION ALL
+                SELECT t.theme, -1 AS sign, o.rice_score
+                FROM old_rows o
+                JOIN new_rows n ON n.id = o.id
+                CROSS JOIN LATERAL (SELECT DISTINCT unnest(o.themes) AS theme) t
+                WHERE n.themes IS DISTINCT FROM o.themes OR n.rice_score IS DISTINCT FROM o.rice_score
+            ) c
+            GROUP BY c.theme
+        ) d;
+    END IF;
+
+    IF delta_themes IS NOT NULL THEN
+        PERFORM apply_theme_stats_delta(delta_themes, delta_counts, delta_sums);
+    END IF;
+    RETURN NULL;
+END;$$;
+
+DROP TRIGGER IF EXISTS stories_theme_stats_insert ON stories;
+CREATE TRIGGER stories_theme_stats_insert
+AFTER INSERT ON stories
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE update_theme_stats();
+
+DROP TRIGGER IF EXISTS stories_theme_stats_update ON stories;
+CREATE TRIGGER stories_theme_stats_update
+AFTER UPDATE ON stories
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE update_theme_stats();
+
+DROP TRIGGER IF EXISTS stories_theme_stats_delete ON stories;
+CREATE TRIGGER stories_theme_stats_delete
+AFTER DELETE ON stories
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE PROCEDURE update_theme_stats();
+
+-- Initialisation du catalogue à partir des stories existantes
+TRUNCATE theme_stats;
+INSERT INTO theme_stats (theme, story_count, rice_score_sum)
+SELECT t.theme, COUNT(*), SUM(s.rice_score)
+FROM stories s, LATERAL (SELECT DISTINCT unnest(s.themes) AS theme) t
+GROUP BY t.theme;
+
+-- Les thèmes uniques sont lus depuis le catalogue
+CREATE OR REPLACE FUNCTION get_unique_themes()
+RETURNS TABLE(theme TEXT)
+LANGUAGE plpgsql
+AS $$BEGIN
+    RETURN QUERY
+    SELECT ts.theme
+    FROM theme_stats ts
+    ORDER BY ts.theme;
+END;$$;
+
+ALTER TABLE theme_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow authenticated read access to theme_stats" ON theme_stats
+    FOR SELECT
+    USING (auth.role() = 'authenticated');
+
+CREATE POLICY "Allow service role full access to theme_stats" ON theme_stats
+    USING (auth.role() = 'service_role');
@@ -0,0 +1,78 @@
+-- Recalcul des scores RICE des stories existantes (job rescore_stories)
+
+-- Lot de stories à rescorer, dans l'ordre des ids (pagination par curseur),
+-- avec les insights du feedback source nécessaires à l'estimation RICE.
+-- L'analyse est parfois stockée comme une chaîne JSON : elle est décodée ici.
+CREATE OR REPLACE FUNCTION stories_for_rescoring(
+    after_id UUID DEFAULT NULL,
+    batch_size INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    themes TEXT[],
+    description TEXT,
+    reach FLOAT,
+    impact FLOAT,
+    confidence FLOAT,
+    effort FLOAT,
+    rice_score FLOAT,
+    entities JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        s.id,
+        s.themes,
+        s.description,
+        s.reach,
+        s.impact,
+        s.confidence,
+        s.effort,
+        s.rice_score,
+        CASE WHEN a.analysis IS NULL THEN NULL ELSE jsonb_build_object(
+            'themes', a.analysis->'themes',
+            'sentiments', a.analysis->'sentiments',
+            'user_personas', a.analysis->'user_personas'
+        ) END AS entities
+    FROM stories s
+    LEFT JOIN feedback f ON f.id = s.feedback_ids[1]
+    LEFT JOIN LATERAL (
+        SELECT CASE
+            WHEN jsonb_typeof(f.analysis) = 'string' THEN (f.analysis #>> '{}')::jsonb
+            ELSE f.analysis
+        END AS analysis
+    ) a ON TRUE
+    WHERE after_id IS NULL OR s.id > after_id
+    ORDER BY s.id
+    LIMIT batch_size;
+$$;
+
+-- Écriture en une requête des paramètres et scores RICE recalculés d'un lot
+-- updates: [{"id", "reach", "impact", "confidence", "effort", "rice_score"}, ...]
+CREATE OR REPLACE FUNCTION bulk_update_story_scores(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE stories s
+    SET
+        reach = u.reach,
+        impact = u.impact,
+        confidence = u.confidence,
+        effort = u.effort,
+        rice_score = u.rice_score
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID,
+        reach FLOAT,
+        impact FLOAT,
+        confidence FLOAT,
+        effort FLOAT,
+        rice_score FLOAT
+    )
+    WHERE s.id = u.id;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;$$;
@@ -0,0 +1,86 @@
+-- Déduplication des stories avant insertion
+
+-- Plus proches voisins de plusieurs embeddings en une requête (index HNSW
+-- parcouru une fois par embedding). query_embeddings est un tableau JSON de
+-- vecteurs ; query_index est la position de l'embedding dans ce tableau.
+CREATE OR REPLACE FUNCTION match_documents_batch(
+    query_embeddings JSONB,
+    match_threshold FLOAT,
+    match_count INT DEFAULT 1,
+    filter JSONB DEFAULT NULL,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE(
+    query_index INT,
+    id BIGINT,
+    content TEXT,
+    metadata JSONB,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$BEGIN
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::TEXT, TRUE);
+    IF (
+        SELECT string_to_array(extversion, '.')::INT[] >= ARRAY[0, 8]
+        FROM pg_extension WHERE extname = 'vector'
+    ) THEN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', TRUE);
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        (q.ordinality - 1)::INT AS query_index,
+        m.id,
+        m.content,
+        m.metadata,
+        1 - m.distance AS similarity
+    FROM jsonb_array_elements(query_embeddings) WITH ORDINALITY AS q(embedding, ordinality)
+    CROSS JOIN LATERAL (
+        SELECT
+            d.id,
+            d.content,
+            d.metadata,
+            d.embedding <=> (q.embedding::TEXT)::VECTOR(1536) AS distance
+        FROM
+            documents d
+        WHERE
+            filter IS NULL OR d.metadata @> filter
+        ORDER BY
+            d.embedding <=> (q.embedding::TEXT)::VECTOR(1536)
+        LIMIT match_count
+    ) m
+    WHERE 1 - m.distance >= match_threshold
+    ORDER BY q.ordinality, m.distance;
+END;$$;
+
+-- Fusion de nouvelles stories dans des stories existantes quasi identiques :
+-- les feedbacks sources sont ajoutés à la story existante, qui prend les
+-- paramètres RICE de la nouvelle story si son score est plus élevé.
+-- merges: [{"id", "feedback_ids", "reach", "impact", "confidence", "effort", "rice_score"}, ...]
+CREATE OR REPLACE FUNCTION merge_duplicate_stories(merges JSONB)
+RETURNS SETOF stories
+LANGUAGE plpgsql
+AS $$BEGIN
+    RETURN QUERY
+    UPDATE stories s
+    SET
+        feedback_ids = ARRAY(
+            SELECT DISTINCT unnest(s.feedback_ids || u.feedback_ids)
+        ),
+        reach = CASE WHEN u.rice_score > s.rice_score THEN u.reach ELSE s.reach END,
+        impact = CASE WHEN u.rice_score > s.rice_score THEN u.impact ELSE s.impact END,
+        confidence = CASE WHEN u.rice_score > s.rice_score THEN u.confidence ELSE s.confidence END,
+        effort = CASE WHEN u.rice_score > s.rice_score THEN u.effort ELSE s.effort END,
+        rice_score = GREATEST(s.rice_score, u.rice_score)
+    FROM jsonb_to_recordset(merges) AS u(
+        id UUID,
+        feedback_ids UUID[],
+        reach FLOAT,
+        impact FLOAT,
+        confidence FLOAT,
+        effort FLOAT,
+        rice_score FLOAT
+    )
+    WHERE s.id = u.id
+    RETURNING s.*;
+END;$$;
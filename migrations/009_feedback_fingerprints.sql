@@ -0,0 +1,63 @@
+-- Détection des feedbacks dupliqués à l'upload et à l'ingestion
+
+-- Empreinte exacte (sha256) du fichier ou du contenu textuel de chaque feedback
+CREATE TABLE IF NOT EXISTS public.feedback_fingerprints (
+    content_hash TEXT PRIMARY KEY,
+    feedback_id UUID NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_feedback_fingerprints_feedback_id
+    ON public.feedback_fingerprints (feedback_id);
+
+-- Empreintes des segments ingérés : hash exact, signature MinHash et clés
+-- des bandes LSH (index GIN) pour retrouver les quasi-doublons
+CREATE TABLE IF NOT EXISTS public.chunk_fingerprints (
+    id BIGSERIAL PRIMARY KEY,
+    feedback_id UUID NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+    chunk_hash TEXT NOT NULL,
+    signature BIGINT[] NOT NULL,
+    bands TEXT[] NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_chunk_fingerprints_chunk_hash
+    ON public.chunk_fingerprints (chunk_hash);
+
+CREATE INDEX IF NOT EXISTS idx_chunk_fingerprints_bands
+    ON public.chunk_fingerprints USING GIN (bands);
+
+CREATE INDEX IF NOT EXISTS idx_chunk_fingerprints_feedback_id
+    ON public.chunk_fingerprints (feedback_id);
+
+-- Segments d'autres feedbacks de même hash ou partageant une bande LSH
+-- avec les segments d'un lot (une requête par lot de segments)
+CREATE OR REPLACE FUNCTION match_chunk_fingerprints(
+    chunk_hashes TEXT[],
+    bands TEXT[],
+    exclude_feedback_id UUID DEFAULT NULL
+)
+RETURNS TABLE(
+    feedback_id UUID,
+    chunk_hash TEXT,
+    signature BIGINT[],
+    bands TEXT[]
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.feedback_id, c.chunk_hash, c.signature, c.bands
+    FROM chunk_fingerprints c
+    WHERE (c.chunk_hash = ANY(match_chunk_fingerprints.chunk_hashes)
+           OR c.bands && match_chunk_fingerprints.bands)
+      AND (exclude_feedback_id IS NULL OR c.feedback_id <> exclude_feedback_id);
+$$;
+
+ALTER TABLE feedback_fingerprints ENABLE ROW LEVEL SECURITY;
+ALTER TABLE chunk_fingerprints ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to feedback_fingerprints" ON feedback_fingerprints
+    USING (auth.role() = 'service_role');
+
+CREATE POLICY "Allow service role full access to chunk_fingerprints" ON chunk_fingerprints
+    USING (auth.role() = 'service_role');
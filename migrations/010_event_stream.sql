@@ -0,0 +1,75 @@
+-- Flux d'événements temps réel (SSE, WebSocket) alimenté par LISTEN/NOTIFY
+
+-- Notification des stories réduite aux champs utiles aux abonnés : le
+-- contenu complet d'une story (description, critères d'acceptation) peut
+-- dépasser la limite de 8000 octets d'une notification et faire échouer l'écriture
+-- Les mises à jour groupées de bulk_update_story_scores ne notifient pas
+-- chaque story : une seule notification RESCORE est émise par lot
+CREATE OR REPLACE FUNCTION notify_story_changes()
+RETURNS TRIGGER AS $$BEGIN
+  IF TG_OP = 'UPDATE' AND current_setting('app.bulk_story_update', TRUE) = 'on' THEN
+    RETURN NEW;
+  END IF;
+  PERFORM pg_notify(
+    'stories',
+    json_build_object(
+      'type', TG_OP,
+      'record', json_build_object(
+        'id', NEW.id,
+        'title', NEW.title,
+        'themes', NEW.themes,
+        'feedback_ids', NEW.feedback_ids,
+        'rice_score', NEW.rice_score,
+        'status', NEW.status,
+        'updated_at', NEW.updated_at
+      )
+    )::text
+  );
+  RETURN NEW;
+END;$$ LANGUAGE plpgsql;
+
+-- Recalcul des scores d'un lot de stories (voir 007_story_rescoring.sql),
+-- notifié en une fois : les abonnés rechargent le backlog plutôt que de
+-- recevoir une notification par story
+CREATE OR REPLACE FUNCTION bulk_update_story_scores(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    updated_count INTEGER;
+BEGIN
+    PERFORM set_config('app.bulk_story_update', 'on', TRUE);
+
+    UPDATE stories s
+    SET
+        reach = u.reach,
+        impact = u.impact,
+        confidence = u.confidence,
+        effort = u.effort,
+        rice_score = u.rice_score
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID,
+        reach FLOAT,
+        impact FLOAT,
+        confidence FLOAT,
+        effort FLOAT,
+        rice_score FLOAT
+    )
+    WHERE s.id = u.id;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    PERFORM set_config('app.bulk_story_update', 'off', TRUE);
+    PERFORM pg_notify('stories', json_build_object('type', 'RESCORE', 'count', updated_count)::text);
+    RETURN updated_count;
+END;$$;
+
+-- Avancement du pipeline publié par les workers, relayé aux abonnés de
+-- tous les processus de l'API
+CREATE OR REPLACE FUNCTION notify_pipeline_event(event JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    SELECT pg_notify('pipeline', event::text);
+$$;
+
+-- Seul le service (workers) publie l'avancement
+REVOKE EXECUTE ON FUNCTION notify_pipeline_event(JSONB) FROM PUBLIC, anon, authenticated;
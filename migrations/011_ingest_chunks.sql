@@ -0,0 +1,35 @@
+-- Segments d'un feedback relus par pages par le nœud d'extraction, et
+-- remplacement des segments d'une ingestion précédente une fois la nouvelle
+-- ingestion terminée (métadonnées `chunk` et `ingest_run`)
+CREATE INDEX IF NOT EXISTS idx_documents_namespace_chunk
+    ON public.documents ((metadata->>'namespace'), ((metadata->>'chunk')::INTEGER))
+    WHERE metadata ? 'chunk';
+
+-- Page de segments d'un espace de noms, par numéro croissant (pagination par clé)
+CREATE OR REPLACE FUNCTION list_namespace_chunks(ns TEXT, after_chunk INTEGER, batch_size INTEGER)
+RETURNS TABLE(content TEXT, metadata JSONB)
+LANGUAGE sql STABLE
+AS $$
+    SELECT documents.content, documents.metadata
+    FROM documents
+    WHERE documents.metadata->>'namespace' = ns
+      AND documents.metadata ? 'chunk'
+      AND (documents.metadata->>'chunk')::INTEGER > after_chunk
+    ORDER BY (documents.metadata->>'chunk')::INTEGER
+    LIMIT batch_size;
+$$;
+
+-- Suppression des segments d'un espace de noms issus d'une autre ingestion
+CREATE OR REPLACE FUNCTION delete_stale_chunks(ns TEXT, current_run TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    deleted_count INTEGER;
+BEGIN
+    DELETE FROM documents
+    WHERE metadata->>'namespace' = ns
+      AND metadata->>'ingest_run' IS DISTINCT FROM current_run;
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;$$;
@@ -0,0 +1,16 @@
+-- Mise à jour en une requête des métadonnées des documents de plusieurs
+-- espaces de noms (score RICE et feedbacks d'une story fusionnée)
+CREATE OR REPLACE FUNCTION update_documents_metadata(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE documents d
+    SET metadata = d.metadata || u.patch
+    FROM jsonb_to_recordset(updates) AS u(namespace TEXT, patch JSONB)
+    WHERE d.metadata->>'namespace' = u.namespace;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;$$;
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Benchmark du scoring RICE vectorisé contre le calcul story par story
+
+Génère des paramètres RICE aléatoires, puis mesure le temps du calcul
+historique (score de chaque story puis tri complet) et celui du calcul
+vectorisé (NumPy puis sélection partielle des k meilleurs scores).
+
+Usage:
+    python scripts/bench_scoring.py --count 50000 --top-k 100
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ai_product_pilot.services.scoring import calculate_rice_scores, top_k_indices
+
+
+def legacy_prioritize(stories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Implémentation historique : score story par story puis tri complet"""
+    for story in stories:
+        normalized_reach = max(0, min(story["reach"], 10))
+        normalized_impact = max(0, min(story["impact"], 10))
+        normalized_confidence = max(0, min(story["confidence"], 10)) / 10
+        normalized_effort = max(0.1, min(story["effort"], 10))
+        story["rice_score"] = round(
+            (normalized_reach * normalized_impact * normalized_confidence) / normalized_effort, 2
+        )
+    return sorted(stories, key=lambda x: x["rice_score"], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50_000, help="Nombre de stories")
+    parser.add_argument("--top-k", type=int, default=100, help="Nombre de stories retenues")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    columns = {
+        "reach": rng.uniform(-1, 12, args.count),
+        "impact": rng.uniform(0, 3, args.count),
+        "confidence": rng.uniform(0, 11, args.count),
+        "effort": rng.uniform(0, 10, args.count),
+    }
+    stories = [
+        {"id": index, **{name: float(values[index]) for name, values in columns.items()}}
+        for index in range(args.count)
+    ]
+
+    legacy_seconds = vectorized_seconds = float("inf")
+    for _ in range(args.repeat):
+        copies = [dict(story) for story in stories]
+        start = time.perf_counter()
+        legacy = legacy_prioritize(copies)
+        legacy_seconds = min(legacy_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scores = calculate_rice_scores(columns["reach"], columns["impact"], columns["confidence"], columns["effort"])
+        top = top_k_indices(scores, args.top_k)
+        vectorized_seconds = min(vectorized_seconds, time.perf_counter() - start)
+
+    if top.tolist() != [story["id"] for story in legacy[:args.top_k]]:
+        raise SystemExit("Les deux implémentations ne retiennent pas les mêmes stories")
+    print(
+        f"{args.count} stories, top {args.top_k}: story par story {legacy_seconds * 1000:.1f} ms, "
+        f"vectorisé {vectorized_seconds * 1000:.1f} ms (x{legacy_seconds / vectorized_seconds:.0f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Recalcule le score RICE de toutes les stories avec le code de scoring actuel
+
+Les paramètres RICE sont réestimés à partir de l'analyse déjà stockée du
+feedback source de chaque story (aucun appel LLM), puis réécrits par lots.
+Nécessite la migration 007_story_rescoring.sql.
+
+Usage:
+    python scripts/rescore_stories.py --batch-size 2000
+    python scripts/rescore_stories.py --dry-run
+"""
+import argparse
+import asyncio
+import json
+
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement avant la configuration de l'application
+load_dotenv()
+
+from ai_product_pilot.lib.supabase import get_supabase_client  # noqa: E402
+from ai_product_pilot.services.rescoring import rescore_stories  # noqa: E402
+
+
+async def print_progress(processed: int, total: int, updated: int) -> None:
+    print(f"\r{processed}/{total} stories traitées, {updated} scores modifiés", end="", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=None, help="Nombre de stories par lot")
+    parser.add_argument("--dry-run", action="store_true", help="Calculer sans écrire les nouveaux scores")
+    args = parser.parse_args()
+
+    summary = asyncio.run(rescore_stories(
+        get_supabase_client(),
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        on_progress=print_progress,
+    ))
+    print()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
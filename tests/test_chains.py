@@ -0,0 +1,52 @@
+import os
+import pytest
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.chains import ChainRegistry, ChainSpec, PromptRegistry
+from ai_product_pilot.lib.llm import close_llm_clients
+from ai_product_pilot.models.insights import ExtractedInsights
+
+
+def test_chain_registry_compiles_once_and_reloads_on_change(tmp_path, monkeypatch):
+    """Test de la compilation unique des chaînes et du rechargement à chaud des prompts"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-test")
+    prompt_file = tmp_path / "extract.txt"
+    prompt_file.write_text("Analyse: {feedback_text}\n{format_instructions}")
+    registry = ChainRegistry(
+        prompts=PromptRegistry(str(tmp_path)),
+        specs={"extract": ChainSpec("extract.txt", "gpt-4o", 0.3, ExtractedInsights)},
+    )
+
+    first = registry.compiled("extract")
+    assert registry.compiled("extract") is first
+    # Les instructions de format sont pré-calculées dans le prompt
+    assert first.prompt.input_variables == ["feedback_text"]
+
+    # Modifier le fichier invalide la chaîne compilée
+    prompt_file.write_text("Résume: {feedback_text}\n{format_instructions}")
+    stat = os.stat(prompt_file)
+    os.utime(prompt_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = registry.compiled("extract")
+    assert reloaded is not first
+    assert reloaded.prompt_version != first.prompt_version
+    # Le modèle de chat reste partagé entre les compilations
+    llm, previous_llm = reloaded.runnable.steps[1], first.runnable.steps[1]
+    assert getattr(llm, "llm", llm) is getattr(previous_llm, "llm", previous_llm)
+
+
+@pytest.mark.asyncio
+async def test_chain_registry_recompiles_after_llm_clients_are_closed(tmp_path, monkeypatch):
+    """Test de la reconstruction des chaînes dont les clients HTTP ont été fermés"""
+    monkeypatch.setattr(settings, "openai_api_key", "sk-test")
+    (tmp_path / "synthesize.txt").write_text("Résume: {summary}")
+    registry = ChainRegistry(
+        prompts=PromptRegistry(str(tmp_path)),
+        specs={"synthesize": ChainSpec("synthesize.txt", "gpt-4o", 0.7)},
+    )
+
+    first = registry.compiled("synthesize")
+    await close_llm_clients()
+
+    reloaded = registry.compiled("synthesize")
+    assert reloaded is not first
+    assert reloaded.prompt_version == first.prompt_version
@@ -0,0 +1,73 @@
+import pytest
+from typing import List
+from langchain_core.embeddings import Embeddings
+from ai_product_pilot.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Faux modèle d'embeddings qui compte les textes envoyés à l'"API" """
+
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.mark.asyncio
+async def test_cached_embeddings_skip_known_texts(tmp_path):
+    """Test du cache : les textes déjà vus ne sont pas renvoyés à l'API"""
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_memory_bytes=1024 * 1024)
+    fake = CountingEmbeddings()
+    embeddings = CachedEmbeddings(fake, cache)
+
+    first = await embeddings.aembed_documents(["abc", "de", "abc"])
+    assert fake.calls == [["abc", "de"]]  # doublon dédoublonné
+    assert first[0] == first[2] == [3.0, 1.0, 0.5]
+
+    second = await embeddings.aembed_documents(["de", "abc"])
+    assert len(fake.calls) == 1
+    assert second == [first[1], first[0]]
+    assert cache.stats()["memory_hits"] == 2
+
+    # Un nouveau processus (cache mémoire vide) relit le stockage persistant
+    restarted = CachedEmbeddings(fake, EmbeddingCache(cache.path, max_memory_bytes=1024 * 1024))
+    assert restarted.embed_query("abc") == [3.0, 1.0, 0.5]
+    assert len(fake.calls) == 1
+    assert restarted.cache.stats()["disk_hits"] == 1
+
+
+def test_embedding_cache_evicts_by_size():
+    """Test de l'éviction LRU bornée par la taille mémoire"""
+    # 3 floats de 4 octets = 12 octets par vecteur : place pour 2 vecteurs
+    cache = EmbeddingCache(None, max_memory_bytes=24)
+    cache.set_many([("a", [1.0, 2.0, 3.0]), ("b", [1.0, 2.0, 3.0])])
+    cache.get_many(["a"])
+    cache.set_many([("c", [1.0, 2.0, 3.0])])
+
+    assert cache.get_many(["a", "b", "c"])[1] is None
+    assert cache.stats()["memory_bytes"] == 24
+
+
+def test_persistent_embedding_cache_evicts_least_recently_read(tmp_path, monkeypatch):
+    """Test de l'éviction du stockage persistant au-delà du nombre maximal de vecteurs"""
+    from types import SimpleNamespace
+    from ai_product_pilot.services import embedding_cache
+
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: next(clock)))
+    # Sans LRU mémoire : toutes les lectures passent par SQLite
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_memory_bytes=0, max_entries=2)
+    cache.set_many([("a", [1.0]), ("b", [2.0])])
+    cache.get_many(["a"])
+    cache.set_many([("c", [3.0])])
+
+    assert cache.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+    with cache._connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 2
@@ -0,0 +1,120 @@
+import json
+import pytest
+from ai_product_pilot.api.event_routes import format_sse
+from ai_product_pilot.services.events import (
+    EventBroker,
+    decode_notification,
+    event_broker,
+    publish_story_changes,
+    rescore_event,
+    story_event,
+    track_progress,
+)
+
+
+def progress(feedback_id, node="ingest"):
+    return {"topic": "progress", "feedback_id": feedback_id, "node": node, "status": "completed"}
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_with_filters():
+    """Test de la diffusion d'un événement à tous les abonnés concernés"""
+    broker = EventBroker(queue_size=10)
+    everything = broker.subscribe()
+    stories_only = broker.subscribe(topics=["stories"])
+    one_feedback = broker.subscribe(feedback_id="fb-1")
+
+    broker.publish(progress("fb-1"))
+    broker.publish(progress("fb-2"))
+    broker.publish(story_event("INSERT", {"id": "s-1", "feedback_ids": ["fb-1"]}))
+
+    assert [(await everything.get())["topic"] for _ in range(3)] == ["progress", "progress", "stories"]
+    assert (await stories_only.get())["type"] == "insert"
+    assert (await one_feedback.get())["feedback_id"] == "fb-1"
+    assert (await one_feedback.get())["story"]["id"] == "s-1"
+
+    broker.unsubscribe(everything)
+    assert broker.subscriber_count == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_events():
+    """Test de la file bornée d'un abonné lent : les plus anciens événements sont écartés"""
+    broker = EventBroker(queue_size=2)
+    subscription = broker.subscribe()
+
+    for node in ("ingest", "extract", "synthesize"):
+        broker.publish(progress("fb-1", node))
+
+    assert subscription.dropped == 1
+    assert [(await subscription.get())["node"] for _ in range(2)] == ["extract", "synthesize"]
+
+
+def test_decode_notification():
+    """Test de la conversion des notifications Postgres en événements"""
+    story = decode_notification("stories", json.dumps({"type": "UPDATE", "record": {"id": "s-1"}}))
+    assert story == {"topic": "stories", "type": "update", "story": {"id": "s-1"}}
+    assert decode_notification("pipeline", json.dumps(progress("fb-1"))) == progress("fb-1")
+    assert decode_notification("stories", json.dumps({"type": "RESCORE", "count": 500})) == rescore_event(500)
+    assert decode_notification("stories", "not json") is None
+
+
+@pytest.mark.asyncio
+async def test_story_changes_published_locally_without_listener():
+    """Test de la diffusion locale des stories écrites (pas d'écoute Postgres configurée)"""
+    subscription = event_broker.subscribe(topics=["stories"], feedback_id="fb-1")
+    try:
+        publish_story_changes("INSERT", [{"id": "s-1", "title": "Export", "feedback_ids": ["fb-1"], "description": "..."}])
+        event_broker.publish(rescore_event(3))
+
+        inserted = await subscription.get()
+        assert inserted["type"] == "insert" and inserted["story"]["id"] == "s-1"
+        assert "description" not in inserted["story"]
+        # Un recalcul groupé est transmis aux abonnés de tous les feedbacks
+        assert (await subscription.get())["type"] == "rescore"
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_track_progress_publishes_node_events():
+    """Test de la publication du début et de la fin d'un nœud du graphe"""
+    async def node(state, config):
+        return {"summary": "ok"}
+
+    subscription = event_broker.subscribe(feedback_id="fb-1")
+    try:
+        tracked = track_progress("synthesize", node)
+        result = await tracked({"feedback_id": "fb-1"}, {"configurable": {"job_id": "job-1"}})
+
+        assert result == {"summary": "ok"}
+        started, completed = await subscription.get(), await subscription.get()
+        assert (started["status"], completed["status"]) == ("started", "completed")
+        assert completed["node"] == "synthesize" and completed["job_id"] == "job-1"
+        assert format_sse(completed).startswith("event: progress\ndata: {")
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_notified_events_fit_in_a_postgres_notification(monkeypatch):
+    """Test de la taille des événements publiés par NOTIFY : texte découpé, événement trop gros écarté"""
+    from unittest.mock import MagicMock
+    from ai_product_pilot.services import events
+
+    client = MagicMock()
+    monkeypatch.setattr(events, "event_listener", object())
+    monkeypatch.setattr(events, "get_supabase_client", lambda: client)
+
+    stream = events.StreamPublisher("fb-1", "generate", flush_seconds=3600)
+    await stream.text("é" * (events.STREAM_TEXT_MAX_CHARS * 2 + 10))
+    await stream.flush()
+    await stream.story(0, {"title": "Export", "description": "x" * 20000, "acceptance_criteria": ["y" * 20000]})
+    await events.publish_event({"topic": "stream", "feedback_id": "fb-1", "type": "text", "text": "z" * 9000})
+
+    published = [call.args[1]["event"] for call in client.rpc.call_args_list]
+    assert [len(event.get("text", "")) for event in published] == [events.STREAM_TEXT_MAX_CHARS, events.STREAM_TEXT_MAX_CHARS, 10, 0]
+    assert published[-1]["story"] == {"title": "Export", "as_a": None, "i_want": None, "so_that": None, "themes": None}
+    assert all(
+        len(json.dumps(event, ensure_ascii=False).encode("utf-8")) <= events.NOTIFY_MAX_BYTES for event in published
+    )
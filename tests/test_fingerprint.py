@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import MagicMock
+from ai_product_pilot.services.fingerprint import (
+    LSH_BANDS,
+    chunk_fingerprints,
+    content_hash,
+    estimate_similarity,
+    find_duplicate_chunks,
+    minhash_signature,
+)
+
+TEXT = (
+    "Après la mise à jour, l'application plante systématiquement quand j'essaie "
+    "d'exporter mes données en PDF sur Android 12. La recherche avancée est aussi "
+    "devenue beaucoup plus lente qu'avant, surtout sur les gros projets."
+)
+
+
+def test_minhash_estimates_similarity():
+    """Test de l'estimation de similarité MinHash entre quasi-doublons et textes différents"""
+    near_duplicate = TEXT.replace("Android 12", "Android 13") + " Merci !"
+    different = "Le nouveau dashboard est superbe, bravo pour les tags automatiques et la vitesse."
+
+    signature = minhash_signature(TEXT)
+    assert estimate_similarity(signature, minhash_signature(TEXT)) == 1.0
+    assert estimate_similarity(signature, minhash_signature(near_duplicate)) > 0.6
+    assert estimate_similarity(signature, minhash_signature(different)) < 0.2
+    assert content_hash("  export  ") == content_hash(b"export")
+
+
+def test_find_duplicate_chunks_uses_hash_and_lsh_candidates():
+    """Test de la détection des segments exacts et quasi identiques déjà traités"""
+    near_duplicate = TEXT.replace("gros projets", "gros projets.")
+    new_chunk = "Pourquoi avoir supprimé l'accès rapide aux statistiques ? C'était vraiment pratique."
+    known = chunk_fingerprints([TEXT.upper()])[0]
+
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value.data = [{"feedback_id": "other", **known}]
+
+    fingerprints = chunk_fingerprints([near_duplicate, new_chunk])
+    assert all(len(fingerprint["bands"]) == LSH_BANDS for fingerprint in fingerprints)
+    assert find_duplicate_chunks(supabase, "feedback-1", fingerprints, threshold=0.8) == [True, False]
+
+    name, params = supabase.rpc.call_args.args
+    assert name == "match_chunk_fingerprints"
+    assert params["exclude_feedback_id"] == "feedback-1"
+    assert find_duplicate_chunks(supabase, "feedback-1", [], threshold=0.8) == []
+
+
+@pytest.mark.asyncio
+async def test_duplicate_upload_returns_existing_feedback_with_null_columns(monkeypatch):
+    """Test du renvoi d'un feedback existant dont les colonnes facultatives sont nulles"""
+    from ai_product_pilot.api import feedback_routes
+    from ai_product_pilot.core.settings import settings
+
+    monkeypatch.setattr(settings, "feedback_dedup_enabled", True)
+    existing = {
+        "id": "fb-1", "title": "Retours", "description": None, "source": "email",
+        "file_path": None, "content": "Export trop lent", "status": "completed",
+    }
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = [
+        {"feedback": existing}
+    ]
+
+    response = await feedback_routes.upload_feedback(
+        title="Retours", description=None, source="email", file=None, content="Export trop lent", supabase=supabase
+    )
+
+    assert response.duplicate and response.id == "fb-1"
+    assert response.description is None and response.file_path is None
+    supabase.table.return_value.insert.assert_not_called()
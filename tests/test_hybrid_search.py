@@ -0,0 +1,23 @@
+from ai_product_pilot.services.hybrid_search import is_keyword_query, reciprocal_rank_fusion
+
+
+def test_is_keyword_query():
+    """Test de la détection des requêtes de type mot-clé"""
+    assert is_keyword_query("#4528")
+    assert is_keyword_query("bug #4528 export")
+    assert is_keyword_query("crash PROJ-123")
+    assert is_keyword_query('"export pdf"')
+    assert not is_keyword_query("dark-mode")
+    assert not is_keyword_query("export")
+    assert not is_keyword_query("pourquoi les utilisateurs abandonnent l'onboarding")
+
+
+def test_reciprocal_rank_fusion_favors_documents_ranked_by_both():
+    """Test de la fusion RRF : un document bien classé par les deux recherches passe en tête"""
+    lexical = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    semantic = [{"id": "d"}, {"id": "b"}, {"id": "e"}]
+
+    fused = reciprocal_rank_fusion([lexical, semantic])
+    assert fused[0]["id"] == "b"
+    assert len(fused) == 5
+    assert fused[0]["similarity"] > fused[-1]["similarity"]
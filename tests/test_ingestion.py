@@ -0,0 +1,100 @@
+import json
+import pytest
+from ai_product_pilot.services.ingestion import (
+    IngestionError,
+    iter_batches,
+    iter_chunks,
+    iter_csv_records,
+    iter_json_records,
+    iter_lines,
+    iter_text,
+)
+
+
+def _byte_stream(data: bytes, size: int = 7):
+    """Découpe des octets en petits blocs pour simuler un téléchargement en flux"""
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_iter_text_handles_split_multibyte_characters():
+    """Test du décodage incrémental d'un caractère UTF-8 coupé entre deux blocs"""
+    data = "Réponse très détaillée".encode("utf-8")
+    assert "".join(iter_text(_byte_stream(data, size=1))) == "Réponse très détaillée"
+
+
+def test_iter_csv_records_streams_rows():
+    """Test de la lecture d'un CSV en flux, champs multi-lignes inclus"""
+    data = 'note,commentaire\n5,"Super, rapide"\n2,"Lent\nsur mobile"\n'.encode("utf-8")
+    records = list(iter_csv_records(_byte_stream(data), max_record_chars=1000))
+    assert records == [
+        "note: 5, commentaire: Super, rapide",
+        "note: 2, commentaire: Lent\nsur mobile",
+    ]
+
+
+def test_iter_json_records_streams_array_elements():
+    """Test du parsing élément par élément d'un tableau JSON"""
+    items = [{"id": i, "texte": f"avis {i}"} for i in range(20)] + [42, "fin"]
+    data = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    records = list(iter_json_records(_byte_stream(data), max_record_chars=1000))
+    assert [json.loads(record) for record in records] == items
+
+
+def test_iter_json_records_supports_ndjson_and_single_document():
+    """Test des formats NDJSON et document JSON unique"""
+    ndjson = b'{"a": 1}\n\n{"a": 2}\n'
+    assert list(iter_json_records(_byte_stream(ndjson), max_record_chars=1000)) == ['{"a": 1}', '{"a": 2}']
+
+    document = b'{\n  "a": [1, 2]\n}\n'
+    records = list(iter_json_records(_byte_stream(document), max_record_chars=1000))
+    assert json.loads(records[0]) == {"a": [1, 2]}
+
+
+def test_iter_json_records_rejects_oversized_element():
+    """Test de la borne mémoire sur la taille d'un élément JSON"""
+    data = json.dumps([{"texte": "x" * 500}]).encode("utf-8")
+    with pytest.raises(IngestionError):
+        list(iter_json_records(_byte_stream(data), max_record_chars=100))
+
+
+def test_readers_reject_oversized_records():
+    """Test de la borne sur la taille d'une ligne CSV, NDJSON ou texte"""
+    with pytest.raises(IngestionError):
+        list(iter_csv_records(_byte_stream(b"note,commentaire\n5," + b"x" * 500 + b"\n"), max_record_chars=100))
+    with pytest.raises(IngestionError):
+        list(iter_json_records(_byte_stream(b'{"a": 1}\n{"a": "' + b"x" * 500 + b'"}\n'), max_record_chars=100))
+    assert list(iter_lines(["ab\ncd", "ef\n", "g"], max_line_chars=4)) == ["ab\n", "cdef\n", "g"]
+
+
+def test_iter_json_records_parses_large_element_in_linear_time():
+    """Test du parsing d'un élément réparti sur de nombreux blocs, sans décodage répété à chaque bloc"""
+    items = [{"texte": "x" * 200_000}, {"texte": "fin"}]
+    data = json.dumps(items).encode("utf-8")
+    attempts = 0
+    decode = json.JSONDecoder.raw_decode
+
+    def counting_decode(self, s, idx=0):
+        nonlocal attempts
+        attempts += 1
+        return decode(self, s, idx)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_decode)
+        records = list(iter_json_records(_byte_stream(data, size=100), max_record_chars=1_000_000))
+    assert [json.loads(record) for record in records] == items
+    assert attempts < 50
+
+
+def test_iter_chunks_and_batches_are_bounded():
+    """Test du découpage en segments et lots de taille bornée"""
+    records = (f"enregistrement {i} " * 10 for i in range(200))
+
+    def split_text(text):
+        return [text[i:i + 300] for i in range(0, len(text), 300)]
+
+    chunks = list(iter_chunks(records, split_text, separator="\n\n", buffer_chars=1000))
+    assert all(len(chunk) <= 300 for chunk in chunks)
+
+    batches = list(iter_batches(chunks, max_batch_bytes=1000))
+    assert sum(len(batch) for batch in batches) == len(chunks)
+    assert all(sum(len(chunk) for chunk in batch) <= 1000 for batch in batches)
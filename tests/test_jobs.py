@@ -0,0 +1,199 @@
+import pytest
+import asyncio
+import time
+from ai_product_pilot.services.jobs import JobQueue, JobStore, job_handler
+
+
+@job_handler("test_pipeline")
+async def _pipeline_handler(job, context):
+    for stage in job["payload"]["stages"]:
+        await context.start_stage(stage)
+        await context.complete_stage(stage)
+    return {"done": True}
+
+
+@pytest.mark.asyncio
+async def test_job_queue_runs_and_records_stages(tmp_path):
+    """Test d'exécution d'un job par le pool de workers"""
+    queue = JobQueue(
+        path=str(tmp_path / "jobs.sqlite3"),
+        concurrency=2,
+        poll_interval=0.05,
+        lease_seconds=5,
+        max_attempts=3,
+    )
+    await queue.start()
+    try:
+        job = await queue.enqueue("test_pipeline", {"stages": ["ingest", "extract"]})
+        assert job["status"] == "queued"
+
+        # Attendre la fin du job
+        for _ in range(100):
+            job = await queue.get(job["id"])
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await queue.stop()
+
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"done": True}
+    assert [stage["name"] for stage in job["stages"]] == ["ingest", "extract"]
+    assert job["stage"] == "extract"
+
+
+def test_job_store_reclaims_expired_lease(tmp_path):
+    """Test de reprise d'un job abandonné par un processus arrêté"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = store.create("test_pipeline", {"stages": []})
+
+    # Un premier worker réserve le job puis "meurt" (bail très court)
+    claimed = store.claim("worker-a", lease_seconds=0.01, max_attempts=3)
+    assert claimed["id"] == job["id"]
+    assert claimed["status"] == "running"
+
+    time.sleep(0.05)
+    reclaimed = store.claim("worker-b", lease_seconds=5, max_attempts=3)
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["worker_id"] == "worker-b"
+    assert reclaimed["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_feedback_batch_job_reports_per_item_outcomes(tmp_path):
+    """Test du traitement d'un lot : concurrence bornée et résultat par feedback"""
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from langchain_core.runnables import RunnableLambda
+    from ai_product_pilot.langgraph import runner
+    from ai_product_pilot.services.jobs import JobContext
+
+    running = {"current": 0, "max": 0}
+
+    async def fake_graph(state):
+        running["current"] += 1
+        running["max"] = max(running["max"], running["current"])
+        await asyncio.sleep(0.01)
+        running["current"] -= 1
+        if state["feedback_id"] == "f2":
+            raise RuntimeError("LLM indisponible")
+        return {**state, "stories": [{}, {}]}
+
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [
+        {"id": "f1"}, {"id": "f2"}, {"id": "f3"},
+    ]
+
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = store.create(runner.PROCESS_FEEDBACK_BATCH_JOB, {
+        "feedback_ids": ["f1", "f2", "f3", "absent"], "max_concurrency": 2,
+    })
+
+    with patch.object(runner, "get_supabase_client", return_value=supabase), \
+         patch.object(runner, "get_feedback_graph", AsyncMock(return_value=RunnableLambda(fake_graph))), \
+         patch.object(runner, "delete_feedback_checkpoints", AsyncMock()) as delete_checkpoints:
+        result = await runner.run_feedback_batch_job(job, JobContext(store, job))
+
+    assert running["max"] == 2
+    assert (result["total"], result["succeeded"], result["failed"]) == (4, 2, 2)
+    assert [item["status"] for item in result["items"]] == ["succeeded", "failed", "succeeded", "failed"]
+    assert result["items"][0]["stories_count"] == 2
+    assert result["items"][1]["error"] == "LLM indisponible"
+    supabase.table.return_value.update.assert_called_once_with({"status": "error", "error": "LLM indisponible"})
+    assert store.get(job["id"])["stage"] == "3/3"
+    # Les checkpoints du feedback en échec sont conservés pour une reprise
+    assert [c.args[0] for c in delete_checkpoints.await_args_list].count("f2") == 1
+
+
+@pytest.mark.asyncio
+async def test_feedback_job_resumes_from_failed_node(tmp_path, monkeypatch):
+    """Test de la reprise d'un traitement en échec : seuls le nœud en échec et les suivants sont rejoués"""
+    from unittest.mock import MagicMock, patch
+    from ai_product_pilot.core.settings import settings
+    from ai_product_pilot.langgraph import graph, runner
+    from ai_product_pilot.services.jobs import JobContext
+
+    calls = {"ingest": 0, "extract": 0, "synthesize": 0, "generate": 0, "prioritize": 0}
+
+    def fake_node(name, update):
+        async def node(state):
+            calls[name] += 1
+            if name == "generate" and calls[name] == 1:
+                raise RuntimeError("LLM indisponible")
+            return update
+        return node
+
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path))
+    monkeypatch.setattr(graph, "ingest_feedback", fake_node("ingest", {"docs": [{"content": "x"}], "chunk_count": 1}))
+    monkeypatch.setattr(graph, "extract_insights", fake_node("extract", {"entities": {"themes": ["export"]}}))
+    monkeypatch.setattr(graph, "synthesize_insights", fake_node("synthesize", {"summary": "résumé"}))
+    monkeypatch.setattr(graph, "generate_stories", fake_node("generate", {"stories": [{}, {}]}))
+    monkeypatch.setattr(graph, "prioritize_stories", fake_node("prioritize", {"stories": [{}, {}]}))
+
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [{"id": "f1"}]
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    try:
+        with patch.object(runner, "get_supabase_client", return_value=supabase):
+            failed = store.create(runner.PROCESS_FEEDBACK_JOB, {"feedback_id": "f1"})
+            with pytest.raises(RuntimeError):
+                await runner.run_feedback_job(failed, JobContext(store, failed))
+
+            resumed = store.create(runner.PROCESS_FEEDBACK_JOB, {"feedback_id": "f1", "resume": True})
+            result = await runner.run_feedback_job(resumed, JobContext(store, resumed))
+
+        assert result == {"feedback_id": "f1", "stories_count": 2, "resumed_from": "generate"}
+        assert calls == {"ingest": 1, "extract": 1, "synthesize": 1, "generate": 2, "prioritize": 1}
+        # Les checkpoints d'un traitement terminé sont supprimés
+        snapshot = await (await graph.get_feedback_graph()).aget_state(graph.checkpoint_config("f1"))
+        assert not snapshot.next and not snapshot.values
+    finally:
+        await graph.close_feedback_graph()
+
+
+def test_create_exclusive_refuses_feedback_already_in_progress(tmp_path):
+    """Test de l'exclusivité des reprises : un seul job actif par feedback, seul ou dans un lot"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    first = store.create_exclusive("process_feedback", {"feedback_id": "f1", "resume": True}, ["f1"])
+    assert first is not None
+    assert store.create_exclusive("process_feedback", {"feedback_id": "f1", "resume": True}, ["f1"]) is None
+
+    store.create("process_feedback_batch", {"feedback_ids": ["f2", "f3"]})
+    assert store.has_active_job("f3")
+    assert store.create_exclusive("process_feedback", {"feedback_id": "f3"}, ["f3"]) is None
+
+    # Une fois le job terminé, le feedback peut de nouveau être repris
+    store.fail(first["id"], "LLM indisponible")
+    assert not store.has_active_job("f1")
+    assert store.create_exclusive("process_feedback", {"feedback_id": "f1"}, ["f1"]) is not None
+
+
+@pytest.mark.asyncio
+async def test_process_feedback_rejects_feedback_already_in_progress(tmp_path, monkeypatch):
+    """Test de l'exclusivité des traitements : un second lancement pour un feedback en cours est refusé"""
+    from unittest.mock import MagicMock
+    from fastapi import HTTPException
+    from ai_product_pilot.api import feedback_routes
+    from ai_product_pilot.models.feedback import BatchProcessRequest
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), concurrency=1, poll_interval=0.05, lease_seconds=5, max_attempts=3)
+    monkeypatch.setattr(feedback_routes, "job_queue", queue)
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [{"id": "f1"}]
+
+    accepted = await feedback_routes.process_feedback("f1", supabase=supabase)
+    assert (await queue.get(accepted.job_id))["status"] == "queued"
+
+    with pytest.raises(HTTPException) as error:
+        await feedback_routes.process_feedback("f1", supabase=supabase)
+    assert error.value.status_code == 409
+
+    with pytest.raises(HTTPException) as error:
+        await feedback_routes.process_feedback_batch(
+            BatchProcessRequest(feedback_ids=["f2", "f1"]), supabase=supabase
+        )
+    assert error.value.status_code == 409
+    # Un seul job créé : ni le second traitement, ni le lot
+    assert queue.store.create_exclusive("process_feedback", {"feedback_id": "f2"}, ["f2"]) is not None
+    assert not await queue.has_active_jobs(["f3"])
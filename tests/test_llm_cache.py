@@ -0,0 +1,46 @@
+import time
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from ai_product_pilot.services.llm_cache import LLM_CACHE_BYPASS, CachedChatModel, LLMCache
+
+
+@pytest.mark.asyncio
+async def test_cached_chat_model_reuses_responses(tmp_path):
+    """Test du cache LLM : un prompt identique n'est pas renvoyé au modèle"""
+    path = str(tmp_path / "llm_cache.sqlite3")
+    fake = FakeListChatModel(responses=["réponse 1", "réponse 2", "réponse 3"])
+    prompt = ChatPromptTemplate.from_template("Résume: {text}")
+    chain = prompt | CachedChatModel(fake, LLMCache(path, 3600, 1024 * 1024, 16), "gpt-4o", 0.3, "v1")
+
+    assert (await chain.ainvoke({"text": "a"})).content == "réponse 1"
+    assert (await chain.ainvoke({"text": "a"})).content == "réponse 1"
+    assert fake.i == 1
+
+    # Le bypass force un nouvel appel et rafraîchit l'entrée
+    bypass = {"configurable": {LLM_CACHE_BYPASS: True}}
+    assert (await chain.ainvoke({"text": "a"}, config=bypass)).content == "réponse 2"
+    assert (await chain.ainvoke({"text": "a"})).content == "réponse 2"
+
+    # Un autre processus relit le stockage persistant ; une autre version du prompt est un miss
+    restarted = LLMCache(path, 3600, 1024 * 1024, 16)
+    assert (prompt | CachedChatModel(fake, restarted, "gpt-4o", 0.3, "v1")).invoke({"text": "a"}).content == "réponse 2"
+    assert (prompt | CachedChatModel(fake, restarted, "gpt-4o", 0.3, "v2")).invoke({"text": "a"}).content == "réponse 3"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["hit_rate"] == 0.5
+
+
+def test_llm_cache_ttl_and_size_eviction(tmp_path, monkeypatch):
+    """Test de l'expiration et de l'éviction par taille du stockage persistant"""
+    cache = LLMCache(str(tmp_path / "llm_cache.sqlite3"), ttl_seconds=60, max_bytes=10, memory_entries=0)
+    cache.set("a", "gpt-4o", "12345")
+    cache.set("b", "gpt-4o", "12345")
+    cache.get("a")
+    cache.set("c", "gpt-4o", "12345")
+    # "b" est l'entrée la moins récemment lue
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("c") is None
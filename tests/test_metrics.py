@@ -0,0 +1,48 @@
+import pytest
+from prometheus_client import REGISTRY
+from ai_product_pilot.core.metrics import instrument_node
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_instrument_node_records_runs_errors_and_latency():
+    """Test de l'instrumentation d'un nœud : exécutions, erreurs et durée"""
+    calls = []
+
+    async def node(state):
+        calls.append(state)
+        if state.get("fail"):
+            raise RuntimeError("échec")
+        return {**state, "done": True}
+
+    instrumented = instrument_node("test_node", node)
+    labels = {"node": "test_node"}
+    runs = _sample("pipeline_node_runs_total", labels)
+    errors = _sample("pipeline_node_errors_total", labels)
+
+    assert await instrumented({"a": 1}, {}) == {"a": 1, "done": True}
+    with pytest.raises(RuntimeError):
+        await instrumented({"fail": True}, {})
+
+    assert _sample("pipeline_node_runs_total", labels) == runs + 2
+    assert _sample("pipeline_node_errors_total", labels) == errors + 1
+    assert _sample("pipeline_node_duration_seconds_count", labels) >= 2
+
+
+def test_supabase_client_and_metrics_endpoint(monkeypatch):
+    """Test de l'instrumentation des sessions Supabase et de l'endpoint /metrics"""
+    import httpx
+    from fastapi.testclient import TestClient
+    from ai_product_pilot.__main__ import app
+    from ai_product_pilot.core.metrics import supabase_event_hooks
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    with httpx.Client(transport=transport, event_hooks=supabase_event_hooks("postgrest")) as client:
+        client.get("http://supabase.test/rest/v1/feedback")
+
+    body = TestClient(app).get("/metrics").text
+    assert 'supabase_requests_total{method="GET",service="postgrest",status="200"}' in body
+    assert "pipeline_node_duration_seconds" in body
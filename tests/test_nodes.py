@@ -1,6 +1,9 @@
 import pytest
 import asyncio
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.langgraph.nodes.extract import ExtractedInsights, iter_groups, merge_insights
+from ai_product_pilot.langgraph.nodes.ingest import ingest_feedback
 from ai_product_pilot.langgraph.nodes.prioritize import prioritize_stories
 
 
@@ -33,13 +36,23 @@ async def test_prioritize_stories_node():
                 "acceptance_criteria": ["Temps de compilation réduit de 50%"],
                 "themes": ["performance"],
                 "feedback_ids": ["test-feedback-id"]
+            },
+            {
+                "title": "Clarifier la page de tarification",
+                "as_a": "prospect",
+                "i_want": "comprendre les offres",
+                "so_that": "je choisisse le bon plan",
+                "description": "Les utilisateurs trouvent la tarification confuse",
+                "acceptance_criteria": ["Comparatif des offres visible"],
+                "themes": ["pricing"],
+                "feedback_ids": ["test-feedback-id"]
             }
         ]
     }
     
     # Mock du client Supabase et du service VectorStore
-    with patch("app.langgraph.nodes.prioritize.get_supabase_client") as mock_supabase, \
-         patch("app.langgraph.nodes.prioritize.VectorStoreService") as mock_vector_store:
+    with patch("ai_product_pilot.langgraph.nodes.prioritize.get_supabase_client") as mock_supabase, \
+         patch("ai_product_pilot.langgraph.nodes.prioritize.VectorStoreService") as mock_vector_store:
         
         # Configurer les mocks
         mock_supabase_instance = MagicMock()
@@ -53,7 +66,9 @@ async def test_prioritize_stories_node():
         mock_supabase.return_value = mock_supabase_instance
         
         mock_vector_store_instance = MagicMock()
-        mock_vector_store_instance.add_documents = MagicMock()
+        mock_vector_store_instance.add_documents = AsyncMock(side_effect=lambda texts, metadatas, **kwargs: [m["id"] for m in metadatas])
+        mock_vector_store_instance.embed_documents = AsyncMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+        mock_vector_store_instance.find_similar = AsyncMock(side_effect=lambda embeddings, *args, **kwargs: [None] * len(embeddings))
         mock_vector_store.return_value = mock_vector_store_instance
         
         # Exécuter le nœud
@@ -61,17 +76,241 @@ async def test_prioritize_stories_node():
         
         # Vérifications
         assert "stories" in result_state
-        assert len(result_state["stories"]) == 1
+        assert len(result_state["stories"]) == 2
         
         # Vérifier que le score RICE a été calculé
         assert "rice_score" in result_state["stories"][0]
         assert result_state["stories"][0]["rice_score"] > 0
         
-        # Vérifier que la story a été insérée dans la base de données
+        # Vérifier que les stories ont été insérées en une seule requête
         mock_table.insert.assert_called_once()
+        assert len(mock_table.insert.call_args.args[0]) == 2
         
         # Vérifier que le statut du feedback a été mis à jour
         mock_table.update.assert_called()
         
-        # Vérifier que la story a été vectorisée
-        mock_vector_store_instance.add_documents.assert_called_once()
\ No newline at end of file
+        # Vérifier que les stories ont été vectorisées en un seul lot
+        mock_vector_store_instance.add_documents.assert_called_once()
+        assert len(mock_vector_store_instance.add_documents.call_args.kwargs["texts"]) == 2
+
+@pytest.mark.asyncio
+async def test_prioritize_stories_rolls_back_on_vector_failure():
+    """Test de l'annulation de l'insertion si la vectorisation échoue"""
+    
+    input_state = {
+        "feedback_id": "test-feedback-id",
+        "feedback_data": {"id": "test-feedback-id", "title": "Test Feedback", "source": "test"},
+        "docs": [],
+        "entities": {"themes": ["performance"], "sentiments": {"performance": -0.7}, "user_personas": []},
+        "summary": "",
+        "stories": [
+            {
+                "title": "Améliorer les performances",
+                "as_a": "utilisateur",
+                "i_want": "une application rapide",
+                "so_that": "je gagne du temps",
+                "description": "L'application est lente",
+                "acceptance_criteria": ["Temps de chargement < 1s"],
+                "themes": ["performance"],
+                "feedback_ids": ["test-feedback-id"]
+            }
+        ]
+    }
+    
+    with patch("ai_product_pilot.langgraph.nodes.prioritize.get_supabase_client") as mock_supabase, \
+         patch("ai_product_pilot.langgraph.nodes.prioritize.VectorStoreService") as mock_vector_store:
+        
+        mock_table = MagicMock()
+        mock_table.insert.return_value = mock_table
+        mock_table.delete.return_value = mock_table
+        mock_table.in_.return_value = mock_table
+        mock_supabase.return_value.table.return_value = mock_table
+        
+        mock_vector_store.return_value.embed_documents = AsyncMock(return_value=[[0.1, 0.2]])
+        mock_vector_store.return_value.find_similar = AsyncMock(return_value=[None])
+        mock_vector_store.return_value.add_documents = AsyncMock(side_effect=RuntimeError("embedding API down"))
+        
+        with pytest.raises(RuntimeError, match="embedding API down"):
+            await prioritize_stories(input_state)
+        
+        # Les stories insérées doivent être supprimées
+        mock_table.insert.assert_called_once()
+        mock_table.delete.assert_called_once()
+        inserted_ids = [story["id"] for story in mock_table.insert.call_args.args[0]]
+        mock_table.in_.assert_called_once_with("id", inserted_ids)
+        
+        # Le statut du feedback n'est pas passé à "completed"
+        mock_table.update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_prioritize_stories_merges_duplicates():
+    """Test de la fusion des stories quasi identiques à une story existante"""
+    
+    story = {
+        "as_a": "utilisateur",
+        "i_want": "une application rapide",
+        "so_that": "je gagne du temps",
+        "description": "L'application est lente",
+        "acceptance_criteria": ["Temps de chargement < 1s"],
+        "themes": ["performance"],
+        "feedback_ids": ["feedback-2"]
+    }
+    input_state = {
+        "feedback_id": "feedback-2",
+        "feedback_data": {"id": "feedback-2", "title": "Test Feedback", "source": "test"},
+        "docs": [],
+        "entities": {"themes": ["performance"], "sentiments": {"performance": -0.7}, "user_personas": []},
+        "summary": "",
+        "stories": [
+            {**story, "title": "Améliorer les performances mobiles"},
+            {**story, "title": "Exporter en PDF"},
+        ]
+    }
+    
+    with patch("ai_product_pilot.langgraph.nodes.prioritize.get_supabase_client") as mock_supabase, \
+         patch("ai_product_pilot.langgraph.nodes.prioritize.VectorStoreService") as mock_vector_store:
+        
+        supabase = mock_supabase.return_value
+        supabase.rpc.return_value.execute.return_value.data = [
+            {"id": "existing-story", "title": "Améliorer la performance mobile", "rice_score": 9.0}
+        ]
+        vector_store = mock_vector_store.return_value
+        vector_store.embed_documents = AsyncMock(return_value=[[1.0, 0.0], [0.0, 1.0]])
+        vector_store.find_similar = AsyncMock(return_value=[{"id": "existing-story", "similarity": 0.97}, None])
+        vector_store.add_documents = AsyncMock(side_effect=lambda texts, metadatas, **kwargs: [m["id"] for m in metadatas])
+        vector_store.update_metadata_by_namespaces = AsyncMock(return_value=1)
+        
+        result_state = await prioritize_stories(input_state)
+        
+        # Une seule requête de similarité pour toutes les stories du lot
+        vector_store.find_similar.assert_awaited_once()
+        
+        # La story dupliquée est fusionnée, seule la nouvelle est insérée
+        name, params = supabase.rpc.call_args.args
+        assert name == "merge_duplicate_stories"
+        assert params["merges"][0]["id"] == "existing-story"
+        assert params["merges"][0]["feedback_ids"] == ["feedback-2"]
+        inserted = supabase.table.return_value.insert.call_args.args[0]
+        assert [s["title"] for s in inserted] == ["Exporter en PDF"]
+        
+        # Les embeddings déjà calculés sont réutilisés pour l'insertion
+        assert vector_store.add_documents.call_args.kwargs["embeddings"] == [[0.0, 1.0]]
+        assert {s["title"] for s in result_state["stories"]} == {"Exporter en PDF", "Améliorer la performance mobile"}
+        
+        # Le score de la story fusionnée est reporté dans ses métadonnées vectorielles
+        vector_store.update_metadata_by_namespaces.assert_awaited_once_with({"story:existing-story": {"rice_score": 9.0}})
+
+
+@pytest.mark.asyncio
+async def test_iter_groups_covers_all_chunks():
+    """Test du regroupement des segments en textes de taille bornée"""
+    async def docs():
+        for i in range(50):
+            yield {"content": f"segment {i} " + "x" * 90}
+    
+    groups = [group async for group in iter_groups(docs(), max_chars=1000)]
+    
+    assert len(groups) > 1
+    assert all(len(group) <= 1000 for group in groups)
+    assert sum(group.count("segment ") for group in groups) == 50
+
+
+def test_merge_insights_weights_sentiments_by_support():
+    """Test de la fusion déterministe des insights de plusieurs groupes"""
+    first = ExtractedInsights(
+        themes=["Performance", "UI"],
+        sentiments={"Performance": -1.0, "UI": 0.5},
+        pain_points=["Application lente"],
+        feature_requests=["Export PDF"],
+        user_personas=[{"role": "développeur"}],
+        key_metrics={"nps": 40},
+    )
+    second = ExtractedInsights(
+        themes=["performance", "Tarification"],
+        sentiments={"performance": 0.0, "Tarification": -0.5},
+        pain_points=["application  lente", "Prix élevé"],
+        feature_requests=[],
+        user_personas=[{"role": "Développeur"}, {"role": "manager"}],
+        key_metrics={"nps": 50},
+    )
+    
+    merged = merge_insights([(first, 3.0), (second, 1.0)])
+    
+    # "Performance" est soutenu par les deux groupes : il passe en tête
+    assert merged.themes == ["Performance", "UI", "Tarification"]
+    assert merged.sentiments["Performance"] == -0.75  # (-1 * 3 + 0 * 1) / 4
+    assert merged.pain_points == ["Application lente", "Prix élevé"]
+    assert merged.user_personas == [{"role": "développeur"}, {"role": "manager"}]
+    assert merged.key_metrics == {"nps": 42.5}
+
+
+@pytest.mark.asyncio
+async def test_prioritize_stories_inserts_stories_whose_merge_target_was_deleted():
+    """Test de l'insertion des stories dont la story existante correspondante a été supprimée"""
+    
+    story = {
+        "as_a": "utilisateur",
+        "i_want": "une application rapide",
+        "so_that": "je gagne du temps",
+        "description": "L'application est lente",
+        "acceptance_criteria": ["Temps de chargement < 1s"],
+        "themes": ["performance"],
+        "feedback_ids": ["feedback-2"]
+    }
+    input_state = {
+        "feedback_id": "feedback-2",
+        "feedback_data": {"id": "feedback-2", "title": "Test Feedback", "source": "test"},
+        "docs": [],
+        "entities": {"themes": ["performance"], "sentiments": {"performance": -0.7}, "user_personas": []},
+        "summary": "",
+        "stories": [
+            {**story, "title": "Améliorer les performances mobiles"},
+            {**story, "title": "Accélérer l'application mobile"},
+            {**story, "title": "Réduire le temps de démarrage"},
+        ]
+    }
+    
+    with patch("ai_product_pilot.langgraph.nodes.prioritize.get_supabase_client") as mock_supabase, \
+         patch("ai_product_pilot.langgraph.nodes.prioritize.VectorStoreService") as mock_vector_store:
+        
+        supabase = mock_supabase.return_value
+        supabase.rpc.return_value.execute.return_value.data = []
+        vector_store = mock_vector_store.return_value
+        # Les deux premières stories sont quasi identiques entre elles, pas la troisième
+        vector_store.embed_documents = AsyncMock(return_value=[[1.0, 0.0], [0.99, 0.05], [0.6, 0.8]])
+        vector_store.find_similar = AsyncMock(return_value=[{"id": "deleted-story", "similarity": 0.95}] * 3)
+        vector_store.delete_by_namespaces = AsyncMock(return_value=1)
+        vector_store.add_documents = AsyncMock(side_effect=lambda texts, metadatas, **kwargs: [m["id"] for m in metadatas])
+        
+        result_state = await prioritize_stories(input_state)
+        
+        vector_store.delete_by_namespaces.assert_awaited_once_with(["story:deleted-story"])
+        inserted = supabase.table.return_value.insert.call_args.args[0]
+        assert [s["title"] for s in inserted] == ["Améliorer les performances mobiles", "Réduire le temps de démarrage"]
+        assert vector_store.add_documents.call_args.kwargs["embeddings"] == [[1.0, 0.0], [0.6, 0.8]]
+        assert len(result_state["stories"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_ingest_feedback_without_content_ends_in_error(monkeypatch):
+    """Test du statut final d'un feedback vide : il n'est pas analysé ni laissé au statut ingested"""
+    monkeypatch.setattr(settings, "feedback_dedup_enabled", False)
+    
+    with patch("ai_product_pilot.langgraph.nodes.ingest.get_supabase_client") as mock_supabase, \
+         patch("ai_product_pilot.langgraph.nodes.ingest.VectorStoreService") as mock_vector_store:
+        
+        vector_store = mock_vector_store.return_value
+        vector_store.add_documents = AsyncMock()
+        vector_store.delete_stale_chunks = AsyncMock(return_value=0)
+        
+        result_state = await ingest_feedback({
+            "feedback_id": "feedback-1",
+            "feedback_data": {"id": "feedback-1", "content": "   "},
+        })
+        
+        vector_store.add_documents.assert_not_called()
+        vector_store.delete_stale_chunks.assert_awaited_once()
+        update = mock_supabase.return_value.table.return_value.update.call_args.args[0]
+        assert update["status"] == "error"
+        assert result_state["chunk_count"] == 0
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi import HTTPException, Response
+from ai_product_pilot.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    select_columns,
+)
+
+
+def _query(rows):
+    """Fausse requête PostgREST chaînable renvoyant les lignes données"""
+    query = MagicMock()
+    query.or_.return_value = query
+    query.order.return_value = query
+    query.limit.return_value = query
+    query.execute.return_value.data = rows
+    return query
+
+
+def test_keyset_page_sets_next_cursor_and_filters_from_it():
+    """Test de la pagination par curseur sur (created_at, id)"""
+    rows = [{"id": f"id-{i}", "created_at": f"2024-05-0{9 - i}T10:00:00+00:00"} for i in range(3)]
+
+    response = Response()
+    page = keyset_page(_query(rows), "created_at", limit=2, cursor=None, response=response)
+    assert page == rows[:2]
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    assert decode_cursor(cursor) == ("2024-05-08T10:00:00+00:00", "id-1")
+
+    query = _query(rows[2:])
+    last_response = Response()
+    keyset_page(query, "created_at", limit=2, cursor=cursor, response=last_response)
+    query.or_.assert_called_once_with(
+        'created_at.lt."2024-05-08T10:00:00+00:00",'
+        'and(created_at.eq."2024-05-08T10:00:00+00:00",id.lt."id-1")'
+    )
+    query.limit.assert_called_once_with(3)
+    assert NEXT_CURSOR_HEADER not in last_response.headers
+
+
+def test_select_columns_and_invalid_cursor():
+    """Test de la projection fields= et du rejet des curseurs invalides"""
+    allowed = ("id", "title", "content", "created_at")
+    assert select_columns(None, allowed, ("id", "title"), ("id", "created_at")) == "id,created_at,title"
+    assert select_columns("content", allowed, ("id", "title"), ("id", "created_at")) == "id,created_at,content"
+    with pytest.raises(HTTPException):
+        select_columns("password", allowed, ("id",), ("id",))
+    with pytest.raises(HTTPException):
+        decode_cursor("pas-un-curseur")
+    assert decode_cursor(encode_cursor(12.5, "abc")) == (12.5, "abc")
@@ -0,0 +1,75 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from ai_product_pilot.services.rescoring import rescore_batch, rescore_stories
+from ai_product_pilot.services.scoring import calculate_rice_score, estimate_story_rice_parameters
+
+ENTITIES = {
+    "themes": ["performance", "export"],
+    "sentiments": {"performance": -0.8, "export": 0.2},
+    "user_personas": [{"role": "admin"}, {"role": "analyste"}],
+}
+
+
+def _row(story_id, themes, entities=ENTITIES, rice_score=1.0):
+    return {
+        "id": story_id,
+        "themes": themes,
+        "description": "Accélérer l'export",
+        "reach": 1.0,
+        "impact": 1.0,
+        "confidence": 1.0,
+        "effort": 1.0,
+        "rice_score": rice_score,
+        "entities": entities,
+    }
+
+
+def test_rescore_batch_only_returns_changed_stories():
+    """Test du recalcul vectorisé d'un lot : stories inchangées et manuelles ignorées"""
+    reach, impact, confidence, effort = estimate_story_rice_parameters({"themes": ["performance"], "description": ""}, ENTITIES)
+    unchanged = {
+        **_row("c", ["performance"]),
+        "reach": reach, "impact": impact, "confidence": confidence, "effort": effort,
+        "rice_score": calculate_rice_score(reach, impact, confidence, effort),
+    }
+    rows = [
+        _row("a", ["performance"], entities=json.dumps(ENTITIES)),
+        _row("b", ["export"], entities=None),
+        unchanged,
+    ]
+
+    updates = rescore_batch(rows)
+
+    assert [update["id"] for update in updates] == ["a"]
+    assert updates[0]["rice_score"] == unchanged["rice_score"]
+    assert updates[0]["impact"] == pytest.approx(5.5 + 0.8 * 4.5)
+
+
+@pytest.mark.asyncio
+async def test_rescore_stories_pages_by_id_and_bulk_updates():
+    """Test du parcours par lots et de l'écriture groupée des scores"""
+    batches = [[_row("a", ["performance"]), _row("b", ["export"])], [_row("c", ["export"], entities=None)]]
+    calls = []
+
+    def rpc(name, params):
+        calls.append((name, params))
+        result = MagicMock()
+        result.execute.return_value.data = batches.pop(0) if name == "stories_for_rescoring" else 2
+        return result
+
+    supabase = MagicMock()
+    supabase.rpc.side_effect = rpc
+    supabase.table.return_value.select.return_value.limit.return_value.execute.return_value.count = 3
+    progress = []
+
+    async def on_progress(processed, total, updated):
+        progress.append((processed, total, updated))
+
+    summary = await rescore_stories(supabase, batch_size=2, on_progress=on_progress)
+
+    assert [name for name, _ in calls] == ["stories_for_rescoring", "bulk_update_story_scores", "stories_for_rescoring"]
+    assert calls[2][1] == {"after_id": "b", "batch_size": 2}
+    assert len(calls[1][1]["updates"]) == 2
+    assert progress == [(2, 3, 2), (3, 3, 2)]
+    assert summary["processed"] == 3 and summary["updated"] == 2 and summary["skipped"] == 1
@@ -1,5 +1,12 @@
+import numpy as np
 import pytest
-from ai_product_pilot.services.scoring import calculate_rice_score, prioritize_stories, estimate_rice_parameters
+from ai_product_pilot.services.scoring import (
+    calculate_rice_score,
+    calculate_rice_scores,
+    estimate_rice_parameters,
+    prioritize_stories,
+    top_k_indices,
+)
 
 
 def test_calculate_rice_score():
@@ -107,4 +114,60 @@ def test_estimate_rice_parameters():
     assert impact > 7.0
     # Les autres paramètres devraient être raisonnables
     assert 1.0 <= confidence <= 10.0
-    assert 1.0 <= effort <= 10.0
\ No newline at end of file
+    assert 1.0 <= effort <= 10.0
+
+
+# Stories de référence : (reach, impact, confidence, effort) et score RICE attendu,
+# calculé à la main selon la formule R * I * (C / 10) / E arrondie à 2 décimales
+REFERENCE_STORIES = [
+    ((5.0, 5.0, 5.0, 5.0), 2.5),
+    ((10.0, 10.0, 10.0, 1.0), 100.0),
+    ((15.0, 5.0, 12.0, 0.0), 500.0),  # portée, confiance et effort ramenés aux bornes
+    ((-2.0, 8.0, 8.0, 2.0), 0.0),
+    ((3.0, 2.0, 9.0, 1.0), 5.4),
+    ((8.0, 7.0, 6.0, 4.0), 8.4),
+    ((5.0, 9.0, 7.0, 2.0), 15.75),
+    ((1.0, 1.0, 1.0, 3.0), 0.03),
+    ((6.0, 2.0, 5.0, 1.2), 5.0),
+    ((2.0, 5.0, 10.0, 2.0), 5.0),  # ex aequo avec la précédente
+    ((4.0, 4.0, 5.0, 0.05), 80.0),
+    ((7.0, 3.0, 3.0, 9.0), 0.7),
+]
+# Classement attendu : score décroissant, ordre d'origine à score égal
+REFERENCE_RANKING = [2, 1, 10, 6, 5, 4, 8, 9, 0, 11, 7, 3]
+
+
+def test_top_k_indices_keeps_original_order_on_ties():
+    """Test de la sélection partielle des k meilleurs scores"""
+    scores = [1.0, 5.0, 3.0, 5.0, 3.0, 0.5]
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores).tolist() == [1, 3, 2, 4, 0, 5]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_vectorized_scoring_matches_reference_scores_and_ranking():
+    """Test du scoring vectorisé sur des scores et un classement calculés à la main
+    (mesure des temps : scripts/bench_scoring.py)"""
+    columns = np.array([params for params, _ in REFERENCE_STORIES]).T
+    expected = [score for _, score in REFERENCE_STORIES]
+
+    assert calculate_rice_scores(*columns).tolist() == expected
+    assert [calculate_rice_score(*params) for params, _ in REFERENCE_STORIES] == expected
+    assert top_k_indices(expected).tolist() == REFERENCE_RANKING
+
+    stories = [
+        {"id": index, **dict(zip(("reach", "impact", "confidence", "effort"), params))}
+        for index, (params, _) in enumerate(REFERENCE_STORIES)
+    ]
+    top = prioritize_stories(stories, top_k=7)
+    assert [story["id"] for story in top] == REFERENCE_RANKING[:7]
+    assert [story["rice_score"] for story in top] == [500.0, 100.0, 80.0, 15.75, 8.4, 5.4, 5.0]
+
+
+def test_top_k_indices_matches_full_stable_sort():
+    """Test de la sélection partielle sur un grand backlog, avec de nombreux ex aequo"""
+    rng = np.random.default_rng(0)
+    scores = np.round(rng.uniform(0, 20, 5_000), 1)
+
+    for k in (1, 100, 4_999):
+        assert top_k_indices(scores, k).tolist() == np.argsort(-scores, kind="stable")[:k].tolist()
@@ -0,0 +1,54 @@
+import pytest
+from langchain.schema.document import Document
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.services import vector_store as vector_store_module
+from ai_product_pilot.services.search_cache import SearchCache
+
+
+class FakeBackend:
+    """Faux backend vectoriel qui compte les recherches"""
+
+    def __init__(self):
+        self.searches = 0
+
+    async def search(self, query, k, filter=None):
+        self.searches += 1
+        return [(Document(page_content=f"résultat pour {query}", metadata={"id": "d1", "type": "feedback"}), 0.9)]
+
+    async def add(self, documents):
+        pass
+
+    async def delete_ids(self, ids):
+        return len(ids)
+
+
+@pytest.mark.asyncio
+async def test_search_cache_serves_repeats_and_invalidates_on_write(tmp_path, monkeypatch):
+    """Test du cache de recherche : requêtes répétées servies sans backend, invalidées par les écritures"""
+    backend = FakeBackend()
+    cache = SearchCache(str(tmp_path / "search_cache.sqlite3"), ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(settings, "openai_api_key", "sk-test")
+    monkeypatch.setattr(settings, "search_cache_enabled", True)
+    monkeypatch.setattr(vector_store_module, "create_vector_backend", lambda embeddings: backend)
+    monkeypatch.setattr(vector_store_module, "get_search_cache", lambda: cache)
+    service = vector_store_module.VectorStoreService()
+
+    first = await service.search("Lenteur  au démarrage", limit=3)
+    first[0]["content"] = "modifié par l'appelant"
+    second = await service.search("lenteur au démarrage ", limit=3)
+    assert backend.searches == 1
+    # Le backend reçoit la requête d'origine, seule la clé de cache est normalisée
+    assert second[0]["content"] == "résultat pour Lenteur  au démarrage"
+
+    # Limite ou filtre différents : nouvelle recherche
+    await service.search("lenteur au démarrage", limit=3, filter_type="story")
+    assert backend.searches == 2
+
+    # Une écriture dans un autre processus (même base de génération) invalide le cache
+    SearchCache(cache.path, ttl_seconds=60, max_entries=10).invalidate()
+    await service.search("lenteur au démarrage", limit=3)
+    assert backend.searches == 3
+
+    await service.delete_by_ids(["d1"])
+    await service.search("lenteur au démarrage", limit=3)
+    assert backend.searches == 4
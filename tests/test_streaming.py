@@ -0,0 +1,93 @@
+import json
+import pytest
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from ai_product_pilot.langgraph.chains import ChainSpec, CompiledChain, chain_registry
+from ai_product_pilot.langgraph.nodes.generate import generate_stories
+from ai_product_pilot.langgraph.streaming import JsonItemStream, stream_chain
+from ai_product_pilot.models.backlog import UserStories
+from ai_product_pilot.services.events import event_broker
+
+
+def story(title):
+    return {
+        "title": title,
+        "as_a": "utilisateur",
+        "i_want": "exporter mes données",
+        "so_that": "les analyser",
+        "description": "Export CSV",
+        "acceptance_criteria": ["Le fichier contient toutes les colonnes"],
+        "themes": ["export"],
+    }
+
+
+RESPONSE = "```json\n" + json.dumps({"stories": [story("Export CSV"), story("Export PDF")]}) + "\n```"
+
+
+def fake_chain(response):
+    prompt = ChatPromptTemplate.from_template("Génère: {summary}")
+    llm = FakeListChatModel(responses=[response, response])
+    parser = PydanticOutputParser(pydantic_object=UserStories)
+    return CompiledChain(
+        spec=ChainSpec("generate_stories.txt", "gpt-4o", 0.5, UserStories),
+        prompt_version="v1",
+        prompt=prompt,
+        llm=llm,
+        parser=parser,
+        runnable=prompt | llm | parser,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_chain_matches_ainvoke(monkeypatch):
+    """Test du streaming d'une chaîne : même résultat final que l'appel sans streaming"""
+    compiled = fake_chain(RESPONSE)
+    monkeypatch.setattr(chain_registry, "compiled", lambda name: compiled)
+    deltas = []
+
+    async def on_text(delta):
+        deltas.append(delta)
+
+    streamed = await stream_chain("generate", {"summary": "s"}, on_text=on_text)
+
+    assert len(deltas) > 1 and "".join(deltas) == RESPONSE
+    assert streamed == await compiled.runnable.ainvoke({"summary": "s"})
+
+
+def test_json_item_stream_returns_each_item_once_complete():
+    """Test de l'analyse incrémentale : chaque story est renvoyée dès sa dernière accolade, une seule fois"""
+    cut = RESPONSE.index("Export PDF")
+    items = JsonItemStream("stories")
+    assert items.feed(RESPONSE[:10]) == []
+    assert [item["title"] for item in items.feed(RESPONSE[10:cut])] == ["Export CSV"]
+    assert [item["title"] for item in items.feed(RESPONSE[cut:])] == ["Export PDF"]
+
+    # Fragments d'un caractère, accolades et guillemets échappés dans les chaînes
+    text = json.dumps({"note": "{[", "stories": [story('Export "CSV" {v2}'), story("Export\\PDF")], "other": [{"title": "x"}]})
+    items = JsonItemStream("stories")
+    assert [item["title"] for char in text for item in items.feed(char)] == ['Export "CSV" {v2}', "Export\\PDF"]
+
+
+@pytest.mark.asyncio
+async def test_generate_stories_publishes_stories_as_they_complete(monkeypatch):
+    """Test de la publication des stories générées au fil des tokens"""
+    monkeypatch.setattr(chain_registry, "compiled", lambda name: fake_chain(RESPONSE))
+    subscription = event_broker.subscribe(topics=["stream"], feedback_id="fb-1")
+    try:
+        state = {"feedback_id": "fb-1", "summary": "s", "entities": {}}
+        result = await generate_stories(state)
+
+        events = []
+        while not subscription._queue.empty():
+            events.append(await subscription.get())
+        stories = [event for event in events if event["type"] == "story"]
+        assert [event["story"]["title"] for event in stories] == ["Export CSV", "Export PDF"]
+        # Seul un aperçu de la story est diffusé (taille bornée d'une notification)
+        assert "description" not in stories[0]["story"] and stories[0]["story"]["as_a"] == "utilisateur"
+        # La première story est publiée avant la fin de la génération
+        assert events.index(stories[0]) < len(events) - 2
+        assert [s["title"] for s in result["stories"]] == ["Export CSV", "Export PDF"]
+        assert result["stories"][0]["feedback_ids"] == ["fb-1"]
+    finally:
+        event_broker.unsubscribe(subscription)
@@ -0,0 +1,34 @@
+import httpx
+from supabase import create_client
+from ai_product_pilot.core.settings import settings
+from ai_product_pilot.lib import supabase as supabase_module
+
+
+def test_pooled_client_replaces_sdk_sessions(monkeypatch):
+    """
+    Garde-fou du client Supabase poolé : il remplace des attributs internes du
+    SDK (versions épinglées dans pyproject.toml). Ce test échoue si une mise à
+    jour du SDK renomme ou supprime ces attributs.
+    """
+    monkeypatch.setattr(settings, "supabase_url", "https://project.supabase.co")
+    monkeypatch.setattr(settings, "supabase_key", "header.payload.signature")
+    monkeypatch.setattr(supabase_module, "_client", None)
+
+    # Attributs du SDK remplacés par _create_pooled_client et close_supabase_client
+    sdk_client = create_client(settings.supabase_url, settings.supabase_key)
+    assert sdk_client._postgrest is None and sdk_client._storage is None
+    assert isinstance(sdk_client.postgrest.session, httpx.Client)
+    assert sdk_client.storage._client is sdk_client.storage.session
+
+    client = supabase_module.init_supabase_client()
+    postgrest, storage = client._postgrest, client._storage
+
+    for session in (postgrest.session, storage.session):
+        assert isinstance(session, httpx.Client)
+        # Sessions instrumentées créées par _pooled_session, et non celles du SDK
+        assert session.event_hooks["response"]
+        assert str(session.base_url).startswith(settings.supabase_url)
+    assert storage._client is storage.session
+
+    supabase_module.close_supabase_client()
+    assert postgrest.session.is_closed and storage.session.is_closed
@@ -0,0 +1,14 @@
+from unittest.mock import MagicMock
+from ai_product_pilot.api.routes import filter_themes
+
+
+def test_filter_themes_uses_array_operators():
+    """Test du filtrage par thèmes via les opérateurs de tableau (@> et &&)"""
+    query = MagicMock()
+    filter_themes(query, ["Performance", "UX mobile"], "all")
+    query.contains.assert_called_once_with("themes", '{"Performance","UX mobile"}')
+
+    query = MagicMock()
+    filter_themes(query, ['Export "CSV", PDF'], "any")
+    query.ov.assert_called_once_with("themes", '{"Export \\"CSV\\", PDF"}')
+    query.contains.assert_not_called()
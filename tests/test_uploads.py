@@ -0,0 +1,97 @@
+import hashlib
+import io
+import os
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from ai_product_pilot.api.uploads import UploadSizeLimitMiddleware
+from ai_product_pilot.services.uploads import UploadTooLargeError, read_upload, upload_to_storage
+
+
+@pytest.mark.asyncio
+async def test_read_upload_hashes_by_chunks_without_copy():
+    """Test du calcul de taille et d'empreinte par blocs, sur le fichier reçu lui-même"""
+    data = os.urandom(300_000)
+    upload = UploadFile(io.BytesIO(data), filename="export.csv")
+
+    received = await read_upload(upload, max_bytes=1_000_000, chunk_bytes=64 * 1024)
+
+    assert received.size == len(data)
+    assert received.content_hash == hashlib.sha256(data).hexdigest()
+    assert received.file is upload.file and received.file.tell() == 0
+
+
+@pytest.mark.asyncio
+async def test_read_upload_rejects_oversized_files():
+    """Test de l'arrêt de la lecture dès que la taille maximale est dépassée"""
+    upload = UploadFile(io.BytesIO(b"x" * 10_000), filename="big.txt")
+
+    with pytest.raises(UploadTooLargeError):
+        await read_upload(upload, max_bytes=4_096, chunk_bytes=1_024)
+
+    assert upload.file.tell() <= 5 * 1_024
+
+
+@pytest.mark.asyncio
+async def test_upload_to_storage_streams_the_buffered_file(tmp_path):
+    """Test de l'envoi du tampon sur disque comme fichier ouvert en lecture, sans copie"""
+    from io import BufferedReader
+    from tempfile import SpooledTemporaryFile
+    from unittest.mock import MagicMock
+
+    buffered = SpooledTemporaryFile(max_size=16)
+    buffered.write(b"a" * 100)
+    upload = await read_upload(UploadFile(buffered, filename="a.txt"), max_bytes=1_000, chunk_bytes=10)
+    sent = {}
+
+    def upload_file(path, file, file_options):
+        sent.update(type=type(file), data=file.read(), options=file_options)
+
+    supabase = MagicMock()
+    supabase.storage.from_.return_value.upload.side_effect = upload_file
+    upload_to_storage(supabase, "feedback_raw", "f.txt", upload, "text/plain")
+
+    assert sent == {"type": BufferedReader, "data": b"a" * 100, "options": {"content-type": "text/plain"}}
+
+
+@pytest.mark.asyncio
+async def test_upload_size_limit_stops_chunked_bodies_while_receiving():
+    """Test du refus d'un upload envoyé par blocs dès que la limite est dépassée"""
+    app = FastAPI()
+    calls = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"ok": True}
+
+    app.add_middleware(UploadSizeLimitMiddleware, path="/upload", max_bytes=4_096, detail="trop gros")
+    headers = [(b"content-type", b"multipart/form-data; boundary=b")]
+    chunks = [b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n']
+    chunks += [b"x" * 1_024] * 100 + [b"\r\n--b--\r\n"]
+    received = []
+    sent = []
+
+    # Corps sans Content-Length, reçu bloc par bloc
+    async def receive():
+        received.append(1)
+        return {"type": "http.request", "body": chunks[len(received) - 1], "more_body": len(received) < len(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/upload", "raw_path": b"/upload", "root_path": "",
+        "query_string": b"", "headers": headers, "http_version": "1.1", "scheme": "http",
+        "server": ("test", 80), "client": ("test", 1234),
+    }
+    await app(scope, receive, send)
+
+    assert sent[0]["status"] == 413 and sent[1]["body"] == b'{"detail":"trop gros"}'
+    assert calls == [] and len(received) < 10
+
+    # Taille annoncée excessive : refus avant lecture du corps
+    response = TestClient(app).post(
+        "/upload", content=b"x" * 5_000, headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert response.status_code == 413
@@ -0,0 +1,168 @@
+import os
+import numpy as np
+from ai_product_pilot.services.vector_backends import LocalVectorIndex
+
+
+def test_local_vector_index_search_filters_and_deletes(tmp_path):
+    """Test de la recherche top-k cosinus, des filtres par masque et des suppressions"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["f1", "f2", "s1"],
+        ["lenteur au démarrage", "prix trop élevé", "accélérer le démarrage"],
+        [
+            {"type": "feedback", "namespace": "feedback:1"},
+            {"type": "feedback", "namespace": "feedback:1"},
+            {"type": "story", "namespace": "story:s1"},
+        ],
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [2.0, 0.2, 0.0]],
+    )
+
+    results = index.search([1.0, 0.1, 0.0], k=2)
+    assert [doc_id for doc_id, *_ in results] == ["s1", "f1"]
+    assert results[0][3] > 0.99  # vecteurs normalisés : similarité cosinus
+
+    stories = index.search([1.0, 0.0, 0.0], k=5, filter={"type": "story"})
+    assert [(doc_id, metadata["namespace"]) for doc_id, _, metadata, _ in stories] == [("s1", "story:s1")]
+
+    assert index.delete_namespaces(["feedback:1"]) == 2
+    assert [doc_id for doc_id, *_ in index.search([1.0, 0.0, 0.0], k=5)] == ["s1"]
+
+    # Un autre processus ouvre le même index projeté en mémoire
+    reopened = LocalVectorIndex(str(tmp_path / "index"))
+    assert [doc_id for doc_id, *_ in reopened.search([0.0, 1.0, 0.0], k=5, filter={"type": "feedback"})] == []
+    assert isinstance(reopened._matrix, np.memmap)
+
+
+def test_local_vector_index_keyword_search(tmp_path):
+    """Test de la recherche plein texte de l'index local (FTS5), filtres et suppressions compris"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["f1", "f2", "s1"],
+        ["Crash à l'export PDF, ticket #4528", "Export CSV trop lent", "Corriger l'export PDF (#4528)"],
+        [{"type": "feedback"}, {"type": "feedback"}, {"type": "story"}],
+        [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+    )
+
+    assert {doc_id for doc_id, *_ in index.keyword_search("#4528", k=5)} == {"f1", "s1"}
+    assert [doc_id for doc_id, *_ in index.keyword_search("export pdf", k=5, filter={"type": "story"})] == ["s1"]
+
+    index.delete_ids(["f1"])
+    assert [doc_id for doc_id, *_ in index.keyword_search("4528", k=5)] == ["s1"]
+
+
+def test_local_vector_index_search_batch_threshold(tmp_path):
+    """Test de la recherche groupée de plusieurs vecteurs avec seuil de similarité"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["s1", "s2", "f1"],
+        ["performances mobiles", "export PDF", "application lente"],
+        [{"type": "story"}, {"type": "story"}, {"type": "feedback"}],
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 0.05, 0.0]],
+    )
+
+    results = index.search_batch(
+        [[0.99, 0.05, 0.0], [0.0, 0.0, 1.0], [0.1, 1.0, 0.0]], k=1, filter={"type": "story"}, threshold=0.9
+    )
+    assert [[doc_id for doc_id, *_ in matches] for matches in results] == [["s1"], [], ["s2"]]
+    assert index.search_batch([], k=1) == []
+
+
+def test_local_vector_index_chunks_replace_previous_ingestion(tmp_path):
+    """Test de la relecture paginée des segments et du remplacement d'une ingestion précédente"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["old"], ["ancien segment"],
+        [{"namespace": "feedback:1", "chunk": 0, "ingest_run": "r1"}],
+        [[1.0, 0.0]],
+    )
+    index.add(
+        [f"c{i}" for i in range(12)], [f"segment {i}" for i in range(12)],
+        [{"namespace": "feedback:1", "chunk": i, "ingest_run": "r2"} for i in range(12)],
+        [[0.0, 1.0]] * 12,
+    )
+
+    assert index.delete_stale_chunks("feedback:1", "r2") == 1
+    pages, after = [], -1
+    while True:
+        page = index.list_chunks("feedback:1", after, limit=5)
+        pages.append([doc_id for doc_id, *_ in page])
+        if len(page) < 5:
+            break
+        after = page[-1][2]["chunk"]
+    assert pages == [["c0", "c1", "c2", "c3", "c4"], ["c5", "c6", "c7", "c8", "c9"], ["c10", "c11"]]
+
+
+def test_local_vector_index_filters_use_containment(tmp_path):
+    """Test des filtres de l'index local, alignés sur `metadata @> filter` de Postgres"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["s1", "s2", "s3"],
+        ["export PDF", "export CSV", "mode sombre"],
+        [
+            {"type": "story", "themes": ["export", "pdf"], "owner": {"team": "core"}},
+            {"type": "story", "themes": ["export"], "owner": {"team": "data"}},
+            {"type": "story", "themes": "export"},
+        ],
+        [[1.0, 0.0], [0.9, 0.1], [0.8, 0.2]],
+    )
+
+    def ids(filter):
+        return [doc_id for doc_id, *_ in index.search([1.0, 0.0], k=5, filter=filter)]
+
+    assert ids({"themes": ["export"]}) == ["s1", "s2"]
+    assert ids({"themes": ["pdf", "export"]}) == ["s1"]
+    assert ids({"themes": "export"}) == ["s3"]
+    assert ids({"owner": {"team": "data"}}) == ["s2"]
+    assert [doc_id for doc_id, *_ in index.keyword_search("export", k=5, filter={"themes": ["pdf"]})] == ["s1"]
+
+
+def test_local_vector_index_compacts_deleted_rows(tmp_path):
+    """Test du compactage : la matrice et le fichier de vecteurs ne gardent que les lignes vivantes"""
+    index = LocalVectorIndex(str(tmp_path / "index"), compact_ratio=0.5)
+    vectors = np.eye(4, dtype=np.float32).tolist()
+    index.add(
+        ["a", "b", "c", "d"],
+        ["alpha export", "bravo", "charlie export", "delta"],
+        [{"namespace": name} for name in ("n1", "n2", "n3", "n4")],
+        vectors,
+    )
+    other_process = LocalVectorIndex(str(tmp_path / "index"))
+    assert other_process.search(vectors[2], k=1)[0][0] == "c"
+
+    # Sous le seuil, la suppression reste logique
+    assert index.delete_ids(["b"]) == 1
+    assert index._matrix.shape == (4, 4)
+
+    assert index.delete_namespaces(["n1"]) == 1
+    assert index._matrix.shape == (2, 4)
+    assert os.path.getsize(index.vectors_path) == 2 * 4 * 4
+    assert [doc_id for doc_id, *_ in index.search(vectors[3], k=5)][0] == "d"
+    assert [doc_id for doc_id, *_ in index.keyword_search("export", k=5)] == ["c"]
+
+    # Une vue chargée avant le compactage est rechargée au lieu de renvoyer un autre document
+    assert other_process.search(vectors[2], k=1)[0][0] == "c"
+
+    index.add(["e"], ["echo"], [{"namespace": "n5"}], [[1.0, 1.0, 0.0, 0.0]])
+    assert index.search([1.0, 1.0, 0.0, 0.0], k=1)[0][0] == "e"
+    assert index.delete_ids(["c", "d", "e"]) == 3 and index.compact() == 0
+    assert os.path.getsize(index.vectors_path) == 0 and index.search(vectors[0], k=5) == []
+
+
+def test_local_vector_index_updates_namespace_metadata(tmp_path):
+    """Test de la mise à jour des métadonnées d'une story fusionnée (score reporté dans les filtres et résultats)"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(
+        ["s1", "s2"],
+        ["story 1", "story 2"],
+        [
+            {"type": "story", "namespace": "story:s1", "rice_score": 2.0, "feedback_ids": ["f1"]},
+            {"type": "story", "namespace": "story:s2", "rice_score": 5.0, "feedback_ids": ["f2"]},
+        ],
+        [[1.0, 0.0], [0.0, 1.0]],
+    )
+    assert index.search([1.0, 0.0], k=1, filter={"feedback_ids": ["f3"]}) == []
+
+    assert index.update_namespace_metadata({"story:s1": {"rice_score": 9.0, "feedback_ids": ["f1", "f3"]}}) == 1
+
+    (doc_id, _, metadata, _), = index.search([1.0, 0.0], k=1, filter={"feedback_ids": ["f3"]})
+    assert doc_id == "s1" and metadata["rice_score"] == 9.0 and metadata["type"] == "story"